@@ -0,0 +1,262 @@
+"""Benchmarks of the embedding hot paths.
+
+Each benchmark times one stage of an embedding calculation with the `bench` fixture, which records the wall time
+and the peak resident set size (RSS) of the process during the stage. All records are written to a JSON file
+at the end of the session, which can be compared against a previous run to detect performance regressions:
+
+    python -m pytest benchmarks --benchmark-json=new.json --benchmark-compare=old.json
+
+Larger systems are marked as 'slow' or 'veryslow'; as for the tests, 'veryslow' benchmarks are skipped by default,
+`-m "not slow and not veryslow"` selects only the smallest systems and `-m ""` selects all.
+"""
+
+import datetime
+import json
+import os
+import platform
+import resource
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+import pyscf
+import pytest
+
+import vayesta
+import vayesta.ewf
+from vayesta.misc import molecules, solids
+from vayesta.tests import testsystems
+
+# --- Benchmarked systems
+
+
+@lru_cache(maxsize=None)
+def water_cluster(nwater):
+    """Chain of water molecules in the 6-31G basis, with density-fitting."""
+    atom = sum([molecules.water(origin=(0, 0, -3 * i)) for i in range(nwater)], [])
+    return testsystems.TestMolecule(atom=atom, basis="6-31G", auxbasis="6-31G")
+
+
+@lru_cache(maxsize=None)
+def hubbard_chain(nsite):
+    """Half-filled Hubbard chain with U/t = 4; the boundary condition is chosen to give a closed shell."""
+    boundary = "pbc" if (nsite % 4 == 2) else "apbc"
+    return testsystems.TestLattice(nsite, hubbard_u=4.0, nelectron=nsite, boundary=boundary, with_df=True)
+
+
+@lru_cache(maxsize=None)
+def diamond(kmesh):
+    """Diamond in the STO-3G basis with a k-point mesh."""
+    a, atom = solids.diamond()
+    return testsystems.TestSolid(a=a, atom=atom, basis="sto3g", auxbasis="sto3g", exp_to_discard=0.1, kmesh=kmesh)
+
+
+SYSTEMS = {
+    "water": [
+        pytest.param(("water", 1), id="water1"),
+        pytest.param(("water", 2), id="water2"),
+        pytest.param(("water", 4), id="water4", marks=pytest.mark.slow),
+        pytest.param(("water", 8), id="water8", marks=pytest.mark.veryslow),
+    ],
+    "hubbard": [
+        pytest.param(("hubbard", 10), id="hubbard10"),
+        pytest.param(("hubbard", 30), id="hubbard30", marks=pytest.mark.slow),
+        pytest.param(("hubbard", 102), id="hubbard102", marks=pytest.mark.veryslow),
+    ],
+    "diamond": [
+        pytest.param(("diamond", (1, 1, 1)), id="diamond111"),
+        pytest.param(("diamond", (2, 1, 1)), id="diamond211", marks=pytest.mark.slow),
+        pytest.param(("diamond", (2, 2, 2)), id="diamond222", marks=pytest.mark.veryslow),
+    ],
+}
+
+_BUILDERS = {"water": water_cluster, "hubbard": hubbard_chain, "diamond": diamond}
+
+
+def get_mf(system):
+    """Mean-field of a benchmarked system, given as tuple (kind, size)."""
+    kind, size = system
+    return _BUILDERS[kind](size).rhf()
+
+
+def make_embedding(system, fragment=True, **kwargs):
+    """EWF object with one fragment per atom (water, diamond) or per two sites (Hubbard chain)."""
+    kwargs["bath_options"] = kwargs.get("bath_options", dict(threshold=1e-5))
+    emb = vayesta.ewf.EWF(get_mf(system), **kwargs)
+    if fragment:
+        add_fragments(emb, system)
+    return emb
+
+
+def add_fragments(emb, system):
+    if system[0] == "hubbard":
+        with emb.site_fragmentation() as f:
+            for site in range(0, emb.mol.nsite, 2):
+                f.add_atomic_fragment([site, site + 1])
+    else:
+        with emb.iao_fragmentation() as f:
+            f.add_all_atomic_fragments()
+
+
+def make_clusters(emb):
+    """Make baths and clusters of all fragments."""
+    for x in emb.get_fragments(sym_parent=None):
+        emb._make_bath_and_cluster(x)
+
+
+@pytest.fixture
+def emb(system):
+    """Factory of EWF objects for the benchmarked system: `emb(fragment=True, **kwargs)`."""
+
+    def factory(fragment=True, **kwargs):
+        return make_embedding(system, fragment=fragment, **kwargs)
+
+    return factory
+
+
+@pytest.fixture
+def emb_with_clusters(emb):
+    """Factory of EWF objects, with the baths and clusters of all fragments already made."""
+
+    def factory(**kwargs):
+        embedding = emb(**kwargs)
+        make_clusters(embedding)
+        return embedding
+
+    return factory
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmark")
+    group.addoption("--benchmark-json", default="benchmarks.json", help="Output JSON file [default: %(default)s].")
+    group.addoption("--benchmark-compare", default=None, help="JSON file of a previous run to compare against.")
+    group.addoption(
+        "--benchmark-tolerance",
+        type=float,
+        default=1.5,
+        help="Fail benchmarks which take longer than this factor times the time of the compared run "
+        "[default: %(default)s].",
+    )
+    group.addoption(
+        "--benchmark-min-time",
+        type=float,
+        default=0.1,
+        help="Benchmarks shorter than this (in seconds) are never regressions [default: %(default)s].",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "systems(*kinds): benchmark systems of these kinds (water, hubbard, diamond)")
+    config._benchmark_records = []
+
+
+def pytest_generate_tests(metafunc):
+    if "system" not in metafunc.fixturenames:
+        return
+    marker = metafunc.definition.get_closest_marker("systems")
+    kinds = marker.args if marker is not None else SYSTEMS.keys()
+    metafunc.parametrize("system", [param for kind in kinds for param in SYSTEMS[kind]])
+
+
+def pytest_sessionfinish(session, exitstatus):
+    records = getattr(session.config, "_benchmark_records", None)
+    if not records:
+        return
+    data = dict(
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        machine=dict(
+            node=platform.node(),
+            processor=platform.processor(),
+            omp_num_threads=os.environ.get("OMP_NUM_THREADS"),
+        ),
+        versions=dict(
+            vayesta=vayesta.__version__,
+            pyscf=pyscf.__version__,
+            numpy=np.__version__,
+            python=platform.python_version(),
+        ),
+        benchmarks=records,
+    )
+    with open(session.config.getoption("--benchmark-json"), "w") as f:
+        json.dump(data, f, indent=2)
+
+
+# --- Timing and memory
+
+
+def get_rss():
+    """Current resident set size in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # Peak instead of current RSS (kB on Linux, bytes on macOS):
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if platform.system() == "Darwin" else 1024 * rss
+
+
+class PeakRSS:
+    """Context manager, which samples the RSS in a background thread, to determine its peak."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start = self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, get_rss())
+
+    def __enter__(self):
+        self.start = self.peak = get_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_rss())
+
+
+def _load_reference(config):
+    path = config.getoption("--benchmark-compare")
+    if path is None:
+        return {}
+    if not hasattr(config, "_benchmark_reference"):
+        with open(path) as f:
+            config._benchmark_reference = {(b["test"], b["stage"]): b for b in json.load(f)["benchmarks"]}
+    return config._benchmark_reference
+
+
+@pytest.fixture
+def bench(request):
+    """Run and record a benchmarked stage: `result = bench(stage, func, *args, **kwargs)`."""
+    config = request.config
+
+    def run(stage, func, *args, **kwargs):
+        with PeakRSS() as rss:
+            t0 = time.perf_counter()
+            result = func(*args, **kwargs)
+            wall_time = time.perf_counter() - t0
+        record = dict(
+            test=request.node.nodeid,
+            stage=stage,
+            wall_time=wall_time,
+            rss_start=rss.start,
+            rss_peak=rss.peak,
+            rss_increase=rss.peak - rss.start,
+        )
+        config._benchmark_records.append(record)
+        ref = _load_reference(config).get((record["test"], stage))
+        if ref is not None and wall_time > config.getoption("--benchmark-min-time"):
+            ratio = wall_time / ref["wall_time"]
+            if ratio > config.getoption("--benchmark-tolerance"):
+                pytest.fail(
+                    "Regression in stage %s: %.3f s vs %.3f s (%.2fx)" % (stage, wall_time, ref["wall_time"], ratio)
+                )
+        return result
+
+    return run
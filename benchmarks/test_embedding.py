@@ -0,0 +1,106 @@
+import pytest
+
+import vayesta
+import vayesta.rpa
+from vayesta.core.bath import DMET_Bath, MP2_Bath
+
+
+def test_fragmentation(bench, emb, system):
+    embedding = emb(fragment=False)
+    if system[0] == "hubbard":
+
+        def fragmentation():
+            with embedding.site_fragmentation() as f:
+                for site in range(0, embedding.mol.nsite, 2):
+                    f.add_atomic_fragment([site, site + 1])
+
+    else:
+
+        def fragmentation():
+            with embedding.iao_fragmentation() as f:
+                f.add_all_atomic_fragments()
+
+    bench("fragmentation", fragmentation)
+
+
+def test_dmet_bath(bench, emb):
+    embedding = emb()
+    fragments = embedding.get_fragments(sym_parent=None)
+
+    def dmet_bath():
+        for x in fragments:
+            DMET_Bath(x, dmet_threshold=x.opts.bath_options["dmet_threshold"]).kernel()
+
+    bench("dmet_bath", dmet_bath)
+
+
+def test_mp2_bath(bench, emb):
+    embedding = emb()
+    fragments = embedding.get_fragments(sym_parent=None)
+    dmet_baths = []
+    for x in fragments:
+        dmet = DMET_Bath(x, dmet_threshold=x.opts.bath_options["dmet_threshold"])
+        dmet.kernel()
+        dmet_baths.append(dmet)
+
+    def mp2_bath():
+        for x, dmet in zip(fragments, dmet_baths):
+            for occtype in ("occupied", "virtual"):
+                MP2_Bath(x, dmet_bath=dmet, occtype=occtype)
+
+    bench("mp2_bath", mp2_bath)
+
+
+def test_ao2mo(bench, emb_with_clusters):
+    embedding = emb_with_clusters()
+    fragments = embedding.get_fragments(sym_parent=None)
+
+    def ao2mo():
+        for x in fragments:
+            embedding.get_eris_array(x.cluster.c_active)
+
+    bench("ao2mo", ao2mo)
+
+
+@pytest.mark.parametrize("solver", ["MP2", "CISD", "CCSD"])
+def test_solver(bench, emb_with_clusters, solver):
+    embedding = emb_with_clusters(solver=solver)
+    fragments = embedding.get_fragments(sym_parent=None)
+
+    def solve():
+        for x in fragments:
+            x.get_solver(solver).kernel()
+
+    bench("solver_%s" % solver, solve)
+
+
+@pytest.mark.systems("hubbard")
+def test_solver_fci(bench, emb_with_clusters):
+    embedding = emb_with_clusters(solver="FCI", bath_options=dict(bathtype="dmet"))
+    fragments = embedding.get_fragments(sym_parent=None)
+
+    def solve():
+        for x in fragments:
+            x.get_solver("FCI").kernel()
+
+    bench("solver_FCI", solve)
+
+
+def test_rdm(bench, emb):
+    embedding = emb(solver_options=dict(solve_lambda=True))
+    embedding.kernel()
+    bench("make_rdm1", embedding.make_rdm1)
+    bench("make_rdm2", embedding.make_rdm2)
+
+
+@pytest.mark.systems("water", "diamond")
+def test_icmp2(bench, emb):
+    embedding = emb()
+    embedding.kernel()
+    bench("icmp2", embedding.get_intercluster_mp2_energy)
+
+
+def test_rirpa_moments(bench, emb):
+    # For k-point sampled mean-fields, use the mean-field folded to the supercell:
+    rirpa = vayesta.rpa.ssRIRPA(emb(fragment=False).mf)
+    bench("rirpa_moments", rirpa.kernel_moms, 1)
@@ -0,0 +1,35 @@
+import pyscf
+import pyscf.gto
+import pyscf.scf
+import pyscf.cc
+import vayesta
+import vayesta.ewf
+from vayesta.misc.molecules import water, ethanol
+
+for name, atom in (("Water", water()), ("Ethanol", ethanol())):
+    mol = pyscf.gto.Mole()
+    mol.atom = atom
+    mol.basis = "cc-pVDZ"
+    mol.output = "pyscf.txt"
+    mol.build()
+
+    # Hartree-Fock
+    mf = pyscf.scf.RHF(mol)
+    mf.kernel()
+
+    # Reference full system CCSD(T):
+    cc = pyscf.cc.CCSD(mf)
+    cc.kernel()
+    e_t = cc.ccsd_t()
+
+    print(name)
+    print("E(HF)=                %+16.8f Ha" % mf.e_tot)
+    print("E(CCSD(T))=           %+16.8f Ha" % (cc.e_tot + e_t))
+    for eta in (1e-5, 1e-6, 1e-7):
+        # Embedded CCSD(T): the (T) correction is calculated from fragment projected CCSD amplitudes
+        emb = vayesta.ewf.EWF(mf, solver="CCSD(T)", bath_options=dict(threshold=eta))
+        emb.kernel()
+        print(
+            "E(Emb. CCSD(T))[eta=%.0e]= %+16.8f Ha  E(T)= %+16.8f Ha  (full system: %+16.8f Ha)"
+            % (eta, emb.e_tot, emb.get_pert_t_energy(), e_t)
+        )
@@ -0,0 +1,116 @@
+import logging
+
+import numpy as np
+import pyscf.lib
+
+from vayesta.core.util import brange, dot, einsum, log_time, memory_string
+
+log = logging.getLogger(__name__)
+
+
+class CDERI_Store:
+    """Three-center integrals (L|IA) between all occupied and all virtual MOs.
+
+    The integrals are calculated once, such that the (L|ia) integrals of any orbitals i and a,
+    which lie in the space of the occupied and virtual MOs, respectively, can be obtained by a rotation,
+    without repeating the loop over the AO integrals.
+
+    Parameters
+    ----------
+    emb : Embedding
+        Embedding object, used for the calculation of the integrals via `emb.get_cderi`.
+    mo_coeff_occ : (n(AO), n(occ)) array
+        Occupied MO coefficients.
+    mo_coeff_vir : (n(AO), n(vir)) array
+        Virtual MO coefficients.
+    max_memory : int, optional
+        If the integrals require more memory (in bytes) than `max_memory`, they are stored in a temporary
+        HDF5 file instead. Default: 4 GB.
+    disk : bool, optional
+        Always store integrals in a temporary HDF5 file. Default: False.
+    """
+
+    def __init__(self, emb, mo_coeff_occ, mo_coeff_vir, max_memory=int(4e9), disk=False):
+        self.mo_coeff_occ = mo_coeff_occ
+        self.mo_coeff_vir = mo_coeff_vir
+        self.ovlp = emb.get_ovlp()
+        self.max_memory = max_memory
+        self._h5file = None
+        nocc = mo_coeff_occ.shape[-1]
+        nvir = mo_coeff_vir.shape[-1]
+
+        with log_time(log.timing, "Time for (L|ov) store: %s"):
+            # For 2D systems, this includes the negative part:
+            naux = (emb.kdf if emb.kdf is not None else emb.cderi_df).get_naoaux()
+            nbytes = naux * nocc * nvir * 8
+            # Without occupied orbitals, the (empty) integrals are kept in memory:
+            disk = (disk or (nbytes > max_memory)) and nocc > 0
+            log.info(
+                "Storing (L|ov) integrals (%d x %d x %d) %s: %s",
+                naux,
+                nocc,
+                nvir,
+                "on disk" if disk else "in memory",
+                memory_string(nbytes),
+            )
+            if not disk:
+                self.cderi, self.cderi_neg = emb.get_cderi((mo_coeff_occ, mo_coeff_vir))
+                return
+            self._h5file = pyscf.lib.H5TmpFile()
+            self.cderi_neg = None
+            blksize = max(int(max_memory / max(naux * nvir * 8, 1)), 1)
+            for blk in brange(0, nocc, blksize):
+                cderi_blk, cderi_neg_blk = emb.get_cderi((mo_coeff_occ[:, blk], mo_coeff_vir))
+                if blk.start == 0:
+                    shape = (cderi_blk.shape[0], nocc, nvir)
+                    self.cderi = self._h5file.create_dataset("cderi", shape, dtype=cderi_blk.dtype)
+                self.cderi[:, blk] = cderi_blk
+                if cderi_neg_blk is not None:
+                    if blk.start == 0:
+                        self.cderi_neg = np.zeros((cderi_neg_blk.shape[0], nocc, nvir), dtype=cderi_neg_blk.dtype)
+                    self.cderi_neg[:, blk] = cderi_neg_blk
+
+    @property
+    def naux(self):
+        return self.cderi.shape[0]
+
+    def _get_rotation(self, mo_coeff, c, tol):
+        r = dot(mo_coeff.T, self.ovlp, c)
+        err = abs(dot(mo_coeff, r) - c).max() if c.size else 0.0
+        if err > tol:
+            log.debugv("Orbitals not contained in MO space (error= %.2e)", err)
+            return None
+        return r
+
+    def get_cderi(self, c_occ, c_vir, tol=1e-8):
+        """Get (L|ia) integrals.
+
+        Parameters
+        ----------
+        c_occ : (n(AO), n(i)) array
+            Orbital coefficients of i, which need to lie in the occupied MO space.
+        c_vir : (n(AO), n(a)) array
+            Orbital coefficients of a, which need to lie in the virtual MO space.
+        tol : float, optional
+            Tolerance for the check that the orbitals lie within the respective MO space. Default: 1e-8.
+
+        Returns
+        -------
+        cderi : (n(aux), n(i), n(a)) array or None
+            Three-center integrals. None, if the orbitals do not lie within the respective MO spaces.
+        cderi_neg : (n(aux-), n(i), n(a)) array or None
+            Negative part of three-center integrals (2D systems only).
+        """
+        r_occ = self._get_rotation(self.mo_coeff_occ, c_occ, tol)
+        r_vir = self._get_rotation(self.mo_coeff_vir, c_vir, tol)
+        if r_occ is None or r_vir is None:
+            return None, None
+        nocc, nvir = r_occ.shape[-1], r_vir.shape[-1]
+        cderi = np.empty((self.naux, nocc, nvir), dtype=self.cderi.dtype)
+        blksize = max(int(self.max_memory / max(self.cderi.shape[1] * self.cderi.shape[2] * 8, 1)), 1)
+        for blk in brange(0, self.naux, blksize):
+            cderi[blk] = einsum("Lia,ij,ab->Ljb", self.cderi[blk], r_occ, r_vir)
+        cderi_neg = None
+        if self.cderi_neg is not None:
+            cderi_neg = einsum("Lia,ij,ab->Ljb", self.cderi_neg, r_occ, r_vir)
+        return cderi, cderi_neg
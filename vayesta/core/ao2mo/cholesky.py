@@ -0,0 +1,115 @@
+import logging
+
+import numpy as np
+import pyscf.ao2mo
+import pyscf.lib
+
+from vayesta.core.util import memory_string
+
+log = logging.getLogger(__name__)
+
+
+def _get_diagonal(mol):
+    """Diagonal (pq|pq) of AO ERIs, for pairs p >= q in lower-triangular order."""
+    nao = mol.nao_nr()
+    ao_loc = mol.ao_loc_nr()
+    diag = np.zeros((nao, nao))
+    for ish in range(mol.nbas):
+        i0, i1 = ao_loc[ish], ao_loc[ish + 1]
+        for jsh in range(ish + 1):
+            j0, j1 = ao_loc[jsh], ao_loc[jsh + 1]
+            eri = mol.intor("int2e", shls_slice=(ish, ish + 1, jsh, jsh + 1, ish, ish + 1, jsh, jsh + 1))
+            eri = eri.reshape((i1 - i0) * (j1 - j0), -1)
+            diag[i0:i1, j0:j1] = eri.diagonal().reshape(i1 - i0, j1 - j0)
+    return pyscf.lib.pack_tril(diag)
+
+
+class _ColumnsDirect:
+    """Columns (:|rs) of the AO ERIs in lower-triangular pair order, computed for the shell pair of rs.
+
+    The integrals of the most recent shell pair are kept, as consecutive pivots often belong to the same shell pair.
+    """
+
+    def __init__(self, mol):
+        self.mol = mol
+        self.ao_loc = mol.ao_loc_nr()
+        self.ao_shell = np.repeat(np.arange(mol.nbas), np.diff(self.ao_loc))
+        self.rows, self.cols = np.tril_indices(mol.nao_nr())
+        self._shells = None
+        self._eri = None
+
+    def __call__(self, rs):
+        r, s = self.rows[rs], self.cols[rs]
+        rsh, ssh = self.ao_shell[r], self.ao_shell[s]
+        if self._shells != (rsh, ssh):
+            nbas = self.mol.nbas
+            shls_slice = (0, nbas, 0, nbas, rsh, rsh + 1, ssh, ssh + 1)
+            self._eri = self.mol.intor("int2e", aosym="s2ij", shls_slice=shls_slice)
+            self._shells = (rsh, ssh)
+        return self._eri[:, r - self.ao_loc[rsh], s - self.ao_loc[ssh]]
+
+
+def cholesky_eris(mol, threshold=1e-8, eri=None, max_vectors=None):
+    """Pivoted Cholesky decomposition of the AO electron-repulsion integrals.
+
+    The ERIs are decomposed as (pq|rs) = sum_L (L|pq)(L|rs), until the largest remaining diagonal
+    element (pq|pq) is below `threshold`. This requires only O(N(vec) N(AO)^2) memory, as the
+    ERIs are computed column-wise for each pivot.
+
+    Parameters
+    ----------
+    mol : pyscf.gto.Mole
+        Molecule.
+    threshold : float, optional
+        Threshold for the remaining diagonal of the ERIs. Default: 1e-8.
+    eri : array, optional
+        AO ERIs in any symmetry-packed form, as stored in `mf._eri`. If None, the ERIs are computed
+        as needed. Default: None.
+    max_vectors : int, optional
+        Maximum number of Cholesky vectors. Default: None.
+
+    Returns
+    -------
+    cderi : (n(vec), n(AO)*(n(AO)+1)/2) array
+        Cholesky vectors, in the lower-triangular AO pair format of PySCF's three-center integrals.
+    """
+    nao = mol.nao_nr()
+    if eri is not None:
+        eri = pyscf.ao2mo.restore(4, eri, nao)
+        diag = eri.diagonal().copy()
+
+        def get_column(rs):
+            return eri[:, rs]
+
+    else:
+        diag = _get_diagonal(mol)
+        get_column = _ColumnsDirect(mol)
+    npair = len(diag)
+    if max_vectors is None:
+        max_vectors = npair
+    # Buffer for Cholesky vectors, which is enlarged as needed:
+    cderi = np.zeros((min(max_vectors, 2 * nao), npair))
+    nvec = 0
+    while nvec < max_vectors:
+        rs = np.argmax(diag)
+        if diag[rs] < threshold:
+            break
+        if nvec == cderi.shape[0]:
+            cderi = np.vstack((cderi, np.zeros((min(nvec, max_vectors - nvec), npair))))
+        vec = cderi[nvec]
+        vec[:] = get_column(rs)
+        vec -= np.dot(cderi[:nvec, rs], cderi[:nvec])
+        vec /= np.sqrt(diag[rs])
+        diag -= vec**2
+        # Remove numerical noise of the pivot:
+        diag[rs] = 0.0
+        nvec += 1
+    cderi = cderi[:nvec].copy()
+    log.debug(
+        "Cholesky decomposition of ERIs: %d vectors for %d AO pairs (%s); max. remaining diagonal= %.2e",
+        nvec,
+        npair,
+        memory_string(cderi),
+        max(np.amax(diag), 0.0),
+    )
+    return cderi
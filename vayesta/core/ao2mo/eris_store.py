@@ -0,0 +1,141 @@
+import collections
+import hashlib
+import logging
+import threading
+
+import numpy as np
+import pyscf.lib
+
+from vayesta.core.util import memory_string
+
+log = logging.getLogger(__name__)
+
+
+class ERIs_Store:
+    """Cluster ERIs in a temporary HDF5 file, keyed by the cluster orbital coefficients.
+
+    All ERIs are written to disk, and the most recently used ERIs are additionally kept in memory,
+    as long as their total size does not exceed `max_memory`. Since the key is a hash of the orbital
+    coefficients, identical clusters (e.g. of repeated calculations with the same bath) share their ERIs.
+
+    Parameters
+    ----------
+    max_memory : int, optional
+        Maximum memory (in bytes) of the ERIs kept in memory. Default: 2 GB.
+    """
+
+    def __init__(self, max_memory=int(2e9)):
+        self.max_memory = max_memory
+        self._h5file = None
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Statistics
+        self.nhit_memory = 0
+        self.nhit_disk = 0
+        self.nmiss = 0
+
+    @staticmethod
+    def get_key(coeff):
+        """Hash of orbital coefficients (array or tuple of arrays for each spin)."""
+        if isinstance(coeff, np.ndarray):
+            coeff = [coeff]
+        sha = hashlib.sha256()
+        for c in coeff:
+            c = np.ascontiguousarray(c)
+            sha.update(("%s%r" % (c.dtype, c.shape)).encode())
+            sha.update(c.tobytes())
+        return sha.hexdigest()
+
+    @property
+    def memory(self):
+        """Memory (in bytes) of ERIs kept in memory."""
+        return sum(_nbytes(eris) for eris in self._memory.values())
+
+    def __contains__(self, coeff):
+        key = self.get_key(coeff)
+        with self._lock:
+            return (key in self._memory) or (self._h5file is not None and key in self._h5file)
+
+    def get(self, coeff, block=None):
+        """Get ERIs of orbitals.
+
+        Parameters
+        ----------
+        coeff : array or tuple(array, array)
+            Orbital coefficients used for the construction of the ERIs.
+        block : tuple of slices, optional
+            If set, only this block of the (spin-restricted) ERIs is returned; in this case
+            the ERIs are read from disk without loading them into memory. Default: None.
+
+        Returns
+        -------
+        eris : array or tuple(array, array, array) or None
+            ERIs, if they are stored, otherwise None.
+        """
+        key = self.get_key(coeff)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.nhit_memory += 1
+                eris = self._memory[key]
+                return eris if block is None else eris[block]
+            if self._h5file is None or key not in self._h5file:
+                self.nmiss += 1
+                return None
+            self.nhit_disk += 1
+            group = self._h5file[key]
+            if block is not None:
+                return group["0"][block]
+            eris = tuple(group[str(i)][:] for i in range(len(group)))
+            if group.attrs["single"]:
+                eris = eris[0]
+            self._add_to_memory(key, eris)
+            return eris
+
+    def add(self, coeff, eris):
+        """Store ERIs of orbitals on disk and in memory.
+
+        Parameters
+        ----------
+        coeff : array or tuple(array, array)
+            Orbital coefficients used for the construction of the ERIs.
+        eris : array or tuple(array, array, array)
+            ERIs to store.
+        """
+        key = self.get_key(coeff)
+        with self._lock:
+            if self._h5file is None:
+                self._h5file = pyscf.lib.H5TmpFile()
+            if key not in self._h5file:
+                group = self._h5file.create_group(key)
+                single = isinstance(eris, np.ndarray)
+                group.attrs["single"] = single
+                for i, x in enumerate([eris] if single else eris):
+                    group.create_dataset(str(i), data=x)
+                log.debugv("Storing ERIs (%s) on disk", memory_string(_nbytes(eris)))
+            self._add_to_memory(key, eris)
+
+    def _add_to_memory(self, key, eris):
+        nbytes = _nbytes(eris)
+        if nbytes > self.max_memory:
+            return
+        # Remove least recently used ERIs:
+        memory = self.memory
+        while self._memory and (memory + nbytes > self.max_memory):
+            _, eris_lru = self._memory.popitem(last=False)
+            memory -= _nbytes(eris_lru)
+        self._memory[key] = eris
+
+    def clear(self):
+        """Remove all ERIs from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            if self._h5file is not None:
+                self._h5file.close()
+                self._h5file = None
+
+
+def _nbytes(eris):
+    if isinstance(eris, np.ndarray):
+        return eris.nbytes
+    return sum(x.nbytes for x in eris)
@@ -3,7 +3,7 @@ import numpy as np
 import pyscf
 import pyscf.lib
 import pyscf.ao2mo
-from vayesta.core.util import Object, dot, einsum, energy_string, getif
+from vayesta.core.util import Object, brange, dot, einsum, energy_string, getif
 
 
 log = logging.getLogger(__name__)
@@ -445,6 +445,74 @@ def contract_dm2intermeds_eris_rhf(dm2, eris, destroy_dm2=True):
     return e2
 
 
+def _get_cderi_block(cderi, cderi_neg, s1, s2, s3, s4):
+    """ERI block (s1,s2|s3,s4) from three-center integrals."""
+    eris = einsum("Lij,Lkl->ijkl", cderi[:, s1, s2], cderi[:, s3, s4])
+    if cderi_neg is not None:
+        eris -= einsum("Lij,Lkl->ijkl", cderi_neg[:, s1, s2], cderi_neg[:, s3, s4])
+    return eris
+
+
+def contract_dm2intermeds_cderi_rhf(dm2, cderi, cderi_neg, nocc, max_memory=int(1e9)):
+    """Contracts density-fitted ERIs with the two-body density matrix.
+
+    The ERI blocks with three and four virtual indices are constructed and contracted in blocks of their
+    first index, such that neither the full ERIs nor these 2-DM blocks need to be held in memory at once.
+    The 2-DM intermediates can therefore also be HDF5 datasets.
+
+    Parameters
+    ----------
+    dm2 : tuple
+        Intermediates of spin-restricted two-body density matrix.
+    cderi : (n(aux), n(MO), n(MO)) array
+        Three-center integrals (L|pq).
+    cderi_neg : (n(aux-neg), n(MO), n(MO)) array or None
+        Three-center integrals with negative metric (only for 2D periodic systems).
+    nocc : int
+        Number of occupied orbitals.
+    max_memory : int, optional
+        Target maximum memory (in bytes) of the ERI and 2-DM blocks. Default: 1 GB.
+
+    Returns
+    -------
+    e2 : float
+        Two-body energy.
+    """
+    dm2 = _dm2intermeds_to_dict_rhf(dm2)
+    nvir = cderi.shape[-1] - nocc
+    o, v = np.s_[:nocc], np.s_[nocc:]
+
+    def _get_eris(block, s1=None):
+        sl = [o if x == "o" else v for x in block]
+        if s1 is not None:
+            sl[0] = s1
+        return _get_cderi_block(cderi, cderi_neg, *sl)
+
+    e_oooo = _contract_4d(dm2["oooo"], _get_eris("oooo")) * 4
+    e_ovoo = _contract_4d(dm2["ooov"], _get_eris("ooov")) * 4
+    e_oovv = _contract_4d(dm2["oovv"], _get_eris("oovv")) * 4
+    e_ovov = _contract_4d(dm2["ovov"], _get_eris("ovov")) * 4
+    e_ovvo = _contract_4d(dm2["ovvo"], _get_eris("ovvo")) * 4
+    # Each block holds two arrays of size N(blk)*N(vir)^3:
+    blksize = int(min(max(max_memory / (16 * max(nvir, 1) ** 3), 1), max(nocc, nvir, 1)))
+    e_ovvv = 0.0
+    for blk in brange(0, nocc, blksize):
+        e_ovvv += _contract_4d(dm2["ovvv"][blk], _get_eris("ovvv", s1=blk)) * 4
+    e_vvvv = 0.0
+    for blk in brange(0, nvir, blksize):
+        blk_v = np.s_[nocc + blk.start : nocc + blk.stop]
+        e_vvvv += _contract_4d(dm2["vvvv"][blk], _get_eris("vvvv", s1=blk_v)) * 4
+    log.debugv("E(oooo)= %s", energy_string(e_oooo))
+    log.debugv("E(ovoo)= %s", energy_string(e_ovoo))
+    log.debugv("E(oovv)= %s", energy_string(e_oovv))
+    log.debugv("E(ovov)= %s", energy_string(e_ovov))
+    log.debugv("E(ovvo)= %s", energy_string(e_ovvo))
+    log.debugv("E(ovvv)= %s", energy_string(e_ovvv))
+    log.debugv("E(vvvv)= %s", energy_string(e_vvvv))
+    e2 = e_oooo + e_ovoo + e_oovv + e_ovov + e_ovvo + e_ovvv + e_vvvv
+    return e2
+
+
 def contract_dm2intermeds_eris_uhf(dm2, eris, destroy_dm2=True):
     """Contracts _ChemistsERIs with the two-body density matrix.
 
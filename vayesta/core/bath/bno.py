@@ -1,5 +1,6 @@
 import numbers
 import numpy as np
+import pyscf.lib
 from vayesta.core.util import AbstractMethodError, brange, dot, einsum, fix_orbital_sign, hstack, time_string, timer
 from vayesta.core import spinalg
 from vayesta.core.types import Cluster
@@ -288,13 +289,15 @@ class BNO_Bath_UHF(BNO_Bath):
 
 
 class MP2_BNO_Bath(BNO_Bath):
-    def __init__(self, *args, project_dmet_order=0, project_dmet_mode="full", project_dmet=None, **kwargs):
+    def __init__(self, *args, project_dmet_order=0, project_dmet_mode="full", project_dmet=None, stream=None, **kwargs):
         # Backwards compatibility:
         if project_dmet:
             project_dmet_order = 1
             project_dmet_mode = project_dmet
         self.project_dmet_order = project_dmet_order
         self.project_dmet_mode = project_dmet_mode
+        # Accumulate density-matrix without storing T2 amplitudes (None: only if T2 does not fit into memory)
+        self.stream = stream
         super().__init__(*args, **kwargs)
         if project_dmet:
             # Log isn't set at the top of the function
@@ -362,8 +365,7 @@ class MP2_BNO_Bath(BNO_Bath):
 
     def _get_cderi(self, actspace):
         # We only need the (L|ov) block for MP2:
-        mo_coeff = (actspace.c_active_occ, actspace.c_active_vir)
-        cderi, cderi_neg = self.base.get_cderi(mo_coeff)
+        cderi, cderi_neg = self.base.get_cderi_ov(actspace.c_active_occ, actspace.c_active_vir)
         return cderi, cderi_neg
 
     def get_eris_or_cderi(self, actspace):
@@ -374,10 +376,6 @@ class MP2_BNO_Bath(BNO_Bath):
         else:
             eris = self._get_eris(actspace)
         self.log.timingv("Time for AO->MO transformation: %s", time_string(timer() - t0))
-        # TODO: Reuse previously obtained integral transformation into N^2 sized quantity (rather than N^4)
-        # else:
-        #    self.log.debug("Transforming previous eris.")
-        #    eris = transform_mp2_eris(eris, actspace.c_active_occ, actspace.c_active_vir, ovlp=self.base.get_ovlp())
         return eris, cderi, cderi_neg
 
     def _get_dmet_projector_weights(self, eig):
@@ -408,18 +406,26 @@ class MP2_BNO_Bath(BNO_Bath):
         weights = np.clip(weights, 0, 1)
         return weights
 
-    def _project_t2(self, t2, actspace):
-        """Project and symmetrize T2 amplitudes"""
-        self.log.info(
-            "Projecting DMET space for MP2 bath (mode= %s, order= %d).", self.project_dmet_mode, self.project_dmet_order
-        )
+    def _get_dmet_projector(self, actspace):
+        """Projector onto fragment and DMET space, in the active virtual (occupied) space for occupied (virtual) BNOs."""
         weights = self._get_dmet_projector_weights(self.dmet_bath.n_dmet)
         weights = hstack(self.fragment.n_frag * [1], weights)
         ovlp = self.fragment.base.get_ovlp()
         c_fragdmet = hstack(self.fragment.c_frag, self.dmet_bath.c_dmet)
         if self.occtype == "occupied":
             rot = dot(actspace.c_active_vir.T, ovlp, c_fragdmet)
-            proj = einsum("ix,x,jx->ij", rot, weights, rot)
+        elif self.occtype == "virtual":
+            rot = dot(actspace.c_active_occ.T, ovlp, c_fragdmet)
+        proj = einsum("ix,x,jx->ij", rot, weights, rot)
+        return proj
+
+    def _project_t2(self, t2, actspace):
+        """Project and symmetrize T2 amplitudes"""
+        self.log.info(
+            "Projecting DMET space for MP2 bath (mode= %s, order= %d).", self.project_dmet_mode, self.project_dmet_order
+        )
+        proj = self._get_dmet_projector(actspace)
+        if self.occtype == "occupied":
             if self.project_dmet_order == 1:
                 t2 = einsum("xa,ijab->ijxb", proj, t2)
             elif self.project_dmet_order == 2:
@@ -427,8 +433,6 @@ class MP2_BNO_Bath(BNO_Bath):
             else:
                 raise ValueError
         elif self.occtype == "virtual":
-            rot = dot(actspace.c_active_occ.T, ovlp, c_fragdmet)
-            proj = einsum("ix,x,jx->ij", rot, weights, rot)
             if self.project_dmet_order == 1:
                 t2 = einsum("xi,i...->x...", proj, t2)
             elif self.project_dmet_order == 2:
@@ -454,6 +458,120 @@ class MP2_BNO_Bath(BNO_Bath):
         assert np.allclose(dm, dm.T)
         return dm
 
+    def _get_max_memory(self):
+        """Available memory in bytes, based on `max_memory` (in MB) of the mean-field object."""
+        max_memory = getattr(self.base.mf, "max_memory", 4000)
+        return int(max(max_memory - pyscf.lib.current_memory()[0], max_memory / 10) * 1e6)
+
+    def _use_stream(self, actspace, max_memory):
+        if self.stream is not None:
+            return self.stream
+        nocc, nvir = actspace.nocc_active, actspace.nvir_active
+        return nocc**2 * nvir**2 * 8 > max_memory
+
+    def make_delta_dm1_stream(self, actspace, fock, eris=None, max_memory=None, blksize=None):
+        """Delta MP2 density matrix and projected correlation energy, without storing the T2 amplitudes.
+
+        The T2 amplitudes are constructed and contracted in blocks of the second occupied (for occupied BNOs)
+        or virtual (for virtual BNOs) index, such that the DMET projection and symmetrization
+        of the amplitudes can be carried out independently for each block.
+
+        Parameters
+        ----------
+        actspace: Cluster
+            Active space with canonicalized orbitals.
+        fock: (n(AO), n(AO)) array
+            Fock matrix.
+        eris: (n(occ), n(vir), n(occ), n(vir)) array, optional
+            (ov|ov) integrals. If None, they are calculated or, with density-fitting, the (L|ov) integrals are used.
+        max_memory: int, optional
+            Memory for the amplitude blocks in bytes. Default: available memory of the mean-field object.
+        blksize: int, optional
+            Block size. Default: determined from `max_memory`.
+
+        Returns
+        -------
+        dm: (n, n) array
+            Occupied-occupied or virtual-virtual delta MP2 density matrix.
+        ecorr: float
+            Fragment projected MP2 correlation energy.
+        """
+        if eris is None:
+            eris, cderi, cderi_neg = self.get_eris_or_cderi(actspace)
+        if eris is not None:
+            nocc, nvir = eris.shape[:2]
+        elif cderi is not None:
+            nocc, nvir = cderi.shape[1:]
+        else:
+            raise ValueError()
+
+        ovlp = self.base.get_ovlp()
+        rfrag = dot(actspace.c_active_occ.T, ovlp, self.c_frag)
+        mo_energy = self._get_mo_energy(fock, actspace)
+        eia = mo_energy[:nocc, None] - mo_energy[None, nocc:]
+        if self.project_dmet_order > 0:
+            self.log.info(
+                "Projecting DMET space for MP2 bath (mode= %s, order= %d).",
+                self.project_dmet_mode,
+                self.project_dmet_order,
+            )
+            proj = self._get_dmet_projector(actspace)
+        max_memory = max_memory or self._get_max_memory()
+        # Each block is stored up to four times (integrals, denominators, amplitudes, projected amplitudes):
+        if self.occtype == "occupied":
+            nblk = nocc
+            blksize = blksize or max(int(max_memory / max(4 * nocc * nvir * nvir * 8, 1)), 1)
+            dm = np.zeros((nocc, nocc))
+        elif self.occtype == "virtual":
+            nblk = nvir
+            blksize = blksize or max(int(max_memory / max(4 * nocc * nocc * nvir * 8, 1)), 1)
+            dm = np.zeros((nvir, nvir))
+        self.log.debugv("Streaming MP2 amplitudes in %d blocks of size %d", int(np.ceil(nblk / blksize)), blksize)
+
+        ecorr = 0
+        for blk in brange(0, nblk, blksize):
+            # Occupied BNOs: T2 amplitudes t(i,k,a,b) for k in block
+            if self.occtype == "occupied":
+                if eris is not None:
+                    gijab = eris[:, :, blk].transpose(0, 2, 1, 3)
+                else:
+                    gijab = einsum("Lia,Ljb->ijab", cderi, cderi[:, blk])
+                    if cderi_neg is not None:
+                        gijab -= einsum("Lia,Ljb->ijab", cderi_neg, cderi_neg[:, blk])
+                eijab = eia[:, None, :, None] + eia[None, blk, None, :]
+                t2 = gijab / eijab
+                tp = einsum("ix,i...->x...", rfrag, t2)
+                gp = einsum("ix,i...->x...", rfrag, gijab)
+                ecorr += 2 * einsum("ijab,ijab->", tp, gp) - einsum("ijab,ijba->", tp, gp)
+                if self.project_dmet_order == 1:
+                    t2 = (einsum("xa,ijab->ijxb", proj, t2) + einsum("xb,ijab->ijax", proj, t2)) / 2
+                elif self.project_dmet_order == 2:
+                    t2 = einsum("xa,yb,ijab->ijxy", proj, proj, t2)
+                dm += 2 * einsum("ikab,jkab->ij", t2, t2) - einsum("ikab,jkba->ij", t2, t2)
+            # Virtual BNOs: T2 amplitudes t(i,j,a,c) for c in block
+            elif self.occtype == "virtual":
+                if eris is not None:
+                    gijab = eris[:, :, :, blk].transpose(0, 2, 1, 3)
+                else:
+                    gijab = einsum("Lia,Ljb->ijab", cderi, cderi[:, :, blk])
+                    if cderi_neg is not None:
+                        gijab -= einsum("Lia,Ljb->ijab", cderi_neg, cderi_neg[:, :, blk])
+                eijab = eia[:, None, :, None] + eia[None, :, None, blk]
+                t2 = gijab / eijab
+                # Exchange integrals g(x,j,b,a) = g(j,x,a,b) for b in block:
+                tp = einsum("ix,i...->x...", rfrag, t2)
+                gp = einsum("ix,i...->x...", rfrag, gijab)
+                gpx = einsum("ix,ji...->xj...", rfrag, gijab)
+                ecorr += 2 * einsum("ijab,ijab->", tp, gp) - einsum("ijab,ijab->", tp, gpx)
+                if self.project_dmet_order == 1:
+                    t2 = (einsum("xi,i...->x...", proj, t2) + einsum("xj,ij...->ix...", proj, t2)) / 2
+                elif self.project_dmet_order == 2:
+                    t2 = einsum("xi,yj,ij...->xy...", proj, proj, t2)
+                # Exchange amplitudes t(i,j,c,b) = t(j,i,b,c) for c in block:
+                dm += 2 * einsum("ijac,ijbc->ab", t2, t2) - einsum("ijac,jibc->ab", t2, t2)
+        assert np.allclose(dm, dm.T)
+        return dm, ecorr
+
     def make_bno_coeff(self, eris=None):
         """Construct MP2 bath natural orbital coefficients and occupation numbers.
 
@@ -493,10 +611,14 @@ class MP2_BNO_Bath(BNO_Bath):
         )
 
         t0 = timer()
-        t2, ecorr = self._make_t2(actspace, fock, eris=eris)
-        t_amps = timer() - t0
-
-        dm = self.make_delta_dm1(t2, actspace)
+        max_memory = self._get_max_memory()
+        if self._use_stream(actspace, max_memory):
+            dm, ecorr = self.make_delta_dm1_stream(actspace, fock, eris=eris, max_memory=max_memory)
+            t_amps = timer() - t0
+        else:
+            t2, ecorr = self._make_t2(actspace, fock, eris=eris)
+            t_amps = timer() - t0
+            dm = self.make_delta_dm1(t2, actspace)
 
         # --- Undo canonicalization
         if self.occtype == "occupied" and r_occ is not None:
@@ -526,16 +648,19 @@ class UMP2_BNO_Bath(MP2_BNO_Bath, BNO_Bath_UHF):
         mo_energy_b = einsum("ai,ab,bi->i", c_act_b, fock[1], c_act_b)
         return (mo_energy_a, mo_energy_b)
 
+    def _use_stream(self, actspace, max_memory):
+        if self.stream:
+            raise NotImplementedError("Streaming of MP2 amplitudes for unrestricted MP2 bath")
+        return False
+
     def _get_eris(self, actspace):
         # We only need the (ov|ov) block for MP2:
         return self.base.get_eris_array_uhf(actspace.c_active_occ, mo_coeff2=actspace.c_active_vir)
 
     def _get_cderi(self, actspace):
         # We only need the (ov|ov) block for MP2:
-        mo_a = [actspace.c_active_occ[0], actspace.c_active_vir[0]]
-        mo_b = [actspace.c_active_occ[1], actspace.c_active_vir[1]]
-        cderi_a, cderi_neg_a = self.base.get_cderi(mo_a)
-        cderi_b, cderi_neg_b = self.base.get_cderi(mo_b)
+        cderi_a, cderi_neg_a = self.base.get_cderi_ov(actspace.c_active_occ[0], actspace.c_active_vir[0], spin=0)
+        cderi_b, cderi_neg_b = self.base.get_cderi_ov(actspace.c_active_occ[1], actspace.c_active_vir[1], spin=1)
         return (cderi_a, cderi_b), (cderi_neg_a, cderi_neg_b)
 
     def _make_t2(self, actspace, fock, eris=None, max_memory=None, blksize=None, energy_only=False):
@@ -14,10 +14,10 @@ def get_cderi(emb, mo_coeff, compact=False, blksize=None):
     if emb.kdf is not None:
         return kao2gmo_cderi(emb.kdf, mo_coeff)
     else:
-        return get_cderi_df(emb.mf, mo_coeff, compact=compact, blksize=blksize)
+        return get_cderi_df(emb.mf, mo_coeff, compact=compact, blksize=blksize, df=emb.cderi_df)
 
 
-def get_cderi_df(mf, mo_coeff, compact=False, blksize=None):
+def get_cderi_df(mf, mo_coeff, compact=False, blksize=None, df=None):
     """Get density-fitted three-center integrals in MO basis."""
     if compact:
         raise NotImplementedError()
@@ -26,7 +26,8 @@ def get_cderi_df(mf, mo_coeff, compact=False, blksize=None):
         mo_coeff = (mo_coeff, mo_coeff)
 
     nao = mf.mol.nao
-    df = mf.with_df
+    if df is None:
+        df = mf.with_df
     try:
         naux = df.auxcell.nao if hasattr(df, "auxcell") else df.auxmol.nao
     except AttributeError:
@@ -68,16 +69,17 @@ def get_cderi_exspace(emb, ex_coeff, compact=False, blksize=None):
     if emb.kdf is not None:
         raise NotImplementedError()
     else:
-        return get_cderi_df_exspace(emb.mf, ex_coeff, compact=compact, blksize=blksize)
+        return get_cderi_df_exspace(emb.mf, ex_coeff, compact=compact, blksize=blksize, df=emb.cderi_df)
 
 
-def get_cderi_df_exspace(mf, ex_coeff, compact=False, blksize=None):
+def get_cderi_df_exspace(mf, ex_coeff, compact=False, blksize=None, df=None):
     """Get density-fitted three-center integrals in MO basis."""
     if compact:
         raise NotImplementedError()
 
     nao = mf.mol.nao
-    df = mf.with_df
+    if df is None:
+        df = mf.with_df
     try:
         naux = df.auxcell.nao if hasattr(df, "auxcell") else df.auxmol.nao
     except AttributeError:
@@ -143,8 +145,9 @@ def get_eris_array(emb, mo_coeff, compact=False):
             eris -= einsum("Lij,Lkl->ijkl", cderi1_neg.conj(), cderi2_neg)
         return eris
     # Molecules and Gamma-point PBC:
-    if hasattr(emb.mf, "with_df") and emb.mf.with_df is not None:
-        eris = emb.mf.with_df.ao2mo(mo_coeff, compact=compact)
+    # Density-fitting or Cholesky decomposition of ERIs:
+    if emb.cderi_df is not None:
+        eris = emb.cderi_df.ao2mo(mo_coeff, compact=compact)
     elif emb.mf._eri is not None:
         eris = pyscf.ao2mo.kernel(emb.mf._eri, mo_coeff, compact=compact)
     else:
@@ -5,6 +5,7 @@ import itertools
 import numpy as np
 from vayesta.core.util import dot, einsum, log_time
 from vayesta.misc import corrfunc
+from vayesta.mpi import mpi
 
 
 def get_corrfunc_mf(emb, kind, dm1=None, atoms=None, projection="sao", orbital_filter=None):
@@ -42,6 +43,58 @@ def get_corrfunc_mf(emb, kind, dm1=None, atoms=None, projection="sao", orbital_f
     return corr
 
 
+def _stack_projector_coeffs(coeffs, atoms1, atoms2):
+    """Stack the coefficients R(A) of the atomic projectors P(A) = R(A).R(A)^T.
+
+    Returns
+    -------
+    r : array(n(MO), n(proj))
+        Coefficients of all atoms, stacked along the second dimension.
+    sizes : array(n(atoms))
+        Number of columns of `r`, which belong to each atom.
+    idx1, idx2 : array
+        Positions of `atoms1` and `atoms2` in the stacked atom list.
+    """
+    atoms = sorted(coeffs.keys())
+    r = np.hstack([coeffs[atom] for atom in atoms])
+    sizes = np.asarray([coeffs[atom].shape[1] for atom in atoms])
+    position = {atom: i for (i, atom) in enumerate(atoms)}
+    idx1 = np.asarray([position[atom] for atom in atoms1], dtype=int)
+    idx2 = np.asarray([position[atom] for atom in atoms2], dtype=int)
+    return r, sizes, idx1, idx2
+
+
+def _sum_blocks(x, sizes, axis=-1):
+    """Sum array over consecutive blocks of the given sizes (which may be zero) along an axis."""
+    x = np.moveaxis(x, axis, -1)
+    out = np.zeros(x.shape[:-1] + (len(sizes),))
+    nonzero = sizes > 0
+    if np.any(nonzero):
+        offsets = np.cumsum(sizes) - sizes
+        out[..., nonzero] = np.add.reduceat(x, offsets[nonzero], axis=-1)
+    return np.moveaxis(out, -1, axis)
+
+
+def _sum_atom_pairs(x, sizes, idx1, idx2):
+    """Contract matrix over the projector columns belonging to each atom pair."""
+    x = _sum_blocks(_sum_blocks(x, sizes, axis=0), sizes, axis=1)
+    return x[np.ix_(idx1, idx2)]
+
+
+def _get_projector_vectors(q, sizes):
+    """Atomic projectors q(A).q(A)^T, flattened into the columns of an array(n*n, n(atoms))."""
+    n = q.shape[0]
+    return _sum_blocks(einsum("iu,ju->iju", q, q).reshape(n * n, -1), sizes, axis=1)
+
+
+def _contract_cumulant_unrestricted(p1, p2, dm2):
+    """Contract the spin blocks of the (flattened) 2-DM with the vectorized projectors of atoms A and B."""
+    pa1, pb1 = p1
+    pa2, pb2 = p2
+    dm2aa, dm2ab, dm2bb = dm2
+    return dot(pa1.T, dm2aa, pa2) + dot(pb1.T, dm2bb, pb2) - dot(pb1.T, dm2ab.T, pa2) - dot(pa1.T, dm2ab, pb2)
+
+
 def get_corrfunc(
     emb,
     kind,
@@ -55,7 +108,10 @@ def get_corrfunc(
 ):
     """Get expectation values <P(A) S_z P(B) S_z>, where P(X) are projectors onto atoms X.
 
-    TODO: MPI
+    The atomic projectors are stacked, such that all atom pairs are evaluated in batched matrix products.
+    If `dm2` is not given, the cumulant contribution is obtained from the fragment 2-DMs directly,
+    without constructing the global 2-DM. With MPI, the cumulant contribution is distributed over fragments
+    (fragment 2-DMs) or atom pairs (global 2-DM).
 
     Parameters
     ----------
@@ -90,17 +146,17 @@ def get_corrfunc(
             norm = einsum("iikk->", dm2)
             ne2 = emb.mol.nelectron * (emb.mol.nelectron - 1)
             dm2_with_dm1 = norm > ne2 / 2
-    atoms1, atoms2, proj = emb._get_atom_projectors(atoms, projection, orbital_filter=orbital_filter)
+    atoms1, atoms2, coeffs = emb._get_atom_projector_coeffs(atoms, projection, orbital_filter=orbital_filter)
+    # r: projector coefficients of all atoms, stacked along the second dimension
+    r, sizes, idx1, idx2 = _stack_projector_coeffs(coeffs, atoms1, atoms2)
     corr = np.zeros((len(atoms1), len(atoms2)))
 
     # 1-DM contribution:
     with log_time(emb.log.timing, "Time for 1-DM contribution: %s"):
         if dm1 is None:
             dm1 = emb.make_rdm1()
-        for a, atom1 in enumerate(atoms1):
-            tmp = np.dot(proj[atom1], dm1)
-            for b, atom2 in enumerate(atoms2):
-                corr[a, b] = f1 * np.sum(tmp * proj[atom2])
+        # Tr[P(A).DM1.P(B)] = Sum_{u in A, v in B} [R^T.DM1.R]_uv [R^T.R]_vu:
+        corr += f1 * _sum_atom_pairs(dot(r.T, dm1, r) * np.dot(r.T, r).T, sizes, idx1, idx2)
 
     # Non-(approximate cumulant) DM2 contribution:
     if not dm2_with_dm1:
@@ -109,19 +165,18 @@ def get_corrfunc(
             occdiag = np.diag_indices(emb.nocc)
             ddm1 = dm1.copy()
             ddm1[occdiag] -= 1
-            for a, atom1 in enumerate(atoms1):
-                tmp = np.dot(proj[atom1], ddm1)
-                for b, atom2 in enumerate(atoms2):
-                    corr[a, b] -= f2 * np.sum(tmp[occ] * proj[atom2][occ])  # N_atom^2 * N^2 scaling
+            rdr = dot(r.T, ddm1, r)
+            rr_occ = np.dot(r[occ].T, r[occ])
+            corr -= f2 * _sum_atom_pairs(rdr * rr_occ, sizes, idx1, idx2)
             if kind in ("n,n", "dn,dn"):
                 # These terms are zero for Sz,Sz (but not in UHF)
                 # Traces of projector*DM(HF) and projector*[DM(CC)+DM(HF)/2]:
-                tr1 = {a: np.trace(p[occ, occ]) for a, p in proj.items()}  # DM(HF)
-                tr2 = {a: np.sum(p * ddm1) for a, p in proj.items()}  # DM(CC) + DM(HF)/2
-                for a, atom1 in enumerate(atoms1):
-                    for b, atom2 in enumerate(atoms2):
-                        corr[a, b] += f2 * (tr1[atom1] * tr2[atom2] + tr1[atom2] * tr2[atom1])
+                tr1 = _sum_blocks(np.diag(rr_occ), sizes)  # DM(HF)
+                tr2 = _sum_blocks(np.diag(rdr), sizes)  # DM(CC) + DM(HF)/2
+                corr += f2 * (np.outer(tr1[idx1], tr2[idx2]) + np.outer(tr2[idx1], tr1[idx2]))
 
+    # Cumulant DM2 contribution is distributed over MPI ranks:
+    corr2 = np.zeros_like(corr)
     with log_time(emb.log.timing, "Time for cumulant 2-DM contribution: %s"):
         if dm2 is not None:
             # DM2(aa)               = (DM2 - DM2.transpose(0,3,2,1))/6
@@ -134,16 +189,18 @@ def get_corrfunc(
             elif kind == "sz,sz":
                 # DM2 is not needed anymore, so we can overwrite:
                 dm2 = -(dm2 / 6 + dm2.transpose(0, 3, 2, 1) / 3)
-            for a, atom1 in enumerate(atoms1):
-                tmp = np.tensordot(proj[atom1], dm2)
-                for b, atom2 in enumerate(atoms2):
-                    corr[a, b] += f22 * np.sum(tmp * proj[atom2])
+            n = dm2.shape[0]
+            dm2 = dm2.reshape(n * n, n * n)
+            # Distribute atoms A over MPI ranks:
+            rows = np.arange(len(atoms1))[mpi.rank :: mpi.size]
+            if len(rows) > 0:
+                pvec = _get_projector_vectors(r, sizes)
+                corr2[rows] += f22 * dot(pvec[:, idx1[rows]].T, dm2, pvec[:, idx2])
         else:
-            # Cumulant DM2 contribution:
             ffilter = dict(sym_parent=None) if use_symmetry else {}
             maxgen = None if use_symmetry else 0
             cst = np.dot(emb.get_ovlp(), emb.mo_coeff)
-            for fx in emb.get_fragments(contributes=True, **ffilter):
+            for fx in emb.get_fragments(contributes=True, mpi_rank=mpi.rank, **ffilter):
                 # Currently only defined for EWF
                 # (but could also be defined for a democratically partitioned cumulant):
                 dm2 = fx.make_fragment_dm2cumulant()
@@ -156,20 +213,21 @@ def get_corrfunc(
                 #                       = -DM2/6 - DM2.transpose(0,3,2,1)/3
                 elif kind == "sz,sz":
                     dm2 = -(dm2 / 6 + dm2.transpose(0, 3, 2, 1) / 3)
+                n = dm2.shape[0]
+                dm2 = dm2.reshape(n * n, n * n)
 
                 for fx2, cx2_coeff in fx.loop_symmetry_children([fx.cluster.coeff], include_self=True, maxgen=maxgen):
-                    rx = np.dot(cx2_coeff.T, cst)
-                    projx = {atom: dot(rx, p_atom, rx.T) for (atom, p_atom) in proj.items()}
-                    for a, atom1 in enumerate(atoms1):
-                        tmp = np.tensordot(projx[atom1], dm2)
-                        for b, atom2 in enumerate(atoms2):
-                            corr[a, b] += f22 * np.sum(tmp * projx[atom2])
+                    # Atomic projectors in the cluster basis:
+                    pvec = _get_projector_vectors(dot(cx2_coeff.T, cst, r), sizes)
+                    corr2 += f22 * dot(pvec[:, idx1].T, dm2, pvec[:, idx2])
+        if mpi:
+            corr2 = mpi.nreduce(corr2, logfunc=emb.log.timingv)
+        corr += corr2
 
     # Remove independent particle [P(A).DM1 * P(B).DM1] contribution
     if kind == "dn,dn":
-        for a, atom1 in enumerate(atoms1):
-            for b, atom2 in enumerate(atoms2):
-                corr[a, b] -= np.sum(dm1 * proj[atom1]) * np.sum(dm1 * proj[atom2])
+        ne = _sum_blocks(einsum("iu,ij,ju->u", r, dm1, r), sizes)
+        corr -= np.outer(ne[idx1], ne[idx2])
 
     return corr
 
@@ -187,7 +245,7 @@ def get_corrfunc_unrestricted(
 ):
     """Get expectation values <P(A) S_z P(B) S_z>, where P(X) are projectors onto atoms X.
 
-    TODO: MPI
+    See `get_corrfunc` for details on the implementation.
 
     Parameters
     ----------
@@ -223,7 +281,13 @@ def get_corrfunc_unrestricted(
             norm = einsum("iikk->", dm2[0]) + 2 * einsum("iikk->", dm2[1]) + einsum("iikk->", dm2[2])
             ne2 = emb.mol.nelectron * (emb.mol.nelectron - 1)
             dm2_with_dm1 = norm > ne2 / 2
-    atoms1, atoms2, proj = emb._get_atom_projectors(atoms, projection, orbital_filter=orbital_filter)
+    atoms1, atoms2, coeffs = emb._get_atom_projector_coeffs(atoms, projection, orbital_filter=orbital_filter)
+    # Stacked projector coefficients per spin:
+    r, sizes = [], []
+    for s in range(2):
+        rs, ss, idx1, idx2 = _stack_projector_coeffs({atom: c[s] for (atom, c) in coeffs.items()}, atoms1, atoms2)
+        r.append(rs)
+        sizes.append(ss)
     corr = np.zeros((len(atoms1), len(atoms2)))
 
     # 1-DM contribution:
@@ -232,10 +296,7 @@ def get_corrfunc_unrestricted(
             dm1 = emb.make_rdm1()
         # Loop over spin:
         for s in range(2):
-            for a, atom1 in enumerate(atoms1):
-                tmp = np.dot(proj[atom1][s], dm1[s])
-                for b, atom2 in enumerate(atoms2):
-                    corr[a, b] += f1 * np.sum(tmp * proj[atom2][s])
+            corr += f1 * _sum_atom_pairs(dot(r[s].T, dm1[s], r[s]) * np.dot(r[s].T, r[s]).T, sizes[s], idx1, idx2)
 
     # Non-(approximate cumulant) DM2 contribution:
     if not dm2_with_dm1:
@@ -243,89 +304,61 @@ def get_corrfunc_unrestricted(
             ddm1 = (dm1[0].copy(), dm1[1].copy())
             ddm1[0][np.diag_indices(emb.nocc[0])] -= 0.5
             ddm1[1][np.diag_indices(emb.nocc[1])] -= 0.5
+            tr1 = []
+            tr2 = []
             for s in range(2):
                 occ = np.s_[: emb.nocc[s]]
-                for a, atom1 in enumerate(atoms1):
-                    tmp = np.dot(proj[atom1][s], ddm1[s])
-                    for b, atom2 in enumerate(atoms2):
-                        corr[a, b] -= f2 * np.sum(tmp[occ] * proj[atom2][s][occ])  # N_atom^2 * N^2 scaling
+                rdr = dot(r[s].T, ddm1[s], r[s])
+                rr_occ = np.dot(r[s][occ].T, r[s][occ])
+                corr -= f2 * _sum_atom_pairs(rdr * rr_occ, sizes[s], idx1, idx2)
+                tr1.append(_sum_blocks(np.diag(rr_occ), sizes[s]))  # DM(HF)
+                tr2.append(_sum_blocks(np.diag(rdr), sizes[s]))  # DM(CC) + DM(HF)/2
 
             ## Note that this contribution cancel to 0 in RHF,
             # since tr1[0] == tr1[1] and tr2[0] == tr2[1]:
-            tr1 = []
-            tr2 = []
-            # Loop over spin:
-            for s in range(2):
-                occ = np.s_[: emb.nocc[s]]
-                tr1.append({a: np.trace(p[s][occ, occ]) for a, p in proj.items()})  # DM(HF)
-                tr2.append({a: np.sum(p[s] * ddm1[s]) for a, p in proj.items()})  # DM(CC) + DM(HF)/2
             # Loop over spins s1, s2:
             for s1, s2 in itertools.product(range(2), repeat=2):
                 sign = 1 if (s1 == s2) else -1
-                for a, atom1 in enumerate(atoms1):
-                    for b, atom2 in enumerate(atoms2):
-                        corr[a, b] += sign * (tr1[s1][atom1] * tr2[s2][atom2] + tr1[s1][atom2] * tr2[s2][atom1]) / 4
-
-            if kind in ("n,n", "dn,dn"):
-                # TODO
-                raise NotImplementedError
-                # These terms are zero for Sz,Sz (but not in UHF)
-                # Traces of projector*DM(HF) and projector*[DM(CC)+DM(HF)/2]:
-                tr1 = {a: np.trace(p[occ, occ]) for a, p in proj.items()}  # DM(HF)
-                tr2 = {a: np.sum(p * ddm1) for a, p in proj.items()}  # DM(CC) + DM(HF)/2
-                for a, atom1 in enumerate(atoms1):
-                    for b, atom2 in enumerate(atoms2):
-                        corr[a, b] += f2 * (tr1[atom1] * tr2[atom2] + tr1[atom2] * tr2[atom1])
+                corr += sign * (np.outer(tr1[s1][idx1], tr2[s2][idx2]) + np.outer(tr2[s2][idx1], tr1[s1][idx2])) / 4
 
+    # Cumulant DM2 contribution is distributed over MPI ranks:
+    corr2 = np.zeros_like(corr)
     with log_time(emb.log.timing, "Time for cumulant 2-DM contribution: %s"):
         if dm2 is not None:
-            dm2aa, dm2ab, dm2bb = dm2
-            if kind in ("n,n", "dn,dn"):
-                raise NotImplementedError
-            elif kind == "sz,sz":
-                pass
-            for a, atom1 in enumerate(atoms1):
-                tmpa = np.tensordot(proj[atom1][0], dm2aa) - np.tensordot(dm2ab, proj[atom1][1])
-                tmpb = np.tensordot(proj[atom1][1], dm2bb) - np.tensordot(proj[atom1][0], dm2ab)
-                for b, atom2 in enumerate(atoms2):
-                    corr[a, b] += f22 * (np.sum(tmpa * proj[atom2][0]) + np.sum(tmpb * proj[atom2][1]))
+            na, nb = dm2[1].shape[0], dm2[1].shape[2]
+            dm2aa = dm2[0].reshape(na * na, na * na)
+            dm2ab = dm2[1].reshape(na * na, nb * nb)
+            dm2bb = dm2[2].reshape(nb * nb, nb * nb)
+            # Distribute atoms A over MPI ranks:
+            rows = np.arange(len(atoms1))[mpi.rank :: mpi.size]
+            if len(rows) > 0:
+                pvec = [_get_projector_vectors(r[s], sizes[s]) for s in range(2)]
+                p1 = [p[:, idx1[rows]] for p in pvec]
+                p2 = [p[:, idx2] for p in pvec]
+                corr2[rows] += f22 * _contract_cumulant_unrestricted(p1, p2, (dm2aa, dm2ab, dm2bb))
         else:
-            # Cumulant DM2 contribution:
             ffilter = dict(sym_parent=None) if use_symmetry else {}
             maxgen = None if use_symmetry else 0
             ovlp = emb.get_ovlp()
-            csta = np.dot(ovlp, emb.mo_coeff[0])
-            cstb = np.dot(ovlp, emb.mo_coeff[1])
-            for fx in emb.get_fragments(contributes=True, **ffilter):
+            cst = (np.dot(ovlp, emb.mo_coeff[0]), np.dot(ovlp, emb.mo_coeff[1]))
+            for fx in emb.get_fragments(contributes=True, mpi_rank=mpi.rank, **ffilter):
                 # Currently only defined for EWF
                 # (but could also be defined for a democratically partitioned cumulant):
                 dm2aa, dm2ab, dm2bb = fx.make_fragment_dm2cumulant()
-                if kind in ("n,n", "dn,dn"):
-                    # TODO
-                    raise NotImplementedError
-                if kind == "sz,sz":
-                    pass
-                for fx2, (cx2_coeffa, cx2_coeffb) in fx.loop_symmetry_children(
+                na, nb = dm2ab.shape[0], dm2ab.shape[2]
+                dm2aa = dm2aa.reshape(na * na, na * na)
+                dm2ab = dm2ab.reshape(na * na, nb * nb)
+                dm2bb = dm2bb.reshape(nb * nb, nb * nb)
+                for fx2, cx2_coeff in fx.loop_symmetry_children(
                     [fx.cluster.coeff[0], fx.cluster.coeff[1]], include_self=True, maxgen=maxgen
                 ):
-                    rxa = np.dot(cx2_coeffa.T, csta)
-                    rxb = np.dot(cx2_coeffb.T, cstb)
-                    projx = {
-                        atom: (dot(rxa, p_atom[0], rxa.T), dot(rxb, p_atom[1], rxb.T))
-                        for (atom, p_atom) in proj.items()
-                    }
-                    for a, atom1 in enumerate(atoms1):
-                        tmpa = np.tensordot(projx[atom1][0], dm2aa) - np.tensordot(dm2ab, projx[atom1][1])
-                        tmpb = np.tensordot(projx[atom1][1], dm2bb) - np.tensordot(projx[atom1][0], dm2ab)
-                        for b, atom2 in enumerate(atoms2):
-                            corr[a, b] += f22 * (np.sum(tmpa * projx[atom2][0]) + np.sum(tmpb * projx[atom2][1]))
-
-    # Remove independent particle [P(A).DM1 * P(B).DM1] contribution
-    if kind == "dn,dn":
-        # TODO
-        raise NotImplementedError
-        for a, atom1 in enumerate(atoms1):
-            for b, atom2 in enumerate(atoms2):
-                corr[a, b] -= np.sum(dm1 * proj[atom1]) * np.sum(dm1 * proj[atom2])
+                    # Atomic projectors in the cluster basis:
+                    pvec = [_get_projector_vectors(dot(cx2_coeff[s].T, cst[s], r[s]), sizes[s]) for s in range(2)]
+                    p1 = [p[:, idx1] for p in pvec]
+                    p2 = [p[:, idx2] for p in pvec]
+                    corr2 += f22 * _contract_cumulant_unrestricted(p1, p2, (dm2aa, dm2ab, dm2bb))
+        if mpi:
+            corr2 = mpi.nreduce(corr2, logfunc=emb.log.timingv)
+        corr += corr2
 
     return corr
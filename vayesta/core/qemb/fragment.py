@@ -5,8 +5,10 @@ import os.path
 import typing
 
 # --- External
+import h5py
 import numpy as np
 import pyscf
+import pyscf.fci.addons
 import pyscf.lo
 
 # --- Internal
@@ -30,7 +32,10 @@ from vayesta.core.symmetry import SymmetryIdentity
 from vayesta.core.symmetry import SymmetryTranslation
 import vayesta.core.ao2mo
 import vayesta.core.ao2mo.helper
+import vayesta.core.types
 from vayesta.core.types import WaveFunction
+from vayesta.core.types import RMP2_WaveFunction, RCCSD_WaveFunction, UCCSD_WaveFunction, RFCI_WaveFunction
+from vayesta.core.types.wf.project import transform_c1, transform_c2, transform_uc1, transform_uc2
 
 # Bath
 from vayesta.core.bath import BNO_Threshold
@@ -49,11 +54,43 @@ from vayesta.core.types.bosonic_orbitals import QuasiBosonOrbitals
 from vayesta.misc.cubefile import CubeFile
 from vayesta.mpi import mpi
 from vayesta.solver import get_solver_class, check_solver_config, ClusterHamiltonian
+from vayesta.solver import RCCSD_Solver, FCI_Solver
 from vayesta.core.screening.screening_crpa import get_frag_W
 
 # Get MPI rank of fragment
 get_fragment_mpi_rank = lambda *args: args[0].mpi_rank
 
+# Wave function types, which can be stored in checkpoint files via `pack` and `unpack`
+_checkpoint_wf_types = (RMP2_WaveFunction, RCCSD_WaveFunction, UCCSD_WaveFunction)
+
+
+def _h5_write_spin(grp, key, data):
+    """Write array or tuple of (alpha, beta) arrays to HDF5 group."""
+    if isinstance(data, (tuple, list)):
+        grp.create_dataset(key + "_a", data=data[0])
+        grp.create_dataset(key + "_b", data=data[1])
+    else:
+        grp.create_dataset(key, data=data)
+
+
+def _h5_read_spin(grp, key):
+    """Read array or tuple of (alpha, beta) arrays from HDF5 group."""
+    if key in grp:
+        return grp[key][()]
+    if (key + "_a") in grp:
+        return (grp[key + "_a"][()], grp[key + "_b"][()])
+    return None
+
+
+def _allclose_spin(a, b, atol):
+    if isinstance(a, tuple) != isinstance(b, (tuple, list)):
+        return False
+    if isinstance(a, tuple):
+        return all(_allclose_spin(a[s], b[s], atol) for s in range(2))
+    if a is None or b is None:
+        return a is b
+    return a.shape == b.shape and np.allclose(a, b, rtol=0, atol=atol)
+
 
 @dataclasses.dataclass
 class Options(OptionsBase):
@@ -65,7 +102,7 @@ class Options(OptionsBase):
     # --- Solver options
     solver_options: dict = None
     # --- Other
-    store_eris: bool = None  # If True, ERIs will be cached in Fragment.hamil
+    store_eris: typing.Union[bool, str] = None  # If True, ERIs will be cached in Fragment.hamil; if 'disk', on disk
     dm_with_frozen: bool = None  # TODO: is still used?
     screening: typing.Optional[str] = None
     match_cluster_fock: bool = None
@@ -220,6 +257,7 @@ class Fragment:
         self.c_proj = self.c_frag
 
         # Initialize self.bath, self._cluster, self._results, self.hamil
+        self._results = None
         self.reset()
 
         self.log.debugv("Creating %r", self)
@@ -378,7 +416,12 @@ class Fragment:
             raise RuntimeError("Cannot set attribute cluster in symmetry derived fragment.")
         self._cluster = value
 
-    def reset(self, reset_bath=True, reset_cluster=True, reset_eris=True, reset_inactive=True):
+    def reset(self, reset_bath=True, reset_cluster=True, reset_eris=True, reset_inactive=True, keep_init_guess=False):
+        """Reset fragment.
+
+        If `keep_init_guess` is True, the wave function of the current results is kept and used as
+        initial guess for the next cluster solver calculation, see `get_init_guess`.
+        """
         self.log.debugv(
             "Resetting %s (reset_bath= %r, reset_cluster= %r, reset_eris= %r, reset_inactive= %r)",
             self,
@@ -389,6 +432,10 @@ class Fragment:
         )
         if not reset_inactive and not self.active:
             return
+        if not keep_init_guess:
+            self._init_guess_wf = None
+        elif self._results is not None and self._results.wf is not None:
+            self._init_guess_wf = self._results.wf
         if reset_bath:
             self._dmet_bath = None
             self._bath_factory_occ = None
@@ -401,6 +448,177 @@ class Fragment:
             self._seris_ov = None
         self._results = None
 
+    def get_init_guess(self, init_guess=None, cluster_solver=None, cluster=None):
+        """Get initial guess for the cluster solver.
+
+        Wave functions are rotated into the basis of the active cluster orbitals. This allows using
+        the wave function of a previous self-consistency iteration, in which the cluster was slightly different.
+        Currently, CCSD amplitudes (for the CCSD solvers of PySCF) and RHF FCI vectors (for the RHF FCI solver)
+        are supported. For any other cluster solver, no initial guess is used.
+
+        Parameters
+        ----------
+        init_guess : WaveFunction or dict, optional
+            Wave function or keyword arguments for the `kernel` method of the cluster solver.
+            Default: wave function kept by `reset(keep_init_guess=True)`, if available.
+        cluster_solver : ClusterSolver, optional
+            Cluster solver object. Default: `self.get_solver()`.
+        cluster : Cluster, optional
+            Cluster. Default: `self.cluster`.
+
+        Returns
+        -------
+        init_guess : dict
+            Keyword arguments for the `kernel` method of the cluster solver.
+        """
+        if init_guess is None:
+            init_guess = self._init_guess_wf
+        if init_guess is None:
+            return {}
+        if isinstance(init_guess, dict):
+            return init_guess
+        if cluster_solver is None:
+            cluster_solver = self.get_solver()
+        solver = type(cluster_solver).__name__
+        cluster = cluster or self.cluster
+        wf = init_guess
+        ovlp = self.base.get_ovlp()
+        if isinstance(cluster_solver, RCCSD_Solver) and hasattr(wf, "as_ccsd"):
+            wf = wf.as_ccsd()
+            ro = spinalg.dot(spinalg.T(wf.mo.coeff_occ), ovlp, cluster.c_active_occ)
+            rv = spinalg.dot(spinalg.T(wf.mo.coeff_vir), ovlp, cluster.c_active_vir)
+            if self.base.is_rhf:
+                t1, l1 = transform_c1(wf.t1, ro, rv), transform_c1(wf.l1, ro, rv)
+                t2, l2 = transform_c2(wf.t2, ro, rv), transform_c2(wf.l2, ro, rv)
+            else:
+                t1, l1 = transform_uc1(wf.t1, ro, rv), transform_uc1(wf.l1, ro, rv)
+                # PySCF's UCCSD uses (aa, ab, bb) spin blocks:
+                t2, l2 = [transform_uc2(c2, ro, rv) for c2 in (wf.t2, wf.l2)]
+                t2, l2 = [(c2[0], c2[1], c2[-1]) if c2 is not None else None for c2 in (t2, l2)]
+            self.log.debug("Initial guess for %s from rotated %s.", solver, type(init_guess).__name__)
+            return dict(t1=t1, t2=t2, l1=l1, l2=l2)
+        if type(cluster_solver) is FCI_Solver and self.base.is_rhf and isinstance(wf, RFCI_WaveFunction):
+            r = dot(wf.mo.coeff.T, ovlp, cluster.c_active)
+            nocc = cluster.nocc_active
+            ci = pyscf.fci.addons.transform_ci(wf.ci, (nocc, nocc), r)
+            self.log.debug("Initial guess for %s from rotated %s.", solver, type(init_guess).__name__)
+            return dict(ci=ci / np.linalg.norm(ci))
+        self.log.debug("No initial guess for %s from %s.", solver, type(init_guess).__name__)
+        return {}
+
+    # --- Checkpoints
+    # ---------------
+
+    def save_checkpoint(self, filename):
+        """Save cluster, bath occupations, and results of fragment to HDF5 checkpoint file.
+
+        The data is stored in the group 'fragment_<id>'. An existing group of the same fragment is replaced.
+
+        Parameters
+        ----------
+        filename : str
+            Name of HDF5 checkpoint file. Created, if it does not exist.
+
+        Returns
+        -------
+        saved : bool
+            False, if the results contain a wave function which cannot be packed; the fragment is then
+            not saved.
+        """
+        results = self.results
+        packed = {}
+        for key in ("wf", "pwf"):
+            wf = getattr(results, key, None)
+            if wf is None:
+                continue
+            if type(wf) not in _checkpoint_wf_types:
+                self.log.warning("Cannot save %s of type %s to checkpoint file.", key, type(wf).__name__)
+                return False
+            packed[key] = wf.pack()
+        with h5py.File(filename, "a") as h5file:
+            name = "fragment_%d" % self.id
+            if name in h5file:
+                del h5file[name]
+            grp = h5file.create_group(name)
+            grp.attrs["name"] = self.name
+            grp.attrs["solver"] = self.solver
+            _h5_write_spin(grp, "c_frag", self.c_frag)
+            _h5_write_spin(grp, "c_active_occ", self.cluster.c_active_occ)
+            _h5_write_spin(grp, "c_active_vir", self.cluster.c_active_vir)
+            for occtype, bath in (("occ", self._bath_factory_occ), ("vir", self._bath_factory_vir)):
+                if getattr(bath, "occup", None) is not None:
+                    _h5_write_spin(grp, "bath_occup_%s" % occtype, bath.occup)
+            # Results
+            grp = grp.create_group("results")
+            for field in dataclasses.fields(results):
+                val = getattr(results, field.name)
+                if field.name in packed:
+                    grp.create_dataset(field.name, data=packed[field.name])
+                    grp.attrs["%s_type" % field.name] = type(val).__name__
+                elif isinstance(val, (bool, int, float, np.number, np.bool_)):
+                    grp.attrs[field.name] = val
+                elif isinstance(val, np.ndarray):
+                    grp.create_dataset(field.name, data=val)
+                elif val is not None:
+                    self.log.debugv("Results attribute %s of type %s not saved to checkpoint.", field.name, type(val))
+        self.log.debug("Saved %s to checkpoint file '%s'.", self, filename)
+        return True
+
+    def load_checkpoint(self, filename, tol=1e-8):
+        """Restore results of fragment from HDF5 checkpoint file.
+
+        The checkpoint is only used if the fragment, solver, and active cluster orbitals agree with
+        the current fragment (and the bath occupation numbers, if they are available in both).
+
+        Parameters
+        ----------
+        filename : str
+            Name of HDF5 checkpoint file.
+        tol : float, optional
+            Tolerance for the comparison of orbital coefficients and bath occupation numbers. Default: 1e-8.
+
+        Returns
+        -------
+        restored : bool
+            True, if a valid checkpoint was found and the results were restored.
+        """
+        name = "fragment_%d" % self.id
+        with h5py.File(filename, "r") as h5file:
+            if name not in h5file:
+                return False
+            grp = h5file[name]
+            if grp.attrs["solver"] != self.solver:
+                self.log.debug("Checkpoint of %s in '%s' is for solver %s.", self, filename, grp.attrs["solver"])
+                return False
+            checks = [
+                ("c_frag", self.c_frag),
+                ("c_active_occ", self.cluster.c_active_occ),
+                ("c_active_vir", self.cluster.c_active_vir),
+            ]
+            for occtype, bath in (("occ", self._bath_factory_occ), ("vir", self._bath_factory_vir)):
+                occup = getattr(bath, "occup", None)
+                if occup is not None and ("bath_occup_%s" % occtype) in grp:
+                    checks.append(("bath_occup_%s" % occtype, occup))
+            for key, val in checks:
+                if not _allclose_spin(_h5_read_spin(grp, key), val, atol=tol):
+                    self.log.debug("Checkpoint of %s in '%s' has different %s.", self, filename, key)
+                    return False
+            # Results
+            grp = grp["results"]
+            kwargs = {}
+            for field in dataclasses.fields(self.Results):
+                if field.name in grp:
+                    val = grp[field.name][()]
+                    wf_type = grp.attrs.get("%s_type" % field.name)
+                    if wf_type is not None:
+                        val = getattr(vayesta.core.types, wf_type).unpack(val)
+                    kwargs[field.name] = val
+                elif field.name in grp.attrs:
+                    kwargs[field.name] = grp.attrs[field.name].item()
+        self._results = self.Results(**kwargs)
+        self.log.info("Restored %s from checkpoint file '%s'.", self, filename)
+        return True
+
     def get_fragments_with_overlap(self, tol=1e-8, **kwargs):
         """Get list of fragments which overlap both in occupied and virtual space."""
         c_occ = self.get_overlap("mo[occ]|cluster[occ]")
@@ -903,6 +1121,7 @@ class Fragment:
                     c_buffer=c_buffer,
                     project_dmet_order=project_dmet_order,
                     project_dmet_mode=project_dmet_mode,
+                    stream=self._get_bath_option("stream", occtype),
                 )
             if btype == "rpa":
                 project_dmet_order = self._get_bath_option("project_dmet_order", occtype)
@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+
+from vayesta.core import spinalg
+
+
+class FragmentNeighbors:
+    """Neighbor lists of fragments, based on the overlap of their clusters.
+
+    Fragments X and Y are neighbors, if the Frobenius norms of both the occupied and the virtual overlap
+    matrix between their clusters are at least `tol`. Since the Frobenius norm is an upper bound to the
+    spectral norm and to the largest absolute element of the overlap matrices, fragment pair loops,
+    which screen pairs based on one of these quantities, can be restricted to neighbors without changing
+    their result.
+
+    The neighbor list of each fragment is constructed on first request, at a cost of N(frag) matrix
+    products, and all neighbor lists are invalidated, once the cluster of any fragment changes.
+    """
+
+    def __init__(self, emb):
+        self.emb = emb
+        self._clusters = None
+        self._coeffs = {}
+        self._neighbors = {}
+        self._lock = threading.Lock()
+
+    def _check_clusters(self):
+        clusters = [x.get_symmetry_parent()._cluster for x in self.emb.fragments]
+        if self._clusters is not None and len(clusters) == len(self._clusters):
+            if all(c1 is c2 for c1, c2 in zip(clusters, self._clusters)):
+                return
+        self._clusters = clusters
+        self._coeffs.clear()
+        self._neighbors.clear()
+
+    def _get_cluster_coeffs(self, fragment):
+        """Occupied and virtual cluster orbitals; these are stored, as they need to be transformed for symmetry
+        derived fragments."""
+        if fragment.id not in self._coeffs:
+            cluster = fragment.cluster
+            self._coeffs[fragment.id] = (cluster.c_occ, cluster.c_vir)
+        return self._coeffs[fragment.id]
+
+    def _make_neighbors(self, fragment, tol):
+        ovlp = self.emb.get_ovlp()
+        cx_occ, cx_vir = self._get_cluster_coeffs(fragment)
+        cxs_occ = spinalg.dot(spinalg.T(cx_occ), ovlp)
+        cxs_vir = spinalg.dot(spinalg.T(cx_vir), ovlp)
+        neighbors = set()
+        for fy in self.emb.fragments:
+            if fy.get_symmetry_parent()._cluster is None:
+                continue
+            cy_occ, cy_vir = self._get_cluster_coeffs(fy)
+            nxy_occ = np.amax(spinalg.norm(spinalg.dot(cxs_occ, cy_occ)))
+            if nxy_occ < tol:
+                continue
+            nxy_vir = np.amax(spinalg.norm(spinalg.dot(cxs_vir, cy_vir)))
+            if nxy_vir < tol:
+                continue
+            neighbors.add(fy.id)
+        return neighbors
+
+    def get_neighbors(self, fragment, tol, fragments=None):
+        """Get neighbors of a fragment.
+
+        Parameters
+        ----------
+        fragment: Fragment
+            Fragment for which the neighbors are returned. Its cluster needs to be defined.
+        tol: float
+            Minimum Frobenius norm of the occupied and virtual cluster overlap.
+        fragments: list, optional
+            If set, only neighbors within this list are returned. Default: all fragments.
+
+        Returns
+        -------
+        neighbors: list
+            Neighbors of `fragment`, including `fragment` itself.
+        """
+        if fragments is None:
+            fragments = self.emb.fragments
+        with self._lock:
+            self._check_clusters()
+            key = (fragment.id, tol)
+            if key not in self._neighbors:
+                self._neighbors[key] = self._make_neighbors(fragment, tol)
+            neighbors = self._neighbors[key]
+        return [fy for fy in fragments if fy.id in neighbors]
@@ -2,16 +2,19 @@ import logging
 from datetime import datetime
 import dataclasses
 import copy
+import concurrent.futures
 import itertools
 import os
+import threading
 import os.path
-from typing import Optional
+from typing import Optional, Union
 
 import numpy as np
 
 import pyscf
 import pyscf.mp
 import pyscf.ci
+import pyscf.df
 import pyscf.cc
 import pyscf.pbc
 import pyscf.pbc.tools
@@ -30,13 +33,19 @@ from vayesta.core.util import (
     hstack,
     log_method,
     log_time,
+    memory_string,
     with_doc,
 )
-from vayesta.core import spinalg, eris
+from vayesta.core import spinalg, eris, vlog
+from vayesta.core.ao2mo.cderi_store import CDERI_Store
+from vayesta.core.ao2mo.cholesky import cholesky_eris
+from vayesta.core.ao2mo.eris_store import ERIs_Store
 from vayesta.core.scmf import PDMET, Brueckner
 from vayesta.core.screening.screening_moment import build_screened_eris
 from vayesta.mpi import mpi
 from vayesta.core.qemb.register import FragmentRegister
+from vayesta.core.qemb.register import estimate_solver_cost
+from vayesta.core.qemb.neighbors import FragmentNeighbors
 from vayesta.rpa import ssRIRPA
 from vayesta.solver import check_solver_config
 
@@ -54,7 +63,7 @@ from vayesta.core.fragmentation import IAOPAO_Fragmentation
 from vayesta.core.fragmentation import Site_Fragmentation
 from vayesta.core.fragmentation import CAS_Fragmentation
 
-from vayesta.misc.cptbisect import ChempotBisection
+from vayesta.misc.cptbisect import ChempotBisection, ChempotNewton
 
 # Expectation values
 from vayesta.core.qemb.corrfunc import get_corrfunc
@@ -71,9 +80,11 @@ from vayesta.core.qemb.rdm import make_rdm2_demo_rhf
 
 @dataclasses.dataclass
 class Options(OptionsBase):
-    store_eris: bool = (
-        True  # If True, ERIs will be stored in Fragment.hamil; otherwise they will be recalculated whenever needed.
-    )
+    # If True, ERIs will be stored in Fragment.hamil; otherwise they will be recalculated whenever needed.
+    # If 'disk', ERIs are stored in a temporary HDF5 file, keyed by the cluster orbitals, and the most recently
+    # used ERIs are kept in memory, up to `eris_store_max_memory` bytes:
+    store_eris: Union[bool, str] = True
+    eris_store_max_memory: int = int(2e9)
     global_frag_chempot: float = None  # Global fragment chemical potential (e.g. for democratically partitioned DMs)
     dm_with_frozen: bool = False  # Add frozen parts to cluster DMs
     # --- Bath options
@@ -96,6 +107,7 @@ class Options(OptionsBase):
         project_dmet_order=2,
         project_dmet_mode="squared-entropy",
         addbuffer=False,
+        stream=None,  # Build MP2 DM without storing T2 amplitudes [True, False, None: if T2 exceeds max_memory]
         # The following options can be set occupied/virtual-specific:
         bathtype_occ=None,
         bathtype_vir=None,
@@ -143,6 +155,7 @@ class Options(OptionsBase):
         diis_space=None,
         diis_start_cycle=None,
         iterative_damping=None,
+        df=None,
         # FCI
         threads=1,
         max_cycle=300,
@@ -166,6 +179,18 @@ class Options(OptionsBase):
     screening: Optional[str] = None  # What form of screening to use in clusters.
     ext_rpa_correction: Optional[str] = None
     match_cluster_fock: bool = False
+    # --- MPI
+    mpi_load_balance: bool = False  # Reassign MPI ranks of fragments based on estimated cost of the cluster solvers
+    mpi_dynamic_dispatch: bool = False  # Idle MPI ranks solve the next unsolved fragment, ordered by estimated cost
+    # --- Store (L|ov) integrals in MO basis, to be reused by all MP2 baths [None, 'memory', 'disk']
+    cderi_store: Optional[str] = None
+    cderi_store_max_memory: int = int(4e9)  # In bytes; if exceeded, the integrals are stored on disk instead
+    # --- Pivoted Cholesky decomposition of the AO ERIs of molecules without density-fitting, with this threshold
+    # (e.g. 1e-8); the Cholesky vectors are then used as three-center integrals for all clusters [None: disabled]
+    cholesky_eris: Optional[float] = None
+    # --- Shared-memory parallelization
+    fragment_workers: int = 1  # Number of fragments, for which baths and solvers are run concurrently in a thread pool
+    fragment_worker_threads: Optional[int] = None  # OpenMP threads per worker (default: OpenMP threads / workers)
 
 
 class Embedding:
@@ -290,8 +315,11 @@ class Embedding:
             self.kpts = None
             self.kdf = None
             self.madelung = None
+            self._cholesky_df = None
             with log_time(self.log.timing, "Time for mean-field setup: %s"):
                 self.init_mf(mf)
+            if self.opts.cholesky_eris is not None:
+                self.init_cholesky_df()
 
             # 5) Other
             # --------
@@ -305,6 +333,11 @@ class Embedding:
 
             self.register = FragmentRegister()
             self.fragments = []
+            self._cderi_store = {}
+            self._fragment_neighbors = FragmentNeighbors(self)
+            self._cderi_store_lock = threading.Lock()
+            self._checkpoint_lock = threading.Lock()
+            self._eris_store = None
             self.with_scmf = None  # Self-consistent mean-field
             # Initialize results
             self._reset()
@@ -463,9 +496,31 @@ class Embedding:
             return 1
         return len(self.kpts)
 
+    def init_cholesky_df(self):
+        """Pivoted Cholesky decomposition of AO ERIs, which is used in place of density-fitting."""
+        if self.df is not None or self.kdf is not None:
+            self.log.info("Mean-field uses density-fitting; skipping Cholesky decomposition of ERIs.")
+            return
+        with log_time(self.log.timing, "Time for Cholesky decomposition of ERIs: %s"):
+            if mpi.is_master:
+                cderi = cholesky_eris(self.mol, threshold=self.opts.cholesky_eris, eri=self.mf._eri)
+            else:
+                cderi = None
+            if mpi:
+                cderi = mpi.world.bcast(cderi, root=0)
+        self.log.info(
+            "Cholesky decomposition of ERIs: %d vectors (threshold= %.1e, %s)",
+            cderi.shape[0],
+            self.opts.cholesky_eris,
+            memory_string(cderi),
+        )
+        self._cholesky_df = pyscf.df.DF(self.mol)
+        self._cholesky_df._cderi = cderi
+
     @property
     def has_df(self):
-        return (self.df is not None) or (self.kdf is not None)
+        """Three-center integrals are available, via density-fitting or the Cholesky decomposition of the ERIs."""
+        return (self.cderi_df is not None) or (self.kdf is not None)
 
     @property
     def df(self):
@@ -473,6 +528,13 @@ class Embedding:
             return self.mf.with_df
         return None
 
+    @property
+    def cderi_df(self):
+        """Density-fitting object of the mean-field, or the Cholesky decomposition of the ERIs, if present."""
+        if self.df is not None:
+            return self.df
+        return self._cholesky_df
+
     # Mean-field properties
 
     # def init_vhf_ehf(self):
@@ -703,6 +765,64 @@ class Embedding:
 
     get_cderi_exspace = eris.get_cderi_exspace
 
+    def get_cderi_ov(self, c_occ, c_vir, spin=0):
+        """Get three-center integrals (L|ia) between occupied and virtual orbitals.
+
+        If `opts.cderi_store` is set, the (L|ov) integrals in the MO basis are calculated once and
+        the integrals for `c_occ` and `c_vir` are obtained by rotation. Otherwise, or if the orbitals
+        do not lie within the occupied and virtual MO space, respectively, `get_cderi` is used.
+
+        Parameters
+        ----------
+        c_occ : (n(AO), n(i)) array
+            Occupied orbital coefficients.
+        c_vir : (n(AO), n(a)) array
+            Virtual orbital coefficients.
+        spin : int, optional
+            Spin channel of orbitals for unrestricted embedding. Default: 0.
+
+        Returns
+        -------
+        cderi : (n(aux), n(i), n(a)) array
+            Three-center integrals.
+        cderi_neg : (n(aux-), n(i), n(a)) array or None
+            Negative part of three-center integrals (2D systems only).
+        """
+        if self.opts.cderi_store is not None:
+            cderi, cderi_neg = self._get_cderi_store(spin).get_cderi(c_occ, c_vir)
+            if cderi is not None:
+                return cderi, cderi_neg
+            self.log.debug("Orbitals not in MO space of (L|ov) store; calculating integrals.")
+        return self.get_cderi((c_occ, c_vir))
+
+    def _get_cderi_store(self, spin=0):
+        if self.opts.cderi_store not in ("memory", "disk"):
+            raise ValueError("Invalid value for cderi_store: %r" % self.opts.cderi_store)
+        with self._cderi_store_lock:
+            mo_occ, mo_vir = self.mo_coeff_occ, self.mo_coeff_vir
+            if self.spinsym == "unrestricted":
+                mo_occ, mo_vir = mo_occ[spin], mo_vir[spin]
+            store = self._cderi_store.get(spin)
+            # (Re)build store, if MOs have changed:
+            if store is None or not (
+                np.array_equal(store.mo_coeff_occ, mo_occ) and np.array_equal(store.mo_coeff_vir, mo_vir)
+            ):
+                self._cderi_store[spin] = CDERI_Store(
+                    self,
+                    mo_occ,
+                    mo_vir,
+                    max_memory=self.opts.cderi_store_max_memory,
+                    disk=(self.opts.cderi_store == "disk"),
+                )
+            return self._cderi_store[spin]
+
+    def _get_eris_store(self):
+        """Store of cluster ERIs, used if `opts.store_eris == 'disk'`."""
+        with self._cderi_store_lock:
+            if self._eris_store is None:
+                self._eris_store = ERIs_Store(max_memory=self.opts.eris_store_max_memory)
+            return self._eris_store
+
     get_eris_array = eris.get_eris_array
 
     get_eris_object = eris.get_eris_object
@@ -736,12 +856,10 @@ class Embedding:
             self.log.info(msg)
             self.log.info(len(msg) * "-")
             # Generate list of all required target information.
-            targets, ntarget = zip(*[x.make_bosonic_bath_target() for x in fragments])
-            target_rot = np.vstack([x for x in targets if x is not None])
+            targets = [x.make_bosonic_bath_target()[0] for x in fragments]
             rpa = ssRIRPA(self.mf)
-            moments = rpa.kernel_moms(max_moment=0, target_rot=target_rot)[0][0]
-            # Split this into individual fragment contributions.
-            moments = np.vsplit(moments, np.cumsum(ntarget)[:-1])
+            # Single calculation for all fragments, split into individual fragment contributions.
+            moments = [m[0] for m in rpa.kernel_moms_stacked(0, targets)[0]]
             for x, moment in zip(fragments, moments):
                 msg = "Making bosonic bath for %s%s" % (x, (" on MPI process %d" % mpi.rank) if mpi else "")
                 self.log.info(msg)
@@ -1160,6 +1278,28 @@ class Embedding:
             filtered_fragments.append(frag)
         return filtered_fragments
 
+    def get_fragment_neighbors(self, fragment, tol, fragments=None):
+        """Get fragments, whose cluster overlaps with the cluster of `fragment`.
+
+        Fragments are neighbors, if the Frobenius norms of both the occupied and virtual cluster overlap
+        matrices are at least `tol`. Neighbor lists are cached until any cluster changes.
+
+        Parameters
+        ----------
+        fragment: Fragment
+            Fragment for which the neighbors are returned.
+        tol: float
+            Overlap tolerance.
+        fragments: list, optional
+            If set, only neighbors within this list are returned. Default: all fragments.
+
+        Returns
+        -------
+        neighbors: list
+            Neighboring fragments, including `fragment` itself.
+        """
+        return self._fragment_neighbors.get_neighbors(fragment, tol, fragments=fragments)
+
     def get_fragment_overlap_norm(self, fragments=None, occupied=True, virtual=True, norm=2):
         """Get matrix of overlap norms between fragments."""
         if fragments is None:
@@ -1250,6 +1390,154 @@ class Embedding:
                     x.cluster = cluster
                 x.cluster.orig_mf = self.mf
 
+    def balance_mpi_load(self, fragments=None):
+        """Reassign MPI ranks of fragments based on the estimated cost of their cluster solver calculations.
+
+        The clusters of all fragments need to be known on all MPI ranks, i.e. this should be called
+        after `communicate_clusters`. Symmetry children are assigned to the MPI rank of their parent.
+        Bath objects of fragments which change their MPI rank are sent to the new MPI rank.
+
+        Parameters
+        ----------
+        fragments : list, optional
+            Symmetry parent fragments to distribute. Default: all active symmetry parent fragments.
+
+        Returns
+        -------
+        load : (mpi.size,) array
+            Estimated cost of the cluster solver calculations on each MPI rank.
+        """
+        if fragments is None:
+            fragments = self.get_fragments(active=True, sym_parent=None)
+        costs = [estimate_solver_cost(x.cluster, x.solver) for x in fragments]
+        ranks = self.register.distribute(costs)
+        load = self.register.get_mpi_load()
+        if not mpi:
+            return load
+        with log_time(self.log.timing, "Time for MPI load balancing: %s"):
+            nmoved = 0
+            for x, rank in zip(fragments, ranks):
+                nmoved += int(x.mpi_rank != rank)
+                self.move_fragment(x, rank)
+        self.log.info("MPI load balancing: %d of %d fragments moved to new MPI rank", nmoved, len(fragments))
+        self.log_mpi_load(load, "Predicted cost")
+        return load
+
+    def communicate_baths(self, fragments=None):
+        """Broadcast bath objects of fragments from their MPI rank to all MPI ranks.
+
+        This is needed if fragments can be solved on a different MPI rank than the one which made their bath.
+
+        Parameters
+        ----------
+        fragments : list, optional
+            Symmetry parent fragments, whose baths are broadcast. Default: all symmetry parent fragments.
+        """
+        if not mpi:
+            return
+        if fragments is None:
+            fragments = self.get_fragments(sym_parent=None)
+        baths = ("_dmet_bath", "_bath_factory_occ", "_bath_factory_vir")
+        with log_time(self.log.timing, "Time to communicate baths: %s"):
+            for x in fragments:
+                source = x.mpi_rank
+                data = None
+                if mpi.rank == source:
+                    data = tuple(getattr(x, attr) for attr in baths)
+                    # Do not pickle the fragment (and embedding) together with the bath:
+                    for bath in data:
+                        if bath is not None:
+                            bath.fragment = None
+                data = mpi.world.bcast(data, root=source)
+                for attr, bath in zip(baths, data):
+                    if bath is not None:
+                        bath.fragment = x
+                    setattr(x, attr, bath)
+
+    def move_fragment(self, fragment, rank, with_baths=True):
+        """Change MPI rank of fragment and its symmetry children.
+
+        This is a collective operation, which needs to be called on all MPI ranks.
+        If `with_baths` is True, the bath objects of the fragment are sent from the previous to the new MPI rank.
+        """
+        source = fragment.mpi_rank
+        if rank == source:
+            return
+        if mpi and with_baths:
+            baths = ("_dmet_bath", "_bath_factory_occ", "_bath_factory_vir")
+            if mpi.rank == source:
+                data = tuple(getattr(fragment, attr) for attr in baths)
+                # Do not pickle the fragment (and embedding) together with the bath:
+                for bath in data:
+                    if bath is not None:
+                        bath.fragment = None
+                mpi.world.send(data, dest=rank)
+                for attr in baths:
+                    setattr(fragment, attr, None)
+            elif mpi.rank == rank:
+                data = mpi.world.recv(source=source)
+                for attr, bath in zip(baths, data):
+                    if bath is not None:
+                        bath.fragment = fragment
+                    setattr(fragment, attr, bath)
+        fragment.mpi_rank = rank
+        for child in fragment.get_symmetry_children():
+            child.mpi_rank = rank
+
+    def map_fragments(self, func, fragments):
+        """Apply function to each fragment, using a thread pool if `opts.fragment_workers` > 1.
+
+        Each worker thread runs with `opts.fragment_worker_threads` OpenMP threads, such that the total
+        number of threads stays the same as for a serial run by default. The log output of each fragment
+        is buffered and written in one block after the fragment is done. Lazily built integral objects
+        (density-fitting) are built before the workers start; other shared caches and files need to be
+        protected by locks (see `_cderi_store_lock` and `_checkpoint_lock`).
+
+        Parameters
+        ----------
+        func : callable
+            Function taking a fragment as its only argument. Different fragments need to be independent.
+        fragments : list
+            Fragments.
+
+        Returns
+        -------
+        results : list
+            Return values of `func` for each fragment.
+        """
+        nworkers = min(self.opts.fragment_workers or 1, len(fragments))
+        if nworkers <= 1:
+            return [func(x) for x in fragments]
+        nthreads = self.opts.fragment_worker_threads or max(pyscf.lib.num_threads() // nworkers, 1)
+        self.log.info(
+            "Running %d fragments with %d workers and %d threads per worker", len(fragments), nworkers, nthreads
+        )
+
+        # The three-center integrals of PySCF are built lazily on first use:
+        for df in (self.df, self.kdf):
+            if df is not None and getattr(df, "_cderi", False) is None:
+                df.build()
+        indent = vlog.get_indent_level()
+
+        def run(x):
+            with vlog.buffered_logging(indent=indent), pyscf.lib.with_omp_threads(nthreads):
+                return func(x)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=nworkers) as pool:
+            return list(pool.map(run, fragments))
+
+    def log_mpi_load(self, load, name="Load"):
+        """Log load of each MPI rank and the load imbalance (maximum over mean)."""
+        load = np.asarray(load, dtype=float)
+        mean = np.mean(load)
+        imbalance = (np.amax(load) / mean) if mean > 0 else 1.0
+        self.log.info(
+            "%s per MPI rank: min= %.3g  max= %.3g  imbalance= %.2f", name, np.amin(load), np.amax(load), imbalance
+        )
+        for rank, val in enumerate(load):
+            self.log.debug("  MPI rank %3d: %.3g (%.1f %%)", rank, val, 100 * val / max(np.sum(load), 1e-14))
+        return imbalance
+
     @log_method()
     @with_doc(make_rdm1_demo_rhf)
     def make_rdm1_demo(self, *args, **kwargs):
@@ -1368,6 +1656,12 @@ class Embedding:
     # -----------------------
 
     def _get_atom_projectors(self, atoms=None, projection="sao", orbital_filter=None):
+        atoms1, atoms2, coeffs = self._get_atom_projector_coeffs(atoms, projection, orbital_filter=orbital_filter)
+        projectors = {atom: spinalg.dot(r, spinalg.transpose(r)) for (atom, r) in coeffs.items()}
+        return atoms1, atoms2, projectors
+
+    def _get_atom_projector_coeffs(self, atoms=None, projection="sao", orbital_filter=None):
+        """Get coefficients R(A) of the atomic projectors P(A) = R(A).R(A)^T in the MO basis."""
         if atoms is None:
             atoms2 = list(range(self.mol.natm))
             # For supercell systems, we do not want all supercell-atom pairs,
@@ -1391,7 +1685,7 @@ class Embedding:
             raise ValueError("Invalid projection: %s" % projection)
         frag.kernel()
         ovlp = self.get_ovlp()
-        projectors = {}
+        coeffs = {}
         cs = spinalg.dot(spinalg.transpose(self.mo_coeff), ovlp)
         for atom in sorted(set(atoms1).union(atoms2)):
             name, indices = frag.get_atomic_fragment_indices(atom, orbital_filter=orbital_filter)
@@ -1404,10 +1698,9 @@ class Embedding:
             if no_orbs and orbital_filter is not None:
                 self.log.error("No orbitals found for atom %d when filtered!" % atom)
                 raise ValueError("No orbitals found for atom %d when filtered" % atom)
-            r = spinalg.dot(cs, c_atom)
-            projectors[atom] = spinalg.dot(r, spinalg.transpose(r))
+            coeffs[atom] = spinalg.dot(cs, c_atom)
 
-        return atoms1, atoms2, projectors
+        return atoms1, atoms2, coeffs
 
     def get_lo_coeff(self, local_orbitals="lowdin", minao="auto"):
         if local_orbitals.lower() == "lowdin":
@@ -1681,7 +1974,7 @@ class Embedding:
     # --- Decorators
     # These replace the qemb.kernel method!
 
-    def optimize_chempot(self, cpt_init=0.0, dm1func=None, dm1kwds=None, robust=False):
+    def optimize_chempot(self, cpt_init=0.0, dm1func=None, dm1kwds=None, robust=False, method="bisect"):
         if dm1func is None:
             dm1func = self.make_rdm1_demo
         if dm1kwds is None:
@@ -1704,11 +1997,16 @@ class Embedding:
             iters.append((cpt, err, self.converged, self.e_tot))
             return err
 
-        bisect = ChempotBisection(func, cpt_init=cpt_init, robust=robust, log=self.log)
+        if method == "bisect":
+            cptopt = ChempotBisection(func, cpt_init=cpt_init, robust=robust, log=self.log)
+        elif method == "newton":
+            cptopt = ChempotNewton(func, cpt_init=cpt_init, log=self.log)
+        else:
+            raise ValueError("Invalid method for chemical potential optimization: %r" % method)
 
         def kernel(self, *args, **kwargs):
             nonlocal iters, result
-            cpt = bisect.kernel(*args, **kwargs)
+            cpt = cptopt.kernel(*args, **kwargs)
             # Print info:
             self.log.info("Chemical potential optimization")
             self.log.info("-------------------------------")
@@ -1717,7 +2015,7 @@ class Embedding:
                 self.log.info(
                     "  %9d  %19s  %+14.8f  %9r  %19s", i + 1, energy_string(cpt), err, conv, energy_string(etot)
                 )
-            if not bisect.converged:
+            if not cptopt.converged:
                 self.log.error("Chemical potential not found!")
             return result
 
@@ -1,6 +1,53 @@
+import scipy.special
+import numpy as np
+
 from vayesta.mpi import mpi
 
 
+def _spin_average(n):
+    return np.mean(n) if np.ndim(n) > 0 else n
+
+
+def estimate_solver_cost(cluster, solver):
+    """Estimate relative cost of a cluster solver calculation.
+
+    The estimates are based on the formal scaling of the leading term of the respective solver
+    and are only meant to be compared with each other, e.g. to distribute fragments over MPI ranks.
+
+    Parameters
+    ----------
+    cluster : Cluster
+        Cluster for which the cost is estimated.
+    solver : str
+        Cluster solver.
+
+    Returns
+    -------
+    cost : float
+        Estimated cost.
+    """
+    nocc = _spin_average(cluster.nocc_active)
+    nvir = _spin_average(cluster.nvir_active)
+    norb = nocc + nvir
+    solver = solver.upper()
+    if solver in ("HF", "DUMP"):
+        return float(norb**3)
+    if solver == "MP2":
+        return float(nocc**2 * nvir**3)
+    if "FCI" in solver:
+        # Number of determinants (alpha strings x beta strings):
+        norb_ab = np.broadcast_to(cluster.norb_active, 2)
+        nocc_ab = np.broadcast_to(cluster.nocc_active, 2)
+        ndet = np.prod(scipy.special.comb(norb_ab, nocc_ab))
+        return float(ndet * norb**4)
+    if "CCSDTQ" in solver:
+        return float(nocc**4 * nvir**6)
+    if "(T)" in solver:
+        return float(nocc**2 * nvir**4 + nocc**3 * nvir**4)
+    # CCSD, CISD, TCCSD, EBCC,...
+    return float(nocc**2 * nvir**4)
+
+
 class FragmentRegister:
     def __init__(self, mpi_size=None):
         self._next_id = -1
@@ -8,20 +55,57 @@ class FragmentRegister:
             mpi_size = mpi.size
         self._mpi_size = mpi_size
         self._next_mpi_rank = -1
+        self._mpi_load = np.zeros(mpi_size)
 
     def get_next_id(self):
         self._next_id += 1
         return self._next_id
 
     def get_next_mpi_rank(self, runtime=None, memory=None):
-        """TODO: get next MPI rank based on runtime and memory estimates."""
-        if runtime is not None:
-            raise NotImplementedError()
+        """Get next MPI rank.
+
+        Without a runtime estimate, the MPI ranks are assigned in a round-robin fashion.
+        With a runtime estimate, the MPI rank with the currently lowest accumulated runtime
+        is returned and its runtime is increased by `runtime`.
+        """
         if memory is not None:
             raise NotImplementedError()
-        self._next_mpi_rank = (self._next_mpi_rank + 1) % self._mpi_size
-        return self._next_mpi_rank
+        if runtime is None:
+            self._next_mpi_rank = (self._next_mpi_rank + 1) % self._mpi_size
+            return self._next_mpi_rank
+        rank = int(np.argmin(self._mpi_load))
+        self._mpi_load[rank] += runtime
+        return rank
 
     def get_next(self, *args, **kwargs):
         """Get next free fragment ID and MPI rank."""
         return (self.get_next_id(), self.get_next_mpi_rank(*args, **kwargs))
+
+    def get_mpi_load(self):
+        """Accumulated runtime estimates of each MPI rank."""
+        return self._mpi_load.copy()
+
+    def reset_mpi_load(self):
+        self._mpi_load[:] = 0
+
+    def distribute(self, costs):
+        """Distribute tasks with estimated costs over MPI ranks.
+
+        Uses the longest-processing-time-first heuristic: tasks are assigned in order of decreasing cost,
+        each to the MPI rank with the lowest accumulated cost.
+
+        Parameters
+        ----------
+        costs : list[float]
+            Estimated cost of each task.
+
+        Returns
+        -------
+        ranks : list[int]
+            MPI rank of each task.
+        """
+        self.reset_mpi_load()
+        ranks = len(costs) * [None]
+        for idx in np.argsort(costs, kind="stable")[::-1]:
+            ranks[idx] = self.get_next_mpi_rank(runtime=costs[idx])
+        return ranks
@@ -9,13 +9,15 @@ from vayesta.core.util import AbstractMethodError, SymmetryError, energy_string
 class SCMF:
     name = "SCMF"
 
-    def __init__(self, emb, etol=1e-8, dtol=1e-6, maxiter=100, damping=0.0, diis=True):
+    def __init__(self, emb, etol=1e-8, dtol=1e-6, maxiter=100, damping=0.0, diis=True, warm_start=True):
         self.emb = emb
         self.etol = etol if etol is not None else np.inf
         self.dtol = dtol if dtol is not None else np.inf
         self.maxiter = maxiter
         self.damping = damping
         self.diis = diis
+        # Use cluster wave functions of previous iteration as initial guess for the cluster solvers
+        self.warm_start = warm_start
         self.iteration = 0
         # Save original kernel
         self._kernel_orig = self.emb.kernel
@@ -84,7 +86,7 @@ class SCMF:
             self.log.info("%s==============", len(self.name) * "=")
 
             if self.iteration > 1:
-                self.emb.reset()
+                self.emb.reset(keep_init_guess=self.warm_start)
 
             # Run clusters, save results
             res = self.kernel_orig(*args, **kwargs)
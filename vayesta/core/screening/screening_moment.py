@@ -112,25 +112,18 @@ def build_screened_eris(emb, fragments=None, cderi_ov=None, store_m0=True, npoin
 
 def calc_moms_RIRPA(mf, target_rots, ovs_active, log, cderi_ov, npoints):
     rpa = ssRIRPA(mf, log=log, lov=cderi_ov)
-    tr = np.concatenate(target_rots, axis=0)
-    if sum(sum(ovs_active)) > 0:
-        # Computation scales as O(N^4)
-        moms_interact, est_errors = rpa.kernel_moms(0, tr, npoints=npoints)
-        momzero_interact = moms_interact[0]
-    else:
-        momzero_interact = np.zeros_like(np.concatenate(tr, axis=0))
+    # Computation scales as O(N^4), with a single numerical integration for all fragments.
+    moms_interact, est_errors = rpa.kernel_moms_stacked(0, target_rots, npoints=npoints)
 
     # Now need to separate into local contributions
-    n = 0
     local_moments = []
-    for nov, rot in zip(ovs_active, target_rots):
+    for rot, moms in zip(target_rots, moms_interact):
         # Computation costs O(N^2 N_clus^2)
-        # Get corresponding section of overall moment, then project to just local contribution.
-        mom = dot(momzero_interact[n : n + sum(nov)], rot.T)
+        # Project moment of fragment to just local contribution.
+        mom = dot(moms[0], rot.T)
         # This isn't exactly symmetric due to numerical integration, so enforce here.
         mom = (mom + mom.T) / 2
         local_moments += [mom]
-        n += sum(nov)
 
     return local_moments
 
@@ -404,7 +404,7 @@ class UCCSD_WaveFunction(RCCSD_WaveFunction):
         mo = self.mo.pack(dtype=dtype)
         l1 = self.l1 if self.l1 is not None else [None, None]
         l2 = self.l2 if self.l2 is not None else len(self.t2) * [None]
-        projector = self.projector
+        projector = self.projector if self.projector is not None else [None, None]
         data = (mo, *self.t1, *self.t2, *l1, *l2, *projector)
         pack = pack_arrays(*data, dtype=dtype)
         return pack
@@ -413,14 +413,15 @@ class UCCSD_WaveFunction(RCCSD_WaveFunction):
     def unpack(cls, packed):
         """Unpack from a single array of data type `dtype`.
         Useful for communication via MPI."""
-        mo, t1a, t1b, t2aa, t2ab, t2ba, t2bb, l1a, l1b, l2aa, l2ab, l2ba, l2bb, proja, projb = unpack_arrays(packed)
+        mo, t1a, t1b, *data, proja, projb = unpack_arrays(packed)
+        # T2 and L2 have either 3 (aa, ab, bb) or 4 (aa, ab, ba, bb) spin components:
+        n2 = (len(data) - 2) // 2
+        t2, (l1a, l1b), l2 = tuple(data[:n2]), data[n2 : n2 + 2], tuple(data[n2 + 2 :])
         t1 = (t1a, t1b)
-        t2 = (t2aa, t2ab, t2ba, t2bb)
-        l1 = (l1a, l1b)
-        l2 = (l2aa, l2ab, l2ba, l2bb)
-        projector = (proja, projb)
+        l1 = (l1a, l1b) if l1a is not None else None
+        l2 = l2 if l2[0] is not None else None
         mo = SpinOrbitals.unpack(mo)
         wf = cls(mo, t1, t2, l1=l1, l2=l2)
-        if projector is not None:
-            wf.projector = projector
+        if proja is not None:
+            wf.projector = (proja, projb)
         return wf
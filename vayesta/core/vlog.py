@@ -3,6 +3,7 @@
 import functools
 import contextlib
 import logging
+import threading
 
 from vayesta.mpi import mpi
 
@@ -39,6 +40,57 @@ LVL_PREFIX = {
 }
 
 
+# State of worker threads with buffered log output (see `buffered_logging`):
+_thread_state = threading.local()
+_emit_lock = threading.Lock()
+_call_handlers = logging.Logger.callHandlers
+
+
+def get_indent_level():
+    """Indentation level of the current thread."""
+    level = getattr(_thread_state, "indent", None)
+    if level is None:
+        return logging.getLogger().indentLevel
+    return level
+
+
+def set_indent_level(level):
+    """Set indentation level of the current thread."""
+    level = max(level, 0)
+    if getattr(_thread_state, "indent", None) is None:
+        logging.getLogger().indentLevel = level
+    else:
+        _thread_state.indent = level
+    return level
+
+
+@contextlib.contextmanager
+def buffered_logging(indent=None):
+    """Buffer log records of the current thread and emit them together on exit.
+
+    This is used in worker threads, such that the log output of different threads is not interleaved.
+    Within the context, the thread has its own indentation level, starting at `indent`.
+
+    Parameters
+    ----------
+    indent : int, optional
+        Initial indentation level. Default: indentation level of the calling thread.
+    """
+    if indent is None:
+        indent = get_indent_level()
+    _thread_state.indent = indent
+    _thread_state.records = []
+    try:
+        yield
+    finally:
+        records = _thread_state.records
+        _thread_state.records = None
+        _thread_state.indent = None
+        with _emit_lock:
+            for logger, record in records:
+                _call_handlers(logger, record)
+
+
 class NoLogger:
     def __getattr__(self, key):
         """Return function which does nothing."""
@@ -124,8 +176,10 @@ class VFormatter(logging.Formatter):
             prefix += "[MPI %d]" % mpi.rank
         prefix = "%-*s%s" % (self.prefix_width, prefix, self.prefix_sep)
         if self.indent:
-            root = logging.getLogger()
-            indent = root.indentLevel * self.indent_width * self.indent_char
+            level = getattr(record, "indentLevel", None)
+            if level is None:
+                level = get_indent_level()
+            indent = level * self.indent_width * self.indent_char
         lines = [indent + x for x in message.split("\n")]
         if prefix:
             lines = [((prefix + "  " + line) if line else prefix) for line in lines]
@@ -201,35 +255,41 @@ def init_logging():
 
     # Add indentation support
     # -----------------------
-    # Note that indents are only tracked by the root logger
+    # Note that indents are only tracked by the root logger (and by threads in `buffered_logging`)
     root = logging.getLogger()
     root.indentLevel = 0
 
+    # Worker threads in `buffered_logging` have their own indentation level
     def setIndentLevel(self, level):
-        root = logging.getLogger()
-        root.indentLevel = max(level, 0)
-        return root.indentLevel
+        return set_indent_level(level)
 
     def changeIndentLevel(self, delta):
-        root = logging.getLogger()
-        root.indentLevel = max(root.indentLevel + delta, 0)
-        return root.indentLevel
+        return set_indent_level(get_indent_level() + delta)
 
     class indent(contextlib.ContextDecorator):
         def __init__(self, delta=1):
             self.delta = delta
             self.level_init = None
-            self.root = logging.getLogger()
 
         def __enter__(self):
-            self.level_init = self.root.indentLevel
-            self.root.indentLevel = max(self.level_init + self.delta, 0)
+            self.level_init = get_indent_level()
+            set_indent_level(self.level_init + self.delta)
 
         def __exit__(self, *args):
-            self.root.indentLevel = self.level_init
+            set_indent_level(self.level_init)
+
+    # Buffering of log records of worker threads
+    # ------------------------------------------
+    def callHandlers(self, record):
+        records = getattr(_thread_state, "records", None)
+        if records is None:
+            return _call_handlers(self, record)
+        record.indentLevel = get_indent_level()
+        records.append((self, record))
 
     logging.Logger.setIndentLevel = setIndentLevel
     logging.Logger.changeIndentLevel = changeIndentLevel
     logging.Logger.indent = indent
+    logging.Logger.callHandlers = callHandlers
     # Deprecated:
     logging.Logger.withIndentLevel = indent
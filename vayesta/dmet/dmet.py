@@ -7,6 +7,7 @@ import scipy
 from vayesta.core.qemb import Embedding
 from vayesta.core.util import break_into_lines, time_string
 from vayesta.dmet.fragment import DMETFragment, DMETFragmentExit
+from vayesta.misc.cptbisect import ChempotNewton
 
 from vayesta.dmet.sdp_sc import perform_SDP_fit
 from vayesta.dmet.updates import MixUpdate, DIISUpdate
@@ -22,11 +23,13 @@ class Options(Embedding.Options):
     maxiter: int = 30
     charge_consistent: bool = True
     max_elec_err: float = 1e-4
+    cpt_method: str = "brentq"  # Chemical potential optimization: 'brentq' (bracketing) or 'newton' (Newton-secant)
     conv_tol: float = 1e-6
     diis: bool = True
     mixing_param: float = 0.5
     mixing_variable: str = "hl rdm"
     oneshot: bool = False
+    warm_start: bool = False  # Use wave functions of previous iteration or chemical potential as solver initial guess
     # --- Solver options
     solver_options: dict = Embedding.Options.change_dict_defaults(
         "solver_options",
@@ -110,6 +113,8 @@ class DMET(Embedding):
 
         if not self.opts.mixing_variable == "hl rdm":
             raise ValueError("Only DIIS extrapolation of the high-level rdms is current implemented.")
+        if self.opts.cpt_method not in ("brentq", "newton"):
+            raise ValueError("Invalid chemical potential optimization method: %r" % self.opts.cpt_method)
 
         if self.opts.diis:
             self.updater = DIISUpdate()
@@ -121,7 +126,7 @@ class DMET(Embedding):
             self.log.info("Now running iteration %2d", iteration)
             self.log.info("------------------------")
             if iteration > 1:
-                self.reset()
+                self.reset(keep_init_guess=self.opts.warm_start)
                 # For first iteration want to run on provided mean-field state.
                 mo_energy, mo_coeff = self.mf.eig(fock + self.vcorr, self.get_ovlp())
                 self.update_mf(mo_coeff, mo_energy)
@@ -138,13 +143,43 @@ class DMET(Embedding):
                 f.make_cluster()
             self.build_screened_eris()
 
-            def electron_err(cpt, construct_bath=False):
-                err = self.calc_electron_number_defect(cpt, nelec_mf, sym_parents, nsym, construct_bath)
+            # Electron number errors and fragment results of all chemical potentials calculated in this iteration
+            cpt_cache = {}
+
+            def electron_err(cpt):
+                if cpt in cpt_cache:
+                    self.log.info("Restoring results of chemical potential={:8.6e}".format(cpt))
+                    err, results, self.hl_rdms = cpt_cache[cpt]
+                    for frag in sym_parents:
+                        frag.results = self.cluster_results[frag.id] = results[frag.id]
+                    return err
+                # Bath and cluster have been constructed above and are reused for all chemical potentials
+                err = self.calc_electron_number_defect(cpt, nelec_mf, sym_parents, nsym, construct_bath=False)
+                cpt_cache[cpt] = (err, {frag.id: frag.results for frag in sym_parents}, self.hl_rdms)
                 return err
 
-            err = electron_err(cpt, construct_bath=not self.opts.screening)
-
-            if abs(err) > self.opts.max_elec_err * nelec_mf:
+            err = electron_err(cpt)
+
+            if abs(err) > self.opts.max_elec_err * nelec_mf and self.opts.cpt_method == "newton":
+                # Initial derivative from mean-field response of clusters:
+                dndcpt = sum(frag.get_nelectron_response() * nsym[x] for x, frag in enumerate(sym_parents))
+                newton = ChempotNewton(
+                    electron_err,
+                    cpt_init=cpt,
+                    dfdx=dndcpt,
+                    tol=self.opts.max_elec_err * nelec_mf,
+                    max_step=0.5,
+                    errors=((np.linalg.LinAlgError,) if self.solver == "CCSD" else ()),
+                    log=self.log,
+                )
+                cpt = newton.kernel()
+                if not newton.converged:
+                    self.log.fatal("Could not find chemical potential.")
+                    break
+                self.log.info("Converged chemical potential in %d evaluations: %6.4e", newton.iterations, cpt)
+                # Restore results of converged chemical potential:
+                electron_err(cpt)
+            elif abs(err) > self.opts.max_elec_err * nelec_mf:
                 # Need to find chemical potential bracket.
                 # Error is positive if excess electrons at high-level, and negative if too few electrons at high-level.
                 # Changing chemical potential should introduces similar change in high-level electron number, so we want
@@ -184,8 +219,8 @@ class DMET(Embedding):
                     electron_err, a=lo, b=hi, full_output=True, xtol=self.opts.max_elec_err * nelec_mf
                 )  # self.opts.max_elec_err * nelec_mf)
                 self.log.info("Converged chemical potential: {:6.4e}".format(cpt))
-                # Recalculate to ensure all fragments have up-to-date info. Brentq strangely seems to do an extra
-                # calculation at the end...
+                # Ensure all fragments have up-to-date info; brentq does not necessarily return the chemical potential
+                # which was calculated last.
                 electron_err(cpt)
             else:
                 self.log.info("Previous chemical potential still suitable")
@@ -231,8 +266,12 @@ class DMET(Embedding):
             self.log.info(msg)
             self.log.info(len(msg) * "-")
             self.log.changeIndentLevel(1)
+            kwargs = {}
+            # Warm start from solution of previous chemical potential:
+            if self.opts.warm_start and frag._results is not None:
+                kwargs["init_guess"] = frag.results.wf
             try:
-                result = frag.kernel(construct_bath=construct_bath, chempot=chempot)
+                result = frag.kernel(construct_bath=construct_bath, chempot=chempot, **kwargs)
             except DMETFragmentExit as e:
                 exit = True
                 self.log.info("Exiting %s", frag)
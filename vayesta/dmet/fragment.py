@@ -8,6 +8,7 @@ from vayesta.core.bath import BNO_Threshold
 
 from vayesta.core import ao2mo
 from vayesta.core.util import dot, log_time
+from vayesta.misc.cptbisect import get_mf_electron_response
 
 
 # We might want to move the useful things from here into core, since they seem pretty general.
@@ -47,6 +48,8 @@ class DMETFragment(Fragment):
         ----------
         solver : {'MP2', 'CISD', 'CCSD', 'CCSD(T)', 'FCI'}, optional
             Correlated solver.
+        init_guess : WaveFunction or dict, optional
+            Initial guess for the cluster solver, see `Fragment.get_init_guess`. Default: None.
 
         Returns
         -------
@@ -55,9 +58,11 @@ class DMETFragment(Fragment):
         solver = solver or self.base.solver
         if self._dmet_bath is None or construct_bath:
             self.make_bath()
-
-        cluster = self.make_cluster()
-        # If we want to reuse previous info for initial guess and eris we'd do that here...
+            self.make_cluster()
+        # Reuse cluster (and the Hamiltonian with cached integrals) of previous calculation with the same bath:
+        elif self._cluster is None:
+            self.make_cluster()
+        cluster = self.cluster
         # We can now overwrite the orbitals from last BNO run:
         self._c_active_occ = cluster.c_active_occ
         self._c_active_vir = cluster.c_active_vir
@@ -66,6 +71,7 @@ class DMETFragment(Fragment):
             return None
 
         cluster_solver = self.get_solver(solver)
+        init_guess = self.get_init_guess(init_guess, cluster_solver, cluster)
 
         # Chemical potential
         if chempot is not None:
@@ -76,7 +82,7 @@ class DMETFragment(Fragment):
                 cluster_solver.v_ext = -chempot * px
 
         with log_time(self.log.info, ("Time for %s solver:" % solver) + " %s"):
-            cluster_solver.kernel()
+            cluster_solver.kernel(**init_guess)
         self.hamil = cluster_solver.hamil
         self._results = results = self.Results(
             fid=self.id,
@@ -131,3 +137,8 @@ class DMETFragment(Fragment):
 
     def get_nelectron_hl(self):
         return self.get_frag_hl_dm().trace()
+
+    def get_nelectron_response(self):
+        """Mean-field response of the fragment electron number to the chemical potential of the last calculation."""
+        px = self.get_fragment_projector(self.cluster.c_active)
+        return get_mf_electron_response(self.hamil.get_fock(), self.cluster.nocc_active, px)
@@ -234,28 +234,17 @@ class EDMET(RDMET):
             self.log.info("RPA total energy=%6.4e", self.e_rpa)
             # Get fermionic bath set up, and calculate the cluster excitation space.
             rot_ovs = [f.set_up_fermionic_bath() for f in sym_parents]
-            target_rot = np.concatenate(rot_ovs, axis=0)
-            if target_rot.shape[0] > 0:
-                moms_interact, est_errors = rpa.kernel_moms(0, target_rot, npoints=48)
-            else:
-                moms_interact = np.zeros_like(target_rot)
-            # Get appropriate slices to obtain required active spaces.
-            ovs_active = [f.ov_active_tot for f in sym_parents]
-            ovs_active_slices = [slice(sum(ovs_active[:i]), sum(ovs_active[: i + 1])) for i in range(len(sym_parents))]
+            # Moments of all fragments are calculated in a single numerical integration.
+            moms_interact, est_errors = rpa.kernel_moms_stacked(0, rot_ovs, npoints=48)
             # Use interaction component of moment to generate bosonic degrees of freedom.
-            rot_bos = [f.define_bosons(moms_interact[0, sl, :]) for (f, sl) in zip(sym_parents, ovs_active_slices)]
-            nbos = [x.shape[0] for x in rot_bos]
-            bos_slices = [slice(sum(nbos[:i]), sum(nbos[: i + 1])) for i in range(len(sym_parents))]
-            if sum(nbos) > 0:
-                # Calculate zeroth moment of bosonic degrees of freedom.
-                mom0_bos, est_errors = rpa.kernel_moms(0, np.concatenate(rot_bos, axis=0), npoints=48)
-            else:
-                mom0_bos = np.zeros((sum(nbos), moms_interact.shape[2]))
+            rot_bos = [f.define_bosons(moms[0]) for (f, moms) in zip(sym_parents, moms_interact)]
+            # Calculate zeroth moment of bosonic degrees of freedom.
+            mom0_bos, est_errors = rpa.kernel_moms_stacked(0, rot_bos, npoints=48)
             eps = np.concatenate(self.eps)
             # Can then invert relation to generate coupled electron-boson Hamiltonian.
             e_nonlocal = self.e_rpa
-            for f, nc, sl in zip(sym_parents, nsym, bos_slices):
-                e_nonlocal -= f.construct_boson_hamil(mom0_bos[0, sl, :], eps, self.xc_kernel) * nc
+            for f, nc, moms in zip(sym_parents, nsym, mom0_bos):
+                e_nonlocal -= f.construct_boson_hamil(moms[0], eps, self.xc_kernel) * nc
         else:
             rpa = ssRPA(self.mf, self.log)
             # We need to explicitly solve RPA equations before anything.
@@ -1,9 +1,88 @@
 import numpy as np
 
-from vayesta.core.util import NotCalculatedError, dot, einsum
+from vayesta.core.util import NotCalculatedError, brange, dot, einsum
 from vayesta.mpi import mpi
 
 
+class BlockedAmplitudes:
+    """Global T2 or L2 amplitudes, stored in blocks of the first occupied index, distributed over MPI ranks.
+
+    Block `ib` is stored at MPI rank `ib % mpi.size`, such that the memory required per MPI rank decreases
+    with the number of MPI ranks. Blocks stored at other MPI ranks can be accessed via remote memory access (RMA),
+    after `enable_remote_access` has been called on all MPI ranks.
+
+    Parameters
+    ----------
+    nocc: int
+        Number of occupied orbitals.
+    nvir: int
+        Number of virtual orbitals.
+    blksize: int
+        Size of the blocks of the first occupied index.
+    """
+
+    def __init__(self, nocc, nvir, blksize):
+        self.nocc = nocc
+        self.nvir = nvir
+        self.blocks = list(brange(0, nocc, blksize))
+        self.local_data = {}
+        self._rma = None
+
+    @property
+    def nblocks(self):
+        return len(self.blocks)
+
+    def get_location(self, ib):
+        """MPI rank at which block `ib` is stored."""
+        return ib % mpi.size
+
+    def get_block(self, ib):
+        """Get block `ib`, from remote memory if required."""
+        if self.get_location(ib) == mpi.rank:
+            return self.local_data[ib]
+        if self._rma is None:
+            raise RuntimeError("Access to remote blocks requires enable_remote_access().")
+        return self._rma[ib]
+
+    def loop_local_blocks(self):
+        """Loop over slices and amplitudes of blocks stored at this MPI rank."""
+        for ib, blk in enumerate(self.blocks):
+            if self.get_location(ib) == mpi.rank:
+                yield blk, self.local_data[ib]
+
+    def loop_blocks(self):
+        """Loop over slices and amplitudes of all blocks, fetching remote blocks as required."""
+        for ib, blk in enumerate(self.blocks):
+            yield blk, self.get_block(ib)
+
+    def enable_remote_access(self):
+        """Make all blocks available via remote memory access. Needs to be called on all MPI ranks."""
+        if mpi and self._rma is None:
+            self._rma = mpi.create_rma_dict(self.local_data)
+
+    def disable_remote_access(self):
+        """Free RMA windows. Needs to be called on all MPI ranks."""
+        if self._rma is not None:
+            self._rma.clear()
+            self._rma = None
+
+    def to_array(self, mpi_target=None):
+        """Gather the full (n(occ), n(occ), n(vir), n(vir)) array.
+
+        Parameters
+        ----------
+        mpi_target: int or None, optional
+            If set to an integer, the result will only be available at the specified MPI rank.
+            If set to None, the result will be available at all MPI ranks. Default: None.
+        """
+        t2 = np.zeros((self.nocc, self.nocc, self.nvir, self.nvir))
+        for blk, t2blk in self.loop_local_blocks():
+            t2[blk] = t2blk
+        if mpi:
+            t2 = mpi.nreduce(t2, target=mpi_target)
+        return t2
+
+
 def get_global_t1_rhf(emb, get_lambda=False, mpi_target=None, ao_basis=False, for_dm2=False):
     """Get global CCSD T1 amplitudes from fragment calculations.
 
@@ -92,6 +171,62 @@ def get_global_t2_rhf(emb, get_lambda=False, symmetrize=True, mpi_target=None, a
     return t2
 
 
+def get_global_t2_blocks_rhf(emb, get_lambda=False, for_dm2=False, blksize=None, max_memory=int(1e9)):
+    """Get global CCSD T2 amplitudes from fragment calculations, distributed over MPI ranks.
+
+    In contrast to `get_global_t2_rhf`, the full N^4 array is never allocated: the amplitudes are constructed
+    block-wise in the first occupied index and each block is only stored at a single MPI rank.
+
+    Runtime: N(frag)/N(MPI) * N^4
+
+    Parameters
+    ----------
+    get_lambda: bool, optional
+        If True, return L2 amplitudes. Default: False.
+    blksize: int, optional
+        Size of the blocks of the first occupied index. Default: distribute occupied orbitals evenly over
+        MPI ranks, with at most `max_memory` bytes per block.
+    max_memory: int, optional
+        Memory per block in bytes, if `blksize` is not set. Default: 1 GB.
+
+    Returns
+    -------
+    t2: BlockedAmplitudes
+        Global T2 amplitudes.
+    """
+    nocc, nvir = emb.nocc, emb.nvir
+    if blksize is None:
+        blksize = min(-(-nocc // mpi.size), max(int(max_memory / max(8 * nocc * nvir**2, 1)), 1))
+    t2 = BlockedAmplitudes(nocc, nvir, blksize)
+    # Fragment amplitudes and overlap matrices, which are reused for each block:
+    fragments = []
+    for x in emb.get_fragments(contributes=True, mpi_rank=mpi.rank):
+        ro = x.get_overlap("mo[occ]|cluster[occ]")
+        rv = x.get_overlap("mo[vir]|cluster[vir]")
+        pwf = x.results.pwf.restore().as_ccsd()
+        if for_dm2 and x.solver == "MP2":
+            # Lambda=0 for DM2(MP2)
+            if get_lambda:
+                continue
+            t2x = 2 * pwf.t2
+        else:
+            t2x = pwf.l2 if (get_lambda and not x.opts.t_as_lambda) else pwf.t2
+        if t2x is None:
+            raise NotCalculatedError("Fragment %s" % x)
+        fragments.append((t2x, ro, rv))
+    for ib, blk in enumerate(t2.blocks):
+        t2blk = np.zeros((blk.stop - blk.start, nocc, nvir, nvir))
+        for t2x, ro, rv in fragments:
+            t2blk += einsum("ijab,Ii,Jj,Aa,Bb->IJAB", t2x, ro[blk], ro, rv, rv)
+        # --- MPI
+        location = t2.get_location(ib)
+        if mpi:
+            t2blk = mpi.nreduce(t2blk, target=location, logfunc=emb.log.timingv)
+        if location == mpi.rank:
+            t2.local_data[ib] = t2blk
+    return t2
+
+
 def get_global_t1_uhf(emb, get_lambda=False, mpi_target=None, ao_basis=False):
     """Get global CCSD T1 from fragment calculations.
 
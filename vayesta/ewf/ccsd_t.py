@@ -0,0 +1,119 @@
+"""Fragment projected perturbative triples (T) correction."""
+
+import ctypes
+import logging
+
+import numpy as np
+
+from vayesta.core.util import brange, call_once, einsum
+from vayesta.libs import libembwf
+
+log = logging.getLogger(__name__)
+
+
+def kernel(t1, t2, t2x, fock, eris_ovvv, eris_ovoo, eris_ovov, driver=None, max_memory=int(1e9)):
+    """Fragment projected (T) energy.
+
+    The fragment projected amplitudes `t2x` are used for one of the two W intermediates
+    of the (T) energy expression. If `t2x` is equal to `t2`, the canonical CCSD(T)
+    energy correction is obtained.
+
+    Parameters
+    ----------
+    t1 : (n(occ), n(vir)) array
+        CCSD T1 amplitudes.
+    t2 : (n(occ), n(occ), n(vir), n(vir)) array
+        CCSD T2 amplitudes.
+    t2x : (n(occ), n(occ), n(vir), n(vir)) array
+        Fragment projected and symmetrized CCSD T2 amplitudes.
+    fock : (n(occ)+n(vir), n(occ)+n(vir)) array
+        Fock matrix in the (semi-)canonical MO basis.
+    eris_ovvv, eris_ovoo, eris_ovov : arrays
+        Electron-repulsion integrals (ov|vv), (ov|oo), and (ov|ov).
+    driver : {'c', 'python'}, optional
+        Use the OpenMP parallelized C library or the NumPy implementation.
+        Default: 'c', if the library 'vayesta/libs/libembwf.so' is available, else 'python'.
+    max_memory : int, optional
+        Memory for intermediates of the NumPy implementation in bytes. Default: 1 GB.
+
+    Returns
+    -------
+    e_t : float
+        (T) energy.
+    """
+    nocc, nvir = t1.shape
+    mo_energy = np.ascontiguousarray(fock.diagonal())
+    fvo = np.ascontiguousarray(fock[nocc:, :nocc])
+    t1T = np.ascontiguousarray(t1.T)
+    t2T = np.ascontiguousarray(t2.transpose(2, 3, 0, 1))
+    t2xT = np.ascontiguousarray(t2x.transpose(2, 3, 0, 1))
+    gvvov = np.ascontiguousarray(eris_ovvv.transpose(1, 3, 0, 2))
+    gvooo = np.ascontiguousarray(eris_ovoo.transpose(1, 0, 3, 2))
+    gvvoo = np.ascontiguousarray(eris_ovov.transpose(1, 3, 0, 2))
+
+    if driver is None:
+        if libembwf is None:
+            driver = "python"
+            call_once(log.warning, "Libary 'vayesta/libs/libembwf.so' not found, using fallback Python driver.")
+        else:
+            driver = "c"
+    log.debugv("Driver for (T) kernel= %s", driver)
+    if driver == "c":
+        e_t = np.zeros(1)
+        libembwf.ccsd_t_simple_emb(
+            # In
+            ctypes.c_int(nocc),
+            ctypes.c_int(nvir),
+            mo_energy.ctypes.data_as(ctypes.c_void_p),
+            t1T.ctypes.data_as(ctypes.c_void_p),
+            t2T.ctypes.data_as(ctypes.c_void_p),
+            t2xT.ctypes.data_as(ctypes.c_void_p),
+            fvo.ctypes.data_as(ctypes.c_void_p),
+            gvvov.ctypes.data_as(ctypes.c_void_p),
+            gvooo.ctypes.data_as(ctypes.c_void_p),
+            gvvoo.ctypes.data_as(ctypes.c_void_p),
+            # Out
+            e_t.ctypes.data_as(ctypes.c_void_p),
+        )
+        return e_t[0]
+    if driver == "python":
+        return _kernel_python(mo_energy, t1T, t2T, t2xT, fvo, gvvov, gvooo, gvvoo, max_memory=max_memory)
+    raise ValueError("Invalid driver: %r" % driver)
+
+
+def _get_w(gvvov, gvooo, t2T, a, b, c):
+    """W intermediate W(a,b,c,i,j,k) for slices a, b, and c."""
+    w = einsum("abid,cdkj->abcijk", gvvov[a][:, b], t2T[c])
+    w -= einsum("aijl,bclk->abcijk", gvooo[a], t2T[b][:, c])
+    return w
+
+
+def _kernel_python(mo_energy, t1T, t2T, t2xT, fvo, gvvov, gvooo, gvvoo, max_memory=int(1e9)):
+    """NumPy implementation of `ccsd_t_simple_emb`, vectorized over blocks of the first virtual index."""
+    nvir, nocc = t1T.shape
+    e_occ, e_vir = mo_energy[:nocc], mo_energy[nocc:]
+    e_ooo = e_occ[:, None, None] + e_occ[None, :, None] + e_occ[None, None, :]
+    e_vv = e_vir[:, None] + e_vir[None, :]
+    # Up to eight (n(blk), n(vir), n(vir), n(occ), n(occ), n(occ)) arrays are held in memory:
+    blksize = max(int(max_memory / max(8 * 8 * nvir**2 * nocc**3, 1)), 1)
+    full = np.s_[:]
+    e_t = 0.0
+    for blk in brange(0, nvir, blksize):
+        # Fully permuted W from projected T2 amplitudes:
+        w = _get_w(gvvov, gvooo, t2xT, blk, full, full)
+        wx = w + einsum("acbikj->abcijk", w)
+        w = _get_w(gvvov, gvooo, t2xT, full, blk, full)
+        wx += einsum("bacjik->abcijk", w) + einsum("cabkij->abcijk", w)
+        w = _get_w(gvvov, gvooo, t2xT, full, full, blk)
+        wx += einsum("bcajki->abcijk", w) + einsum("cbakji->abcijk", w)
+        # W + V/2 from unprojected T2 amplitudes:
+        w = _get_w(gvvov, gvooo, t2T, blk, full, full)
+        w += einsum("abij,ck->abcijk", gvvoo[blk], t1T) / 2
+        w += einsum("abij,ck->abcijk", t2T[blk], fvo) / 2
+        z = 4 * w
+        z += einsum("abcjki->abcijk", w) + einsum("abckij->abcijk", w)
+        z -= 2 * (einsum("abckji->abcijk", w) + einsum("abcikj->abcijk", w) + einsum("abcjik->abcijk", w))
+        e_abc = e_vir[blk, None, None] + e_vv[None]
+        z /= e_ooo[None, None, None] - e_abc[..., None, None, None]
+        e_t += 2 * einsum("abcijk,abcijk->", wx, z)
+    return e_t
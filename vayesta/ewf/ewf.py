@@ -1,5 +1,7 @@
 # --- Standard
 import dataclasses
+import glob
+import os.path
 
 # --- External
 import numpy as np
@@ -17,12 +19,14 @@ from vayesta.core.util import (
     timer,
 )
 from vayesta.core.qemb import Embedding
+from vayesta.core.qemb.register import estimate_solver_cost
 from vayesta.core.fragmentation import SAO_Fragmentation
 from vayesta.core.fragmentation import IAOPAO_Fragmentation
 from vayesta.mpi import mpi
 from vayesta.ewf.fragment import Fragment
 from vayesta.ewf.amplitudes import get_global_t1_rhf
 from vayesta.ewf.amplitudes import get_global_t2_rhf
+from vayesta.ewf.amplitudes import get_global_t2_blocks_rhf
 from vayesta.ewf.rdm import make_rdm1_ccsd
 from vayesta.ewf.rdm import make_rdm1_ccsd_global_wf
 from vayesta.ewf.rdm import make_rdm2_ccsd_global_wf
@@ -47,6 +51,7 @@ class Options(Embedding.Options):
     # Calculation modes
     calc_e_wf_corr: bool = True
     calc_e_dm_corr: bool = False
+    dm2_energy_blocked: bool = False  # Contract fragment 2-DM cumulants with DF integrals in blocks (CCSD only)
     # --- Solver settings
     t_as_lambda: bool = None  # If True, use T-amplitudes inplace of Lambda-amplitudes
     store_wf_type: str = None  # If set, fragment WFs will be converted to the respective type, before storing them
@@ -54,9 +59,12 @@ class Options(Embedding.Options):
     bsse_correction: bool = True
     bsse_rmax: float = 5.0  # In Angstrom
     nelectron_target: int = None
+    nelectron_target_method: str = "brentq"  # Chemical potential optimization for nelectron_target: brentq or newton
     # --- Couple embedding problems (currently only CCSD)
     sc_mode: int = 0
     coupled_iterations: bool = False
+    # --- Checkpoint file (HDF5) of fragment results; fragments with a valid checkpoint are not solved again
+    checkpoint: str = None
     # --- Debugging
     _debug_wf: str = None
 
@@ -88,6 +96,16 @@ class EWF(Embedding):
         self.iteration = 0
         self._make_rdm1_ccsd_global_wf_cached.cache_clear()
 
+    def _get_cluster_solver(self, solver):
+        """Restricted 'CCSD(T)' uses the CCSD solver of pyscf; the (T) correction is added by the fragments."""
+        is_eb = bool(self.opts.screening) and "crpa_full" in self.opts.screening
+        if solver == "CCSD(T)" and self.is_rhf and not is_eb:
+            return "CCSD"
+        return solver
+
+    def check_solver(self, solver):
+        super().check_solver(self._get_cluster_solver(solver))
+
     # Default fragmentation
     def fragmentation(self, *args, **kwargs):
         return self.iao_fragmentation(*args, **kwargs)
@@ -123,25 +141,13 @@ class EWF(Embedding):
         fragments = self.get_fragments(active=True, sym_parent=None, mpi_rank=mpi.rank)
         fragdict = {f.id: f for f in fragments}
         with log_time(self.log.timing, "Total time for bath and clusters: %s"):
+            # Fragments which copy the bath of another fragment are processed last
+            self.map_fragments(
+                self._make_bath_and_cluster, [x for x in fragments if x.flags.bath_parent_fragment_id is None]
+            )
             for x in fragments:
-                if x._results is not None:
-                    self.log.debug("Resetting %s" % x)
-                    x.reset()
-                msg = "Making bath and clusters for %s%s" % (x, (" on MPI process %d" % mpi.rank) if mpi else "")
-                self.log.info(msg)
-                self.log.info(len(msg) * "-")
-                with self.log.indent():
-                    if x._dmet_bath is None:
-                        # Make own bath:
-                        if x.flags.bath_parent_fragment_id is None:
-                            x.make_bath()
-                        # Copy bath (DMET, occupied, virtual) from other fragment:
-                        else:
-                            bath_parent = fragdict[x.flags.bath_parent_fragment_id]
-                            for attr in ("_dmet_bath", "_bath_factory_occ", "_bath_factory_vir"):
-                                setattr(x, attr, getattr(bath_parent, attr))
-                    if x._cluster is None:
-                        x.make_cluster()
+                if x.flags.bath_parent_fragment_id is not None:
+                    self._make_bath_and_cluster(x, bath_parent=fragdict[x.flags.bath_parent_fragment_id])
             if mpi:
                 mpi.world.Barrier()
 
@@ -149,6 +155,22 @@ class EWF(Embedding):
             with log_time(self.log.timing, "Time for MPI communication of clusters: %s"):
                 self.communicate_clusters()
 
+        # --- Symmetry parent fragments; auxiliary fragments are solved first
+        parents = self.get_fragments(active=True, sym_parent=None)
+        # --- Restore fragments from checkpoint files
+        if self.opts.checkpoint is not None:
+            restored = self.load_checkpoints(parents)
+            parents = [x for x in parents if x.id not in restored]
+        stages = [[x for x in parents if x.opts.auxiliary], [x for x in parents if not x.opts.auxiliary]]
+        stages = [frags for frags in stages if frags]
+        dynamic = bool(self.opts.mpi_dynamic_dispatch and mpi)
+        if dynamic:
+            self._check_dynamic_dispatch(parents)
+
+        # --- Reassign MPI ranks based on cost estimates of cluster solvers
+        if self.opts.mpi_load_balance and not dynamic:
+            load_pred = [self.balance_mpi_load(frags) for frags in stages]
+
         # --- Screened Coulomb interaction; either static or dynamic
         self.build_screened_interactions()
 
@@ -157,18 +179,20 @@ class EWF(Embedding):
         self.log.info("RUNNING SOLVERS")
         self.log.info("===============")
         with log_time(self.log.timing, "Total time for solvers: %s"):
-            # Split fragments in auxiliary and regular, solve auxiliary fragments first
-            fragments_aux = [x for x in fragments if x.opts.auxiliary]
-            fragments_reg = [x for x in fragments if not x.opts.auxiliary]
-            for frags in [fragments_aux, fragments_reg]:
-                for x in frags:
-                    msg = "Solving %s%s" % (x, (" on MPI process %d" % mpi.rank) if mpi else "")
-                    self.log.info(msg)
-                    self.log.info(len(msg) * "-")
-                    with self.log.indent():
-                        x.kernel()
-                if mpi:
-                    mpi.world.Barrier()
+            for stage, frags in enumerate(stages):
+                t_stage = timer()
+                if dynamic:
+                    t_stage = self._solve_fragments_dynamic(frags)
+                else:
+                    self.map_fragments(self._solve_fragment, [x for x in frags if x.mpi_rank == mpi.rank])
+                    t_stage = timer() - t_stage
+                    if mpi:
+                        mpi.world.Barrier()
+                if self.opts.mpi_load_balance and mpi and not dynamic:
+                    self.log_mpi_load(load_pred[stage], "Predicted cost")
+                if (self.opts.mpi_load_balance or dynamic) and mpi:
+                    self.log_mpi_load(mpi.world.allgather(t_stage), "Solver time")
+        fragments = self.get_fragments(active=True, sym_parent=None, mpi_rank=mpi.rank)
 
         if self.solver.lower() == "dump":
             self.log.output("Clusters dumped to file '%s'", self.opts.solver_options["dumpfile"])
@@ -188,6 +212,125 @@ class EWF(Embedding):
         self.log.info("Total wall time:  %s", time_string(timer() - t_start))
         return self.e_tot
 
+    def _make_bath_and_cluster(self, x, bath_parent=None):
+        if x._results is not None:
+            self.log.debug("Resetting %s" % x)
+            x.reset()
+        msg = "Making bath and clusters for %s%s" % (x, (" on MPI process %d" % mpi.rank) if mpi else "")
+        self.log.info(msg)
+        self.log.info(len(msg) * "-")
+        with self.log.indent():
+            if x._dmet_bath is None:
+                # Make own bath:
+                if bath_parent is None:
+                    x.make_bath()
+                # Copy bath (DMET, occupied, virtual) from other fragment:
+                else:
+                    for attr in ("_dmet_bath", "_bath_factory_occ", "_bath_factory_vir"):
+                        setattr(x, attr, getattr(bath_parent, attr))
+            if x._cluster is None:
+                x.make_cluster()
+
+    def _solve_fragment(self, x):
+        msg = "Solving %s%s" % (x, (" on MPI process %d" % mpi.rank) if mpi else "")
+        self.log.info(msg)
+        self.log.info(len(msg) * "-")
+        with self.log.indent():
+            x.kernel()
+            if self.opts.checkpoint is not None and x._results is not None:
+                with self._checkpoint_lock:
+                    x.save_checkpoint(self._get_checkpoint_file())
+
+    def _get_checkpoint_file(self, rank=None):
+        """Checkpoint file of MPI rank. Ranks other than 0 append their rank to the filename."""
+        rank = mpi.rank if rank is None else rank
+        if rank == 0:
+            return self.opts.checkpoint
+        return "%s.%d" % (self.opts.checkpoint, rank)
+
+    def load_checkpoints(self, fragments=None):
+        """Restore results of fragments from the checkpoint files of all MPI ranks of a previous calculation.
+
+        Each fragment is restored on its own MPI rank; a checkpoint is only used if it matches the
+        fragment, solver and cluster of the current calculation (see `Fragment.load_checkpoint`).
+
+        Parameters
+        ----------
+        fragments : list, optional
+            Symmetry parent fragments to restore. Default: all active symmetry parent fragments.
+
+        Returns
+        -------
+        restored : set
+            IDs of the fragments restored on any MPI rank.
+        """
+        if fragments is None:
+            fragments = self.get_fragments(active=True, sym_parent=None)
+        # Checkpoint files may have been written by a calculation with a different number of MPI ranks:
+        pattern = glob.escape(self.opts.checkpoint) + ".*"
+        files = [self.opts.checkpoint] + sorted(
+            f for f in glob.glob(pattern) if f[len(self.opts.checkpoint) + 1 :].isdigit()
+        )
+        files = [f for f in files if os.path.isfile(f)]
+        restored = set()
+        for x in fragments:
+            if x.mpi_rank != mpi.rank:
+                continue
+            for filename in files:
+                if x.load_checkpoint(filename):
+                    restored.add(x.id)
+                    break
+        if mpi:
+            restored = set().union(*mpi.world.allgather(restored))
+        self.log.info("Restored %d of %d fragments from checkpoint files.", len(restored), len(fragments))
+        return restored
+
+    def _check_dynamic_dispatch(self, fragments):
+        for x in fragments:
+            if x.solver in ("TCCSD", "coupledCCSD", "Dump"):
+                raise NotImplementedError("Dynamic MPI dispatch is not supported for solver %s." % x.solver)
+            if x.opts.screening is not None or x.opts.bosonic_bath_options["bathtype"] is not None:
+                raise NotImplementedError("Dynamic MPI dispatch is not supported with screened interactions.")
+
+    def _solve_fragments_dynamic(self, fragments):
+        """Solve fragments on the next idle MPI rank.
+
+        The fragments are dispatched in order of decreasing estimated cost, using a shared RMA counter.
+        Since any MPI rank may solve a fragment, the bath objects are first broadcast to all MPI ranks.
+        Afterwards, each fragment is moved to the MPI rank which solved it, such that its results and bath
+        are available via `get_fragments(mpi_rank=mpi.rank)` as usual.
+
+        Returns
+        -------
+        t_solver : float
+            Time this MPI rank spent in cluster solvers.
+        """
+        costs = [estimate_solver_cost(x.cluster, x.solver) for x in fragments]
+        order = np.argsort(costs, kind="stable")[::-1]
+        self.communicate_baths(fragments)
+        counter = mpi.create_rma_counter()
+        solved = []
+        t_solver = 0.0
+        while True:
+            idx = counter.fetch_and_add(1)
+            if idx >= len(fragments):
+                break
+            x = fragments[order[idx]]
+            t0 = timer()
+            self._solve_fragment(x)
+            t_solver += timer() - t0
+            solved.append(x.id)
+        counter.free()
+        solved = mpi.world.allgather(solved)
+        ranks = {fid: rank for rank, fids in enumerate(solved) for fid in fids}
+        for x in fragments:
+            # Only the MPI rank which solved the fragment keeps its bath:
+            if mpi.rank != ranks[x.id]:
+                for attr in ("_dmet_bath", "_bath_factory_occ", "_bath_factory_vir"):
+                    setattr(x, attr, None)
+            self.move_fragment(x, ranks[x.id], with_baths=False)
+        return t_solver
+
     def _all_converged(self, fragments):
         conv = True
         for fx in fragments:
@@ -202,6 +345,7 @@ class EWF(Embedding):
     # T-amplitudes
     get_global_t1 = get_global_t1_rhf
     get_global_t2 = get_global_t2_rhf
+    get_global_t2_blocks = get_global_t2_blocks_rhf
 
     # Lambda-amplitudes
     def get_global_l1(self, *args, t_as_lambda=None, **kwargs):
@@ -212,6 +356,10 @@ class EWF(Embedding):
         get_lambda = True if not t_as_lambda else False
         return self.get_global_t2(*args, get_lambda=get_lambda, **kwargs)
 
+    def get_global_l2_blocks(self, *args, t_as_lambda=None, **kwargs):
+        get_lambda = True if not t_as_lambda else False
+        return self.get_global_t2_blocks(*args, get_lambda=get_lambda, **kwargs)
+
     def t1_diagnostic(self, warntol=0.02):
         # Per cluster
         for fx in self.get_fragments(active=True, mpi_rank=mpi.rank):
@@ -328,14 +476,26 @@ class EWF(Embedding):
                 self.log.debug(
                     "%20s:  E(S)= %s  E(D)= %s  E(tot)= %s", x, energy_string(es), energy_string(ed), energy_string(ex)
                 )
+            if x.results.e_corr_t is not None:
+                ex += x.results.e_corr_t
             e_corr += x.symmetry_factor * ex
         return e_corr / self.ncells
 
+    @mpi.with_allreduce()
+    def get_pert_t_energy(self):
+        """Get (T) energy correction from fragments with solver 'CCSD(T)'."""
+        e_t = 0.0
+        for x in self.get_fragments(contributes=True, sym_parent=None, mpi_rank=mpi.rank):
+            if x.results.e_corr_t is not None:
+                e_t += x.symmetry_factor * x.results.e_corr_t
+        return e_t / self.ncells
+
     def get_dm_corr_energy(self, dm1="global-wf", dm2="projected-lambda", t_as_lambda=None, with_exxdiv=None):
         e1 = self.get_dm_corr_energy_e1(dm1=dm1, t_as_lambda=None, with_exxdiv=None)
         e2 = self.get_dm_corr_energy_e2(dm2=dm2, t_as_lambda=t_as_lambda)
-        e_corr = e1 + e2
-        self.log.debug("Ecorr(1)= %s  Ecorr(2)= %s  Ecorr= %s", *map(energy_string, (e1, e2, e_corr)))
+        e_t = self.get_pert_t_energy()
+        e_corr = e1 + e2 + e_t
+        self.log.debug("Ecorr(1)= %s  Ecorr(2)= %s  E(T)= %s  Ecorr= %s", *map(energy_string, (e1, e2, e_t, e_corr)))
         return e_corr
 
     def get_dm_corr_energy_e1(self, dm1="global-wf", t_as_lambda=None, with_exxdiv=None):
@@ -399,7 +559,8 @@ class EWF(Embedding):
         This is the projected (T1, T2) energy expression, instead of the
         projected (C1, C2) expression used in PRX (the differences are very small).
 
-        For testing only, UHF and MPI not implemented"""
+        For testing only, UHF not implemented.
+        With `full_wf=True`, the global T2 amplitudes are distributed over MPI ranks."""
         t0 = timer()
         t1 = self.get_global_t1()
 
@@ -410,10 +571,12 @@ class EWF(Embedding):
 
         # E(doubles)
         if full_wf:
-            c2 = self.get_global_t2() + einsum("ia,jb->ijab", t1, t1)
-            mos = (self.mo_coeff_occ, self.mo_coeff_vir, self.mo_coeff_vir, self.mo_coeff_occ)
-            eris = self.get_eris_array(mos)
-            e_doubles = 2 * einsum("ijab,iabj", c2, eris) - einsum("ijab,ibaj", c2, eris)
+            e_doubles = 0.0
+            for blk, t2 in self.get_global_t2_blocks().loop_local_blocks():
+                c2 = t2 + einsum("ia,jb->ijab", t1[blk], t1)
+                mos = (self.mo_coeff_occ[:, blk], self.mo_coeff_vir, self.mo_coeff_vir, self.mo_coeff_occ)
+                eris = self.get_eris_array(mos)
+                e_doubles += 2 * einsum("ijab,iabj", c2, eris) - einsum("ijab,ibaj", c2, eris)
         else:
             e_doubles = 0.0
             for x in self.get_fragments(contributes=True, sym_parent=None, mpi_rank=mpi.rank):
@@ -433,8 +596,8 @@ class EWF(Embedding):
                 eris = einsum("xi,iabj->xabj", px, eris)
                 wx = x.symmetry_factor * x.sym_factor
                 e_doubles += wx * (2 * einsum("ijab,iabj", c2x, eris) - einsum("ijab,ibaj", c2x, eris))
-            if mpi:
-                e_doubles = mpi.world.allreduce(e_doubles)
+        if mpi:
+            e_doubles = mpi.world.allreduce(e_doubles)
 
         self.log.timing("Time for E(CCSD)= %s", time_string(timer() - t0))
         e_corr = e_singles + e_doubles
@@ -17,9 +17,11 @@ from vayesta.core.qemb import Fragment as BaseFragment
 from vayesta.core.fragmentation import IAO_Fragmentation
 from vayesta.core.types import RFCI_WaveFunction, RCCSDTQ_WaveFunction, UCCSDTQ_WaveFunction
 from vayesta.core.bath import DMET_Bath
+from vayesta.solver import RCCSD_Solver
 from vayesta.mpi import mpi
 
 from vayesta.ewf import ewf
+from vayesta.ewf import ccsd_t
 
 
 # Get MPI rank of fragment
@@ -39,9 +41,11 @@ class Options(BaseFragment.Options):
     )
     nelectron_target_atol: float = 1e-6
     nelectron_target_rtol: float = 1e-6
+    nelectron_target_method: str = None
     # Calculation modes
     calc_e_wf_corr: bool = None
     calc_e_dm_corr: bool = None
+    dm2_energy_blocked: bool = None
     store_wf_type: str = None  # If set, fragment WFs will be converted to the respective type, before storing them
     # Fragment specific
     # -----------------
@@ -70,6 +74,7 @@ class Fragment(BaseFragment):
     @dataclasses.dataclass
     class Results(BaseFragment.Results):
         e_corr_dm2cumulant: float = None
+        e_corr_t: float = None  # Fragment (T) energy contribution
         n_active: int = None
         ip_energy: np.ndarray = None
         ea_energy: np.ndarray = None
@@ -182,10 +187,6 @@ class Fragment(BaseFragment):
         self.flags.external_corrections = []
         self.flags.test_extcorr = False
 
-    def get_init_guess(self, init_guess, solver, cluster):
-        # FIXME
-        return {}
-
     def kernel(self, solver=None, init_guess=None):
         solver = solver or self.solver
         self.check_solver(solver)
@@ -196,10 +197,9 @@ class Fragment(BaseFragment):
         if solver == "HF":
             return None
 
-        init_guess = self.get_init_guess(init_guess, solver, cluster)
-
         # Create solver object
         cluster_solver = self.get_solver(solver)
+        init_guess = self.get_init_guess(init_guess, cluster_solver, cluster)
         # Calculate cluster energy at the level of RPA.
         e_corr_rpa = self.get_local_rpa_correction(cluster_solver.hamil)
         # --- Chemical potential
@@ -210,6 +210,7 @@ class Fragment(BaseFragment):
                 c_frag=self.c_proj,
                 atol=self.opts.nelectron_target_atol,
                 rtol=self.opts.nelectron_target_rtol,
+                method=self.opts.nelectron_target_method,
             )
         elif cpt_frag:
             # Add chemical potential to fragment space
@@ -233,7 +234,7 @@ class Fragment(BaseFragment):
         # Normal solver
         if not self.base.opts._debug_wf:
             with log_time(self.log.info, ("Time for %s solver:" % solver) + " %s"):
-                cluster_solver.kernel()
+                cluster_solver.kernel(**init_guess)
         # Special debug "solver"
         else:
             if self.base.opts._debug_wf == "random":
@@ -289,8 +290,27 @@ class Fragment(BaseFragment):
             )
         if self.opts.calc_e_dm_corr:
             results.e_corr_dm2cumulant = self.make_fragment_dm2cumulant_energy(hamil=self.hamil)
+        if solver == "CCSD(T)" and self.base.is_rhf and isinstance(cluster_solver, RCCSD_Solver):
+            with log_time(self.log.timing, "Time for (T) correction: %s"):
+                results.e_corr_t = self.get_fragment_pert_t_energy(wf, hamil=self.hamil)
+            self.log.debug("E(T)= %s", energy_string(results.e_corr_t))
         return results
 
+    def _get_cluster_solver(self, solver):
+        """Restricted 'CCSD(T)' uses the CCSD solver of pyscf; the (T) correction is added in `kernel`."""
+        is_eb = bool(self.opts.screening) and "crpa_full" in self.opts.screening
+        if solver == "CCSD(T)" and self.base.is_rhf and not is_eb:
+            return "CCSD"
+        return solver
+
+    def check_solver(self, solver):
+        super().check_solver(self._get_cluster_solver(solver))
+
+    def get_solver(self, solver=None):
+        if solver is None:
+            solver = self.solver
+        return super().get_solver(self._get_cluster_solver(solver))
+
     def get_solver_options(self, solver):
         # TODO: fix this mess...
         # Use those values from solver_options, which are not None
@@ -385,6 +405,39 @@ class Fragment(BaseFragment):
         e_corr = e_singles + e_doubles
         return e_singles, e_doubles, e_corr
 
+    def get_fragment_pert_t_energy(self, wf=None, hamil=None):
+        """Calculate fragment projected (T) energy contribution from the CCSD wave function.
+
+        The (T) energy is evaluated with the diagonal of the cluster Fock matrix, which is
+        exact for canonicalized cluster orbitals.
+
+        Parameters
+        ----------
+        wf : RCCSD_WaveFunction, optional
+            Cluster CCSD wave function. If None, self.results.wf is used. Default: None.
+        hamil : ClusterHamiltonian object, optional
+            Object representing cluster hamiltonian, possibly including cached ERIs.
+            If None, self.hamil is used. Default: None.
+
+        Returns
+        -------
+        e_t : float
+            Fragment (T) energy contribution.
+        """
+        if wf is None:
+            wf = self.results.wf
+        if hamil is None:
+            hamil = self.hamil
+        wf = wf.as_ccsd()
+        # Project first occupied index of T2 onto fragment and symmetrize:
+        px = self.get_overlap("proj|cluster-occ")
+        t2x = einsum("xi,xj,j...->i...", px, px, wf.t2)
+        t2x = (t2x + t2x.transpose(1, 0, 3, 2)) / 2
+        fock = hamil.get_fock()
+        eris = [hamil.get_eris_screened(block=block) for block in ("ovvv", "ovoo", "ovov")]
+        e_t = ccsd_t.kernel(wf.t1, wf.t2, t2x, fock, *eris)
+        return self.sym_factor * e_t
+
     # --- Density-matrices
 
     def _ccsd_amplitudes_for_dm(self, t_as_lambda=False, sym_t2=True):
@@ -410,11 +463,17 @@ class Fragment(BaseFragment):
         d1 = (doo, dov, dvo, dvv)
         return d1
 
-    def _get_projected_gamma2_intermediates(self, t_as_lambda=False, sym_t2=True):
-        """Intermediates for 2-DM, projected in Lambda-amplitudes and linear T-term."""
+    def _get_projected_gamma2_intermediates(self, t_as_lambda=False, sym_t2=True, h5file=None):
+        """Intermediates for 2-DM, projected in Lambda-amplitudes and linear T-term.
+
+        If `h5file` is given, all intermediates except D2[ovov] are returned as datasets of this HDF5 file."""
         t1, t2, l1, l2, t1x, t2x, l1x, l2x = self._ccsd_amplitudes_for_dm(t_as_lambda=t_as_lambda, sym_t2=sym_t2)
         cc = self.mf  # Only attributes stdout, verbose, and max_memory are needed, just use mean-field object
-        dovov, *d2rest = pyscf.cc.ccsd_rdm._gamma2_intermediates(cc, t1, t2, l1x, l2x)
+        if h5file is None:
+            dovov, *d2rest = pyscf.cc.ccsd_rdm._gamma2_intermediates(cc, t1, t2, l1x, l2x)
+        else:
+            dovov, *d2rest = pyscf.cc.ccsd_rdm._gamma2_outcore(cc, t1, t2, l1x, l2x, h5file)
+            dovov = dovov[:]
         # Correct D2[ovov] part (first element of d2 tuple)
         dtau = (t2x - t2) + einsum("ia,jb->ijab", (t1x - t1), t1)
         dovov += dtau.transpose(0, 2, 1, 3)
@@ -480,9 +539,19 @@ class Fragment(BaseFragment):
     #    return e_dm1
 
     @log_method()
-    def make_fragment_dm2cumulant_energy(self, hamil=None, t_as_lambda=False, sym_t2=True, approx_cumulant=True):
+    def make_fragment_dm2cumulant_energy(
+        self, hamil=None, t_as_lambda=False, sym_t2=True, approx_cumulant=True, blocked=None, max_memory=int(1e9)
+    ):
+        """Energy of the projected (approximate) 2-DM cumulant of the fragment.
+
+        With `blocked=True`, the CCSD 2-DM intermediates are stored on disk and contracted in blocks with the
+        density-fitted cluster ERIs, which are constructed on the fly, using about `max_memory` bytes per block.
+        Neither the full 2-DM nor the full cluster ERIs are held in memory in this case.
+        Default: `self.opts.dm2_energy_blocked`."""
         if hamil is None:
             hamil = self.hamil
+        if blocked is None:
+            blocked = self.opts.dm2_energy_blocked
 
         # This is a refactor of original functionality with three forks.
         #   - MP2 solver so dm2 cumulant is just ovov, and we just want to contract this.
@@ -499,6 +568,16 @@ class Fragment(BaseFragment):
                 t_as_lambda=t_as_lambda, sym_t2=sym_t2, approx_cumulant=approx_cumulant, full_shape=False
             )
             return 2 * einsum("ijkl,ijkl->", hamil.get_eris_bare("ovov"), dm2) / 2
+        elif approx_cumulant and blocked:
+            if not self.base.has_df:
+                raise NotImplementedError("Blocked 2-DM energy requires density-fitting")
+            cderi, cderi_neg = hamil.get_cderi_bare()
+            with pyscf.lib.H5TmpFile() as f:
+                d2 = self._get_projected_gamma2_intermediates(t_as_lambda=t_as_lambda, sym_t2=sym_t2, h5file=f)
+                e_dm2 = vayesta.core.ao2mo.helper.contract_dm2intermeds_cderi_rhf(
+                    d2, cderi, cderi_neg, hamil.cluster.nocc_active, max_memory=max_memory
+                )
+            return e_dm2 / 2
         elif approx_cumulant:
             # Working hypothesis: this branch will effectively always uses `approx_cumulant=True`.
             eris = hamil.get_dummy_eri_object(force_bare=True, with_vext=False)
@@ -4,7 +4,7 @@ import pyscf
 import pyscf.pbc
 import pyscf.pbc.tools
 
-from vayesta.core.util import dot, einsum, energy_string, log_time
+from vayesta.core.util import brange, dot, einsum, energy_string, log_time
 from vayesta.mpi import mpi
 
 
@@ -50,6 +50,173 @@ def _get_icmp2_fragments(emb, **kwargs):
     return emb.get_fragments(contributes=True, flags=dict(is_envelop=True), **kwargs)
 
 
+def _make_t2_blocks(cderi_x, cderi_y, cderi_neg_x, cderi_neg_y, eia_x, eia_y, p_frag_x, p_frag_y, max_memory):
+    """Generate fragment projected T2 amplitudes and ERIs between clusters X and Y in blocks of the fragment index of X.
+
+    The four-index quantities are only formed for a block of occupied orbitals of X at a time, and are projected
+    onto the fragment space of Y, before they are contracted into the current block of fragment indices of X.
+
+    Parameters
+    ----------
+    cderi_x, cderi_y: (n(aux), n(occ), n(vir)) arrays
+        Three-center integrals of clusters X and Y.
+    cderi_neg_x, cderi_neg_y: (n(aux,neg), n(occ), n(vir)) arrays or None
+        Negative part of the three-center integrals (for 2D systems) or None.
+    eia_x, eia_y: (n(occ), n(vir)) arrays
+        Orbital energy differences of clusters X and Y.
+    p_frag_x, p_frag_y: (n(frag), n(occ)) arrays
+        Projectors from the occupied cluster orbitals onto the fragment space.
+    max_memory: int
+        Memory for the intermediates in bytes.
+
+    Yields
+    ------
+    t2, eris: (n(blk), n(frag,Y), n(vir,X), n(vir,Y)) arrays
+        Fragment projected T2 amplitudes and ERIs of the current block of fragment indices of X.
+    """
+    nocc_x, nvir_x = eia_x.shape
+    nocc_y, nvir_y = eia_y.shape
+    nfrag_x, nfrag_y = len(p_frag_x), len(p_frag_y)
+    mem_vv = 8 * nvir_x * nvir_y
+    # Half of the memory for the two output blocks, the other half for the intermediates of an occupied block,
+    # three (n(blk), n(occ,Y), n(vir,X), n(vir,Y)) and two (n(blk), n(frag,Y), n(vir,X), n(vir,Y)) arrays:
+    fblksize = max(int(max_memory / max(4 * nfrag_y * mem_vv, 1)), 1)
+    oblksize = max(int(max_memory / max(2 * (3 * nocc_y + 2 * nfrag_y) * mem_vv, 1)), 1)
+    for fblk in brange(0, nfrag_x, fblksize):
+        t2x = np.zeros((fblk.stop - fblk.start, nfrag_y, nvir_x, nvir_y))
+        erisx = np.zeros_like(t2x)
+        for oblk in brange(0, nocc_x, oblksize):
+            eris = einsum("Lia,Ljb->ijab", cderi_x[:, oblk], cderi_y)  # O(n(frag)^2) * O(naux)
+            if cderi_neg_x is not None:
+                eris -= einsum("Lia,Ljb->ijab", cderi_neg_x[:, oblk], cderi_neg_y)
+            t2 = eris / (eia_x[oblk, None, :, None] + eia_y[None, :, None, :])
+            # Project j onto F(y):
+            t2 = einsum("yj,ijab->iyab", p_frag_y, t2)
+            eris = einsum("yj,ijab->iyab", p_frag_y, eris)
+            # Project i onto F(x):
+            t2x += einsum("xi,iyab->xyab", p_frag_x[fblk, oblk], t2)
+            erisx += einsum("xi,iyab->xyab", p_frag_x[fblk, oblk], eris)
+        yield t2x, erisx
+
+
+# --- Pair screening
+# The intercluster MP2 energy of distant fragments X and Y is estimated in the dipole approximation,
+# (ia|jb) ~ d(ia).T(R).d(jb), with the dipole-dipole tensor T(R) = (1 - 3 R R^T / |R|^2) / |R|^3.
+# Using the smallest orbital energy difference as denominator, the direct MP2 energy is estimated as
+# |E(X,Y)| ~ Tr(T D(X) T D(Y)) / (2 gap), with the spin-summed covariance matrix D(X) = sum_ia d(ia) d(ia)^T.
+# This is an estimate, not a rigorous bound, since the multipole expansion is truncated at the dipole term.
+# This decays as R^-6 and is evaluated in O(1) for each fragment pair. The exchange energy decays exponentially
+# and is neglected in the estimate.
+
+
+def _get_dipole_integrals(emb):
+    """AO dipole integrals. For periodic systems, the first AO index of each integral is located in the unit cell."""
+    if hasattr(emb.mol, "lattice_vectors"):
+        return emb.mol.pbc_intor("int1e_r", comp=3)
+    return emb.mol.intor_symmetric("int1e_r", comp=3)
+
+
+def _unwrap_dipole_integrals(emb, r_ao, centroid):
+    """Shift dipole integrals of periodic systems, such that the AO centers are the closest images to the centroid."""
+    if not hasattr(emb.mol, "lattice_vectors"):
+        return r_ao
+    coords = emb.mol.atom_coords()
+    shift = centroid + _get_minimum_image(emb, coords - centroid) - coords
+    shift = shift[[label[0] for label in emb.mol.ao_labels(None)]]
+    r_ao = r_ao + einsum("pr,pq->rpq", shift, emb.mol.pbc_intor("int1e_ovlp"))
+    return (r_ao + r_ao.transpose(0, 2, 1)) / 2
+
+
+def _get_dipole_covariance(r_ao, c_occ, c_vir, p_frag):
+    """Covariance matrix of the transition dipoles between fragment projected occupied and virtual orbitals."""
+    dip = einsum("rpq,pi,qa->ria", r_ao, c_occ, c_vir)
+    dip = einsum("xi,ria->rxa", p_frag, dip)
+    return einsum("rxa,sxa->rs", dip, dip)
+
+
+def _get_gap(e_occ, e_vir):
+    if len(e_occ) == 0 or len(e_vir) == 0:
+        return np.inf
+    return np.min(e_vir) - np.max(e_occ)
+
+
+def _get_centroid(emb, fragment):
+    """Center of the atoms of a fragment, or None if the fragment is not associated to atoms."""
+    if not fragment.atoms:
+        return None
+    coords = emb.mol.atom_coords()[fragment.atoms]
+    # Unwrap atoms of periodic systems relative to the first atom:
+    coords = coords[:1] + _get_minimum_image(emb, coords - coords[:1])
+    return np.mean(coords, axis=0)
+
+
+def _get_minimum_image(emb, r):
+    """Minimum image of distance vector(s) in periodic systems."""
+    if not hasattr(emb.mol, "lattice_vectors"):
+        return r
+    a = emb.mol.lattice_vectors()
+    r_frac = np.dot(r, np.linalg.inv(a))
+    ndim = emb.mol.dimension
+    r_frac[..., :ndim] -= np.rint(r_frac[..., :ndim])
+    return np.dot(r_frac, a)
+
+
+def _get_screening_data(emb, fragment, r_ao, c_occ, c_vir, p_frag, gap):
+    """Centroid, orbital energy gap, and spin-summed transition dipole covariance matrix of a fragment.
+
+    The data is stored in a single array of length 13, or None if the fragment is not associated to atoms."""
+    centroid = _get_centroid(emb, fragment)
+    if centroid is None:
+        return None
+    r_ao = _unwrap_dipole_integrals(emb, r_ao, centroid)
+    dip2 = sum(_get_dipole_covariance(r_ao, c_occ[s], c_vir[s], p_frag[s]) for s in range(len(c_occ)))
+    return np.hstack((centroid, gap, dip2.ravel()))
+
+
+def _transform_screening_data(sym_op, data):
+    """Screening data of a symmetry related fragment."""
+    if data is None:
+        return None
+    centroid, gap, dip2 = data[:3], data[3], data[4:].reshape(3, 3)
+    if hasattr(sym_op, "vector_xyz"):
+        centroid = centroid + sym_op.vector_xyz
+    else:
+        centroid = sym_op.apply_to_point(centroid)
+    # Identity, translations, and inversions leave the covariance matrix unchanged:
+    if hasattr(sym_op, "as_matrix"):
+        rot = sym_op.as_matrix()
+        dip2 = dot(rot, dip2, rot.T)
+    return np.hstack((centroid, gap, dip2.ravel()))
+
+
+def _estimate_pair_energy(emb, data_x, data_y, rmin):
+    """Estimate of the magnitude of the intercluster MP2 energy of a fragment pair, or None if not applicable."""
+    if data_x is None or data_y is None:
+        return None
+    r = _get_minimum_image(emb, data_y[:3] - data_x[:3])
+    dist = np.linalg.norm(r)
+    # The dipole approximation is only valid for well separated fragments:
+    if dist < rmin / pyscf.lib.param.BOHR:
+        return None
+    t = (np.eye(3) - 3 * np.outer(r, r) / dist**2) / dist**3
+    gap = data_x[3] + data_y[3]
+    return einsum("ab,bc,cd,da->", t, data_x[4:].reshape(3, 3), t, data_y[4:].reshape(3, 3)) / (2 * gap)
+
+
+def _log_pair_screening(emb, npairs, nskipped, e_skipped):
+    if mpi:
+        npairs = mpi.world.allreduce(npairs)
+        nskipped = mpi.world.allreduce(nskipped)
+        e_skipped = mpi.world.allreduce(e_skipped)
+    if mpi.is_master:
+        emb.log.info(
+            "Intercluster MP2 pair screening: skipped %d of %d fragment pairs (estimated discarded energy: %s)",
+            nskipped,
+            npairs,
+            energy_string(e_skipped / emb.ncells),
+        )
+
+
 def get_intercluster_mp2_energy_rhf(
     emb,
     bno_threshold_occ=None,
@@ -60,6 +227,9 @@ def get_intercluster_mp2_energy_rhf(
     project_dc="occ",
     vers=1,
     diagonal=True,
+    screening_tol=None,
+    screening_rmin=4.0,
+    max_memory=int(1e9),
 ):
     """Get long-range, inter-cluster energy contribution on the MP2 level.
 
@@ -83,6 +253,13 @@ def get_intercluster_mp2_energy_rhf(
         Calculate energy contribution from the second-order direct MP2 term. Default: True.
     exchange: bool, optional
         Calculate energy contribution from the second-order exchange MP2 term. Default: True.
+    screening_tol: float, optional
+        If set, fragment pairs with an estimated energy contribution (per cell) below this tolerance are skipped.
+        The estimate is based on the dipole-dipole interaction of the fragment centroids. Default: None.
+    screening_rmin: float, optional
+        Fragment pairs with a centroid distance below this value (in Angstrom) are never skipped. Default: 4.
+    max_memory: int, optional
+        Memory for the T2 amplitudes and ERIs of each fragment pair in bytes. Default: 1 GB.
 
     Returns
     -------
@@ -94,6 +271,8 @@ def get_intercluster_mp2_energy_rhf(
         raise ValueError()
     if not emb.has_df:
         raise RuntimeError("Intercluster MP2 energy requires density-fitting.")
+    if emb._cholesky_df is not None:
+        raise NotImplementedError("Intercluster MP2 energy with Cholesky-decomposed ERIs.")
 
     e_direct = e_exchange = 0.0
     with log_time(emb.log.timing, "Time for intercluster MP2 energy: %s"):
@@ -108,6 +287,8 @@ def get_intercluster_mp2_energy_rhf(
             except AttributeError:
                 auxmol = emb.df.auxcell
         auxsym = type(emb.symmetry)(auxmol)
+        if screening_tol is not None:
+            r_ao = _get_dipole_integrals(emb)
 
         with log_time(emb.log.timing, "Time for intercluster MP2 energy setup: %s"):
             coll = {}
@@ -146,9 +327,18 @@ def get_intercluster_mp2_energy_rhf(
                 # TODO: Test 2D
                 if cderi_neg is not None:
                     coll[x.id, "cderi_neg"] = cderi_neg
+                if screening_tol is not None:
+                    gap = _get_gap(coll[x.id, "e_occ"], coll[x.id, "e_vir"])
+                    # Both spin channels contribute equally:
+                    p_frag = 2 * [coll[x.id, "p_frag"]]
+                    coll[x.id, "screening"] = screening = _get_screening_data(
+                        emb, x, r_ao, 2 * [c_occ], 2 * [c_vir], p_frag, gap
+                    )
                 # Fragments Y, which are symmetry related to X
                 for y in _get_icmp2_fragments(emb, sym_parent=x):
                     sym_op = y.get_symmetry_operation()
+                    if screening_tol is not None:
+                        coll[y.id, "screening"] = _transform_screening_data(sym_op, screening)
                     coll[y.id, "c_vir"] = sym_op(c_vir)
                     # TODO: Why do we need to invert the atom reordering with argsort?
                     sym_op_aux = type(sym_op)(
@@ -162,6 +352,8 @@ def get_intercluster_mp2_energy_rhf(
             if mpi:
                 coll = mpi.create_rma_dict(coll)
 
+        npairs = nskipped = 0
+        e_skipped = 0.0
         for ix, x in enumerate(_get_icmp2_fragments(emb, fragments=fragments, mpi_rank=mpi.rank, sym_parent=None)):
             cx = ClusterRHF(x, coll)
 
@@ -177,70 +369,72 @@ def get_intercluster_mp2_energy_rhf(
 
             # Loop over all other fragments
             for iy, y in enumerate(_get_icmp2_fragments(emb)):
-                cy = ClusterRHF(y, coll)
-
                 # TESTING
                 if diagonal == "only" and x.id != y.id:
                     continue
                 if not diagonal and x.id == y.id:
                     continue
 
-                eia_y = cy.e_occ[:, None] - cy.e_vir[None, :]
+                prefac = x.sym_factor * x.symmetry_factor * y.sym_factor
+                npairs += 1
+                # Skip pair before fetching (possibly remote) three-center integrals of Y:
+                if screening_tol is not None and x.id != y.id:
+                    e_est = _estimate_pair_energy(emb, coll[x.id, "screening"], coll[y.id, "screening"], screening_rmin)
+                    if e_est is not None and prefac * e_est / emb.ncells < screening_tol:
+                        nskipped += 1
+                        e_skipped += prefac * e_est
+                        emb.log.debugv("Skipping pair %s <- %s: estimated energy= %.3e", x.id_name, y.id_name, e_est)
+                        continue
 
-                # Make T2
-                # TODO: save memory by blocked loop
-                # OR: write C function (also useful for BNO build)
-                eris = einsum("Lia,Ljb->ijab", cx.cderi, cy.cderi)  # O(n(frag)^2) * O(naux)
-                if cx.cderi_neg is not None:
-                    eris -= einsum("Lia,Ljb->ijab", cx.cderi_neg, cy.cderi_neg)
-                eijab = eia_x[:, None, :, None] + eia_y[None, :, None, :]
-                t2 = eris / eijab
-                # Project i onto F(x) and j onto F(y):
-                t2 = einsum("xi,yj,ijab->xyab", cx.p_frag, cy.p_frag, t2)
-                eris = einsum("xi,yj,ijab->xyab", cx.p_frag, cy.p_frag, eris)
+                cy = ClusterRHF(y, coll)
+
+                eia_y = cy.e_occ[:, None] - cy.e_vir[None, :]
 
                 # if exchange:
                 #    # Overlap of virtual space between X and Y
                 svir = np.dot(svir0, cy.c_vir)
 
                 # Projector to remove double counting with intracluster energy
-                ed = ex = 0
-                if project_dc == "occ":
-                    pdco = np.dot(pdco0, y.c_proj)
-                    pdco = np.eye(pdco.shape[-1]) - dot(pdco.T, pdco)
-                    if direct:
-                        if vers == 1:
-                            ed = 2 * einsum("ijab,iJab,jJ->", t2, eris, pdco)
-                        elif vers == 2:
-                            ed = 2 * einsum("ijab,iJAb,jJ,aC,AC->", t2, eris, pdco, svir, svir)
-                    if exchange:
-                        ex = -einsum("ijaB,iJbA,jJ,aA,bB->", t2, eris, pdco, svir, svir)
-                elif project_dc == "vir":
-                    pdcv = np.dot(pdcv0, cy.c_vir)
-                    pdcv = np.eye(pdcv.shape[-1]) - dot(pdcv.T, pdcv)
-                    if direct:
-                        if vers == 1:
-                            ed = 2 * einsum("ijab,ijaB,bB->", t2, eris, pdcv)
-                        elif vers == 2:
-                            ed = 2 * einsum("ijab,ijAB,bB,aC,AC->", t2, eris, pdcv, svir, svir)
-                    if exchange:
-                        ex = -einsum("ijaB,ijbC,CA,aA,bB->", t2, eris, pdcv, svir, svir)
-                elif project_dc == "both":
+                if project_dc in ("occ", "both"):
                     pdco = np.dot(pdco0, y.c_proj)
                     pdco = np.eye(pdco.shape[-1]) - dot(pdco.T, pdco)
+                if project_dc in ("vir", "both"):
                     pdcv = np.dot(pdcv0, cy.c_vir)
                     pdcv = np.eye(pdcv.shape[-1]) - dot(pdcv.T, pdcv)
-                    if direct:
-                        ed = 2 * einsum("ijab,iJaB,jJ,bB->", t2, eris, pdco, pdcv)
-                    if exchange:
-                        ex = -einsum("ijaB,iJbC,jJ,CA,aA,bB->", t2, eris, pdco, pdcv, svir, svir)
-                elif project_dc is None:
-                    if direct:
-                        ed = 2 * einsum("ijab,ijab->", t2, eris)
-                    if exchange:
-                        ex = -einsum("ijaB,ijbA,aA,bB->", t2, eris, svir, svir)
 
-                prefac = x.sym_factor * x.symmetry_factor * y.sym_factor
+                # Energy contributions are additive in the fragment index of X:
+                t2_blocks = _make_t2_blocks(
+                    cx.cderi, cy.cderi, cx.cderi_neg, cy.cderi_neg, eia_x, eia_y, cx.p_frag, cy.p_frag, max_memory
+                )
+                ed = ex = 0
+                for t2, eris in t2_blocks:
+                    if project_dc == "occ":
+                        if direct:
+                            if vers == 1:
+                                ed += 2 * einsum("ijab,iJab,jJ->", t2, eris, pdco)
+                            elif vers == 2:
+                                ed += 2 * einsum("ijab,iJAb,jJ,aC,AC->", t2, eris, pdco, svir, svir)
+                        if exchange:
+                            ex += -einsum("ijaB,iJbA,jJ,aA,bB->", t2, eris, pdco, svir, svir)
+                    elif project_dc == "vir":
+                        if direct:
+                            if vers == 1:
+                                ed += 2 * einsum("ijab,ijaB,bB->", t2, eris, pdcv)
+                            elif vers == 2:
+                                ed += 2 * einsum("ijab,ijAB,bB,aC,AC->", t2, eris, pdcv, svir, svir)
+                        if exchange:
+                            ex += -einsum("ijaB,ijbC,CA,aA,bB->", t2, eris, pdcv, svir, svir)
+                    elif project_dc == "both":
+                        if direct:
+                            ed += 2 * einsum("ijab,iJaB,jJ,bB->", t2, eris, pdco, pdcv)
+                        if exchange:
+                            ex += -einsum("ijaB,iJbC,jJ,CA,aA,bB->", t2, eris, pdco, pdcv, svir, svir)
+                    elif project_dc is None:
+                        if direct:
+                            ed += 2 * einsum("ijab,ijab->", t2, eris)
+                        if exchange:
+                            ex += -einsum("ijaB,ijbA,aA,bB->", t2, eris, svir, svir)
+
                 e_direct += prefac * ed
                 e_exchange += prefac * ex
 
@@ -250,6 +444,8 @@ def get_intercluster_mp2_energy_rhf(
                 estr = energy_string
                 emb.log.debugv("  %-12s  direct= %s  exchange= %s  total= %s", xystr, estr(ed), estr(ex), estr(ed + ex))
 
+        if screening_tol is not None:
+            _log_pair_screening(emb, npairs, nskipped, e_skipped)
         if mpi:
             e_direct = mpi.world.allreduce(e_direct)
             e_exchange = mpi.world.allreduce(e_exchange)
@@ -257,6 +453,7 @@ def get_intercluster_mp2_energy_rhf(
         e_exchange /= emb.ncells
         e_icmp2 = e_direct + e_exchange
         if mpi.is_master:
+            estr = energy_string
             emb.log.info(
                 "  %-12s  direct= %s  exchange= %s  total= %s",
                 "Total:",
@@ -269,7 +466,16 @@ def get_intercluster_mp2_energy_rhf(
     return e_icmp2
 
 
-def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchange=True, project_dc="vir"):
+def get_intercluster_mp2_energy_uhf(
+    emb,
+    bno_threshold=1e-9,
+    direct=True,
+    exchange=True,
+    project_dc="vir",
+    screening_tol=None,
+    screening_rmin=4.0,
+    max_memory=int(1e9),
+):
     """Get long-range, inter-cluster energy contribution on the MP2 level.
 
     This constructs T2 amplitudes over two clusters, X and Y, as
@@ -288,6 +494,13 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
         Calculate energy contribution from the second-order direct MP2 term. Default: True.
     exchange: bool, optional
         Calculate energy contribution from the second-order exchange MP2 term. Default: True.
+    screening_tol: float, optional
+        If set, fragment pairs with an estimated energy contribution (per cell) below this tolerance are skipped.
+        The estimate is based on the dipole-dipole interaction of the fragment centroids. Default: None.
+    screening_rmin: float, optional
+        Fragment pairs with a centroid distance below this value (in Angstrom) are never skipped. Default: 4.
+    max_memory: int, optional
+        Memory for the T2 amplitudes and ERIs of each fragment pair in bytes. Default: 1 GB.
 
     Returns
     -------
@@ -296,6 +509,8 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
     """
     if project_dc != "vir":
         raise NotImplementedError
+    if emb._cholesky_df is not None:
+        raise NotImplementedError("Intercluster MP2 energy with Cholesky-decomposed ERIs.")
 
     e_direct = 0.0
     e_exchange = 0.0
@@ -311,6 +526,8 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
             except AttributeError:
                 auxmol = emb.df.auxcell
         auxsym = type(emb.symmetry)(auxmol)
+        if screening_tol is not None:
+            r_ao = _get_dipole_integrals(emb)
 
         with log_time(emb.log.timing, "Time for intercluster MP2 energy setup: %s"):
             coll = {}
@@ -332,9 +549,18 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
                 if cderi_a_neg is not None:
                     coll[x.id, "cderi_a_neg"] = cderi_a_neg
                     coll[x.id, "cderi_b_neg"] = cderi_b_neg
+                if screening_tol is not None:
+                    gap_a = _get_gap(coll[x.id, "e_occ_a"], coll[x.id, "e_vir_a"])
+                    gap_b = _get_gap(coll[x.id, "e_occ_b"], coll[x.id, "e_vir_b"])
+                    p_frag = (coll[x.id, "p_frag_a"], coll[x.id, "p_frag_b"])
+                    coll[x.id, "screening"] = screening = _get_screening_data(
+                        emb, x, r_ao, c_occ, c_vir, p_frag, min(gap_a, gap_b)
+                    )
                 # Symmetry related fragments
                 for y in _get_icmp2_fragments(emb, sym_parent=x):
                     sym_op = y.get_symmetry_operation()
+                    if screening_tol is not None:
+                        coll[y.id, "screening"] = _transform_screening_data(sym_op, screening)
                     coll[y.id, "c_vir_a"] = sym_op(c_vir[0])
                     coll[y.id, "c_vir_b"] = sym_op(c_vir[1])
                     # TODO: Why do we need to invert the atom reordering with argsort?
@@ -350,6 +576,8 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
             if mpi:
                 coll = mpi.create_rma_dict(coll)
 
+        npairs = nskipped = 0
+        e_skipped = 0.0
         for ix, x in enumerate(_get_icmp2_fragments(emb, mpi_rank=mpi.rank, sym_parent=None)):
             cx = ClusterUHF(x, coll)
 
@@ -365,65 +593,59 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
 
             # Loop over all other fragments
             for iy, y in enumerate(_get_icmp2_fragments(emb)):
+                prefac = x.sym_factor * x.symmetry_factor * y.sym_factor
+                npairs += 1
+                # Skip pair before fetching (possibly remote) three-center integrals of Y:
+                if screening_tol is not None and x.id != y.id:
+                    e_est = _estimate_pair_energy(emb, coll[x.id, "screening"], coll[y.id, "screening"], screening_rmin)
+                    if e_est is not None and prefac * e_est / emb.ncells < screening_tol:
+                        nskipped += 1
+                        e_skipped += prefac * e_est
+                        emb.log.debugv("Skipping pair %s <- %s: estimated energy= %.3e", x.id_name, y.id_name, e_est)
+                        continue
+
                 cy = ClusterUHF(y, coll)
 
                 eia_ya = cy.e_occ[0][:, None] - cy.e_vir[0][None, :]
                 eia_yb = cy.e_occ[1][:, None] - cy.e_vir[1][None, :]
 
-                # Make T2
-                # TODO: save memory by blocked loop
-                # OR: write C function (also useful for BNO build)
-                eris_aa = einsum("Lia,Ljb->ijab", cx.cderi[0], cy.cderi[0])  # O(n(frag)^2) * O(naux)
-                eris_ab = einsum("Lia,Ljb->ijab", cx.cderi[0], cy.cderi[1])  # O(n(frag)^2) * O(naux)
-                eris_ba = einsum("Lia,Ljb->ijab", cx.cderi[1], cy.cderi[0])  # O(n(frag)^2) * O(naux)
-                eris_bb = einsum("Lia,Ljb->ijab", cx.cderi[1], cy.cderi[1])  # O(n(frag)^2) * O(naux)
-                if cx.cderi_neg is not None:
-                    eris_aa -= einsum("Lia,Ljb->ijab", cx.cderi_neg[0], cy.cderi_neg[0])
-                    eris_ab -= einsum("Lia,Ljb->ijab", cx.cderi_neg[0], cy.cderi_neg[1])
-                    eris_ab -= einsum("Lia,Ljb->ijab", cx.cderi_neg[1], cy.cderi_neg[0])
-                    eris_bb -= einsum("Lia,Ljb->ijab", cx.cderi_neg[1], cy.cderi_neg[1])
-                # Alpha-alpha
-                eijab_aa = eia_xa[:, None, :, None] + eia_ya[None, :, None, :]
-                eijab_ab = eia_xa[:, None, :, None] + eia_yb[None, :, None, :]
-                eijab_ba = eia_xb[:, None, :, None] + eia_ya[None, :, None, :]
-                eijab_bb = eia_xb[:, None, :, None] + eia_yb[None, :, None, :]
-                t2aa = eris_aa / eijab_aa
-                t2ab = eris_ab / eijab_ab
-                t2ba = eris_ba / eijab_ba
-                t2bb = eris_bb / eijab_bb
-
-                # Project i onto F(x) and j onto F(y):
-                t2aa = einsum("xi,yj,ijab->xyab", cx.p_frag[0], cy.p_frag[0], t2aa)
-                t2ab = einsum("xi,yj,ijab->xyab", cx.p_frag[0], cy.p_frag[1], t2ab)
-                t2ba = einsum("xi,yj,ijab->xyab", cx.p_frag[1], cy.p_frag[0], t2ba)
-                t2bb = einsum("xi,yj,ijab->xyab", cx.p_frag[1], cy.p_frag[1], t2bb)
-                eris_aa = einsum("xi,yj,ijab->xyab", cx.p_frag[0], cy.p_frag[0], eris_aa)
-                eris_ab = einsum("xi,yj,ijab->xyab", cx.p_frag[0], cy.p_frag[1], eris_ab)
-                eris_ba = einsum("xi,yj,ijab->xyab", cx.p_frag[1], cy.p_frag[0], eris_ba)
-                eris_bb = einsum("xi,yj,ijab->xyab", cx.p_frag[1], cy.p_frag[1], eris_bb)
-
                 # Overlap of virtual space between X and Y
                 if exchange:
                     svira = np.dot(svir0a, cy.c_vir[0])
                     svirb = np.dot(svir0b, cy.c_vir[1])
 
                 # Projector to remove double counting with intracluster energy
-                ed = ex = 0
                 pdcva = np.dot(pdcv0a, cy.c_vir[0])
                 pdcvb = np.dot(pdcv0b, cy.c_vir[1])
                 pdcva = np.eye(pdcva.shape[-1]) - dot(pdcva.T, pdcva)
                 pdcvb = np.eye(pdcvb.shape[-1]) - dot(pdcvb.T, pdcvb)
 
-                if direct:
-                    ed += einsum("ijab,ijaB,bB->", t2aa, eris_aa, pdcva) / 2
-                    ed += einsum("ijab,ijaB,bB->", t2ab, eris_ab, pdcvb) / 2
-                    ed += einsum("ijab,ijaB,bB->", t2ba, eris_ba, pdcva) / 2
-                    ed += einsum("ijab,ijaB,bB->", t2bb, eris_bb, pdcvb) / 2
-                if exchange:
-                    ex += -einsum("ijaB,ijbC,CA,aA,bB->", t2aa, eris_aa, pdcva, svira, svira) / 2
-                    ex += -einsum("ijaB,ijbC,CA,aA,bB->", t2bb, eris_bb, pdcvb, svirb, svirb) / 2
+                eia_x = (eia_xa, eia_xb)
+                eia_y = (eia_ya, eia_yb)
+                cderi_neg_x = cx.cderi_neg if cx.cderi_neg is not None else (None, None)
+                cderi_neg_y = cy.cderi_neg if cy.cderi_neg is not None else (None, None)
+                ed = ex = 0
+                # Spin of X, spin of Y:
+                for sx, sy in ((0, 0), (0, 1), (1, 0), (1, 1)):
+                    t2_blocks = _make_t2_blocks(
+                        cx.cderi[sx],
+                        cy.cderi[sy],
+                        cderi_neg_x[sx],
+                        cderi_neg_y[sy],
+                        eia_x[sx],
+                        eia_y[sy],
+                        cx.p_frag[sx],
+                        cy.p_frag[sy],
+                        max_memory,
+                    )
+                    pdcv = (pdcva, pdcvb)[sy]
+                    for t2, eris in t2_blocks:
+                        if direct:
+                            ed += einsum("ijab,ijaB,bB->", t2, eris, pdcv) / 2
+                        if exchange and sx == sy:
+                            svir = (svira, svirb)[sx]
+                            ex += -einsum("ijaB,ijbC,CA,aA,bB->", t2, eris, pdcv, svir, svir) / 2
 
-                prefac = x.sym_factor * x.symmetry_factor * y.sym_factor
                 e_direct += prefac * ed
                 e_exchange += prefac * ex
 
@@ -433,6 +655,8 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
                 estr = energy_string
                 emb.log.debugv("  %-12s  direct= %s  exchange= %s  total= %s", xystr, estr(ed), estr(ex), estr(ed + ex))
 
+        if screening_tol is not None:
+            _log_pair_screening(emb, npairs, nskipped, e_skipped)
         if mpi:
             e_direct = mpi.world.allreduce(e_direct)
             e_exchange = mpi.world.allreduce(e_exchange)
@@ -440,6 +664,7 @@ def get_intercluster_mp2_energy_uhf(emb, bno_threshold=1e-9, direct=True, exchan
         e_exchange /= emb.ncells
         e_icmp2 = e_direct + e_exchange
         if mpi.is_master:
+            estr = energy_string
             emb.log.info(
                 "  %-12s  direct= %s  exchange= %s  total= %s",
                 "Total:",
@@ -19,6 +19,46 @@ def _get_mockcc(mo_coeff, max_memory):
     return cc
 
 
+def _gamma1_intermediates_blocked(t1, t2, l1, l2):
+    """Blocked version of `ccsd_rdm._gamma1_intermediates` for `BlockedAmplitudes` T2 and L2 amplitudes.
+
+    All contractions are carried out for blocks stored at the local MPI rank; only the contraction over
+    all but the first occupied index of L2 and T2 requires blocks from other MPI ranks.
+    """
+    doo = -einsum("ja,ia->ij", t1, l1)
+    dvv = einsum("ia,ib->ab", t1, l1)
+    xtv = einsum("ie,me->im", t1, l1)
+    dvo = t1.T - einsum("im,ma->ai", xtv, t1)
+    # Contributions from T2 and L2:
+    nocc, nvir = t1.shape
+    xt1 = np.zeros((nocc, nocc))
+    xt2 = np.zeros((nvir, nvir))
+    dvv2 = np.zeros((nvir, nvir))
+    dvo2 = np.zeros((nvir, nocc))
+    t2.enable_remote_access()
+    for ib, blk in enumerate(t2.blocks):
+        if t2.get_location(ib) != mpi.rank:
+            continue
+        t2blk, l2blk = t2.get_block(ib), l2.get_block(ib)
+        theta = t2blk * 2 - t2blk.transpose(0, 1, 3, 2)
+        dvv2 += einsum("jica,jicb->ab", theta, l2blk)
+        xt2 += einsum("mnaf,mnef->ea", l2blk, theta)
+        dvo2[:, blk] += einsum("imae,me->ai", theta, l1)
+        for blk2, t2blk2 in t2.loop_blocks():
+            theta = t2blk2 * 2 - t2blk2.transpose(0, 1, 3, 2)
+            xt1[blk, blk2] += einsum("mnef,inef->mi", l2blk, theta)
+    t2.disable_remote_access()
+    if mpi:
+        xt1, xt2, dvv2, dvo2 = mpi.nreduce(xt1, xt2, dvv2, dvo2)
+    doo -= xt1
+    dvv += dvv2
+    dvo += dvo2
+    dvo -= einsum("mi,ma->ai", xt1, t1)
+    dvo -= einsum("ie,ae->ai", t1, xt2)
+    dov = l1
+    return doo, dov, dvo, dvv
+
+
 def make_rdm1_ccsd(emb, ao_basis=False, t_as_lambda=False, symmetrize=True, with_mf=True, mpi_target=None, mp2=False):
     """Make one-particle reduced density-matrix from partitioned fragment CCSD wave functions.
 
@@ -185,7 +225,8 @@ def make_rdm1_ccsd_global_wf(
         smaller than `svd_tol` will be removed to speed up the calculation. Default: 1e-3.
     ovlp_tol : float, optional
         Fragment pairs with a smaller than `ovlp_tol` maximum singular value in their cluster overlap,
-        will be skipped. Default: None.
+        will be skipped. Pairs are prescreened with the cached fragment neighbor lists, see
+        `get_fragment_neighbors`. Default: `svd_tol`.
     use_sym : bool, optional
         Make use of symmetry relations, to speed up calculation. Default: True.
     late_t2_sym : bool, optional
@@ -201,17 +242,17 @@ def make_rdm1_ccsd_global_wf(
     dm1 : array(n(MO),n(MO))
         One-particle reduced density matrix in MO basis.
     """
-    # === Slow algorithm (O(N^5)?): Form global N^4 T2/L2-amplitudes first
+    # === Slow algorithm (O(N^5)?): Form global N^4 T2/L2-amplitudes first, distributed over MPI ranks
     if slow:
         t1 = emb.get_global_t1()
-        t2 = emb.get_global_t2()
+        t2 = emb.get_global_t2_blocks()
         l1 = emb.get_global_l1() if not t_as_lambda else t1
-        l2 = emb.get_global_l2() if not t_as_lambda else t2
+        l2 = emb.get_global_l2_blocks() if not t_as_lambda else t2
         if not with_t1:
             t1 = l1 = np.zeros_like(t1)
         mockcc = _get_mockcc(emb.mo_coeff, emb.mf.max_memory)
-        # dm1 = pyscf.cc.ccsd_rdm.make_rdm1(mockcc, t1=t1, t2=t2, l1=l1, l2=l2, with_mf=False)
-        dm1 = ccsd_rdm.make_rdm1(mockcc, t1=t1, t2=t2, l1=l1, l2=l2, with_mf=False)
+        d1 = _gamma1_intermediates_blocked(t1, t2, l1, l2)
+        dm1 = ccsd_rdm._make_rdm1(mockcc, d1, with_mf=False)
         return dm1
 
     # === Fast algorithm via fragment-fragment loop
@@ -245,6 +286,12 @@ def make_rdm1_ccsd_global_wf(
         dov = np.zeros((emb.nocc, emb.nvir))
     symfilter = dict(sym_parent=None) if use_sym else {}
     maxgen = None if use_sym else 0
+    # IDs of all symmetry related fragments of each fragment y, to skip fragments y without any neighbors:
+    if ovlp_tol is not None:
+        symgroups = {
+            fy.id: {fy.id} | {fy2.id for fy2 in fy.get_symmetry_children(maxgen=maxgen)}
+            for fy in emb.get_fragments(contributes=True, **symfilter)
+        }
     for fx in emb.get_fragments(contributes=True, mpi_rank=mpi.rank, **symfilter):
         wfx = fx.results.pwf.as_ccsd()
         if not late_t2_sym:
@@ -259,9 +306,14 @@ def make_rdm1_ccsd_global_wf(
         cx_vir = fx.get_overlap("mo[vir]|cluster[vir]")
         cfx = fx.get_overlap("cluster[occ]|frag")
         mfx = fx.get_overlap("mo[occ]|frag")
+        if ovlp_tol is not None:
+            neighbors = {fy.id for fy in emb.get_fragment_neighbors(fx, ovlp_tol)}
 
         # Loop over fragments y:
         for fy_parent in emb.get_fragments(contributes=True, **symfilter):
+            if ovlp_tol is not None and not (symgroups[fy_parent.id] & neighbors):
+                total_xy += len(symgroups[fy_parent.id])
+                continue
             if mpi:
                 if fy_parent.solver == "MP2":
                     wfy = RMP2_WaveFunction.unpack(rma[fy_parent.id]).as_ccsd()
@@ -276,6 +328,9 @@ def make_rdm1_ccsd_global_wf(
             for fy, (cy_frag, cy_occ_ao, cy_vir_ao) in fy_parent.loop_symmetry_children(
                 (fy_parent.c_frag, fy_parent.cluster.c_occ, fy_parent.cluster.c_vir), include_self=True, maxgen=maxgen
             ):
+                if ovlp_tol is not None and fy.id not in neighbors:
+                    total_xy += 1
+                    continue
                 cy_occ = np.dot(cs_occ, cy_occ_ao)
                 cy_vir = np.dot(cs_vir, cy_vir_ao)
                 # Overlap between cluster x and cluster y:
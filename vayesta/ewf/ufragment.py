@@ -171,9 +171,15 @@ class Fragment(RFragment, BaseFragment):
         return dm2
 
     @log_method()
-    def make_fragment_dm2cumulant_energy(self, hamil=None, t_as_lambda=None, sym_t2=True, approx_cumulant=True):
+    def make_fragment_dm2cumulant_energy(
+        self, hamil=None, t_as_lambda=None, sym_t2=True, approx_cumulant=True, blocked=None
+    ):
         if hamil is None:
             hamil = self.hamil
+        if blocked is None:
+            blocked = self.opts.dm2_energy_blocked
+        if blocked and self.solver != "MP2":
+            raise NotImplementedError("Blocked 2-DM energy for UHF")
         if self.solver == "MP2":
             dm2 = self.make_fragment_dm2cumulant(
                 t_as_lambda=t_as_lambda, sym_t2=sym_t2, approx_cumulant=approx_cumulant, full_shape=False
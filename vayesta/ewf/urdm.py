@@ -275,8 +275,14 @@ def make_rdm1_ccsd_global_wf(
         cx_occ_a, cx_occ_b = x.get_overlap("mo[occ]|cluster[occ]")
         cx_vir_a, cx_vir_b = x.get_overlap("mo[vir]|cluster[vir]")
 
+        if ovlp_tol is not None:
+            neighbors = {y.id for y in emb.get_fragment_neighbors(x, ovlp_tol)}
+
         # Loop over ALL fragments y:
         for y in emb.get_fragments(contributes=True):
+            if ovlp_tol is not None and y.id not in neighbors:
+                total_xy += 1
+                continue
             if mpi:
                 if y.solver == "MP2":
                     wfy = UMP2_WaveFunction.unpack(rma[y.id]).as_ccsd()
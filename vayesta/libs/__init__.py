@@ -21,3 +21,4 @@ def load_library(libname, required=False):
 
 
 libcore = load_library("core")
+libembwf = load_library("embwf")
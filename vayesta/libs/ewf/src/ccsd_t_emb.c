@@ -22,9 +22,12 @@
 #include <math.h>
 #include <assert.h>
 #include <complex.h>
-#include "config.h"
-#include "np_helper/np_helper.h"
-#include "vhf/fblas.h"
+
+void dgemm_(const char*, const char*,
+            const int*, const int*, const int*,
+            const double*, const double*, const int*,
+            const double*, const int*,
+            const double*, double*, const int*);
 
 typedef struct {
         void *cache[6];
@@ -538,7 +541,7 @@ void ccsd_t_simple_emb(
     double *cache = malloc(nooo * sizeof(double));
 
     int a, b, c;
-#pragma omp for
+#pragma omp for schedule(dynamic)
     for (a = 0; a < nv ; a++) {
         for (b = 0; b <= a ; b++) {
             for (c = 0; c <= b ; c++) {
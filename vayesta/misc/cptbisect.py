@@ -72,6 +72,118 @@ class ChempotBisection:
         return self.cpt
 
 
+class ChempotNewton:
+    """Safeguarded Newton-secant search for the chemical potential.
+
+    The derivative of the electron number error with respect to the chemical potential is initialized
+    with an estimate `dfdx` (e.g. from the mean-field response, see `get_mf_electron_response`) and then
+    replaced by the secant of the last two evaluations. Steps are limited to `max_step` and, once the root
+    is bracketed, steps leaving the bracket are replaced by bisection.
+    """
+
+    def __init__(self, func, cpt_init=0.0, dfdx=None, tol=1e-8, maxiter=30, max_step=0.5, errors=(), log=None):
+        self.func = func
+        self.cpt = cpt_init
+        self.dfdx = dfdx
+        self.converged = False
+        self.iterations = 0
+        # Options
+        self.tol = tol
+        self.maxiter = maxiter
+        self.max_step = max_step
+        # Exceptions of func, upon which the step is halved:
+        self.errors = errors
+        self.log = log or vayesta.log
+
+    def kernel(self, *args, **kwargs):
+        cpt = self.cpt
+        err = self.func(cpt, *args, **kwargs)
+        self.iterations = 1
+        dfdx = self.dfdx
+        if (dfdx is not None) and (dfdx == 0 or not np.isfinite(dfdx)):
+            dfdx = None
+        max_step = self.max_step
+        # Chemical potentials with negative and positive electron number error:
+        cpt_neg = cpt_pos = None
+        while True:
+            self.log.info("Chemical potential iteration= %3d  cpt= %+12.8f err= %.3e", self.iterations, cpt, err)
+            self.cpt = cpt
+            if abs(err) <= self.tol:
+                self.converged = True
+                return cpt
+            if self.iterations >= self.maxiter:
+                break
+            if err < 0:
+                cpt_neg = cpt
+            else:
+                cpt_pos = cpt
+            # Without derivative, probe with small step:
+            if dfdx is None:
+                step = 1e-3
+            else:
+                step = np.clip(-err / dfdx, -max_step, max_step)
+            cpt_new = cpt + step
+            if (cpt_neg is not None) and (cpt_pos is not None):
+                lower, upper = sorted([cpt_neg, cpt_pos])
+                if not (lower < cpt_new < upper):
+                    cpt_new = (lower + upper) / 2
+                    self.log.debug("Newton step outside of bracket [%.8f, %.8f]; using bisection", lower, upper)
+            self.iterations += 1
+            try:
+                err_new = self.func(cpt_new, *args, **kwargs)
+            except self.errors as e:
+                max_step = abs(cpt_new - cpt) / 2
+                self.log.warning("Chemical potential %.8f failed (%s); reducing step to %.3e", cpt_new, e, max_step)
+                continue
+            slope = (err_new - err) / (cpt_new - cpt)
+            # Only accept secant slopes consistent with the previous derivative:
+            if np.isfinite(slope) and slope != 0 and (dfdx is None or np.sign(slope) == np.sign(dfdx)):
+                dfdx = slope
+            self.log.debug("Derivative d(err)/d(cpt)= %.3e", dfdx)
+            cpt, err = cpt_new, err_new
+        self.log.warning("Chemical potential not converged in %d iterations (error= %.3e)", self.iterations, err)
+        return cpt
+
+
+def get_mf_electron_response(fock, nocc, p_cpt, p_frag=None):
+    """Mean-field response of the fragment electron number to a chemical potential.
+
+    The (uncoupled) linear response of the electron number in the fragment space `p_frag`,
+    for a chemical potential `-cpt * p_cpt`, is calculated from the Fock matrix.
+
+    Parameters
+    ----------
+    fock : (n, n) array or tuple(2) of (n, n) arrays
+        Fock matrix in orbital basis, with occupied orbitals first.
+    nocc : int or tuple(2) of int
+        Number of occupied orbitals.
+    p_cpt : (n, n) array or tuple(2) of (n, n) arrays
+        Projector into space of chemical potential.
+    p_frag : (n, n) array or tuple(2) of (n, n) arrays, optional
+        Projector into fragment space. Default: `p_cpt`.
+
+    Returns
+    -------
+    dndcpt : float
+        Derivative of the fragment electron number with respect to the chemical potential.
+    """
+    if p_frag is None:
+        p_frag = p_cpt
+    # Unrestricted
+    if np.ndim(fock[0]) == 2:
+        return sum(_get_mf_electron_response(fock[s], nocc[s], p_cpt[s], p_frag[s], 1) for s in range(2))
+    return _get_mf_electron_response(fock, nocc, p_cpt, p_frag, 2)
+
+
+def _get_mf_electron_response(fock, nocc, p_cpt, p_frag, occ):
+    # Semi-canonicalize occupied and virtual orbitals:
+    e_occ, r_occ = np.linalg.eigh(fock[:nocc, :nocc])
+    e_vir, r_vir = np.linalg.eigh(fock[nocc:, nocc:])
+    p_cpt = np.linalg.multi_dot((r_occ.T, p_cpt[:nocc, nocc:], r_vir))
+    p_frag = np.linalg.multi_dot((r_occ.T, p_frag[:nocc, nocc:], r_vir))
+    return 2 * occ * np.sum(p_cpt * p_frag / (e_vir[None, :] - e_occ[:, None]))
+
+
 if __name__ == "__main__":
 
     def func(cpt):
@@ -1,5 +1,6 @@
 from vayesta.mpi.interface import MPI_Interface
 from vayesta.mpi.rma import RMA_Dict
+from vayesta.mpi.rma import RMA_Counter
 
 mpi = None
 
@@ -5,7 +5,7 @@ from timeit import default_timer
 import numpy as np
 import vayesta
 from vayesta.core.util import log_time, memory_string
-from vayesta.mpi.rma import RMA_Dict
+from vayesta.mpi.rma import RMA_Dict, RMA_Counter
 from vayesta.mpi.scf import scf_with_mpi
 from vayesta.mpi.scf import gdf_with_mpi
 
@@ -219,6 +219,9 @@ class MPI_Interface:
     def create_rma_dict(self, dictionary):
         return RMA_Dict.from_dict(self, dictionary)
 
+    def create_rma_counter(self, start=0, location=0):
+        return RMA_Counter(self, start=start, location=location)
+
     # --- PySCF decorators
     # --------------------
 
@@ -226,3 +226,47 @@ class RMA_Dict:
         self._elements.update(elements)
         self.mpi.world.Barrier()
         self.local_data = {}
+
+
+class RMA_Counter:
+    """Global integer counter, which can be incremented atomically by any MPI rank.
+
+    The counter is stored in an RMA window on MPI rank `location`.
+    Creating and freeing the counter are collective operations.
+    """
+
+    def __init__(self, mpi, start=0, location=0):
+        self.mpi = mpi
+        self.location = location
+        self.win = None
+        if self.mpi.disabled:
+            self._value = start
+            return
+        itemsize = np.dtype(np.int64).itemsize
+        winsize = itemsize if (self.mpi.rank == self.location) else 0
+        self.win = self.mpi.MPI.Win.Allocate(winsize, disp_unit=itemsize, comm=self.mpi.world)
+        if self.mpi.rank == self.location:
+            self.win.Lock(self.location)
+            self.win.Put(np.asarray([start], dtype=np.int64), target_rank=self.location)
+            self.win.Unlock(self.location)
+        self.mpi.world.Barrier()
+
+    def fetch_and_add(self, value=1):
+        """Add `value` to counter and return its previous value."""
+        if self.mpi.disabled:
+            self._value, value = self._value + value, self._value
+            return value
+        buf = np.asarray([value], dtype=np.int64)
+        res = np.empty(1, dtype=np.int64)
+        self.win.Lock(self.location)
+        self.win.Fetch_and_op(buf, res, target_rank=self.location, op=self.mpi.MPI.SUM)
+        self.win.Unlock(self.location)
+        log.debugv("RMA: origin= %d, target= %d, counter= %d", self.mpi.rank, self.location, res[0])
+        return int(res[0])
+
+    def free(self):
+        if self.win is None:
+            return
+        self.mpi.world.Barrier()
+        self.win.Free()
+        self.win = None
@@ -1,7 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import scipy.integrate
 import scipy.optimize
 
+from vayesta.mpi import mpi
+
 
 class NIException(BaseException):
     pass
@@ -20,13 +24,47 @@ class NumericalIntegratorBase:
     A new .__init__ assigning any required attributes and a .fix_params may also be required, depending upon the
     particular form of the integral to be approximated.
     Might be able to write this as a factory class, but this'll do for now.
+
+    The contributions of the quadrature points are evaluated in batches of `batch_size` points, via .eval_contrib_batch;
+    subclasses can overwrite this to evaluate all points of a batch with stacked BLAS and LAPACK calls. The batches can
+    further be distributed over `nthreads` threads and, if `use_mpi` is True, over all MPI ranks. In the latter case
+    all ranks need to perform the integration together.
+    If the diagonal contributions support the evaluation at an array of frequency points of shape (n, 1) via
+    broadcasting, `diag_broadcast` should be set to True, such that the optimisation of the quadrature evaluates them
+    for all points at once.
+
+    Alternatively, if `mpi_ov` is True, the particle-hole dimension of all quantities is distributed over the MPI
+    ranks. Subclasses then need to reduce any contractions over this dimension via .reduce_ov, and the diagonal
+    contributions are partial contributions of the local particle-hole excitations. If `distributed_output` is True,
+    the same holds for the result of the integration, otherwise the result is replicated on all ranks.
     """
 
-    def __init__(self, out_shape, diag_shape, npoints, log):
+    diag_broadcast = False
+    distributed_output = True
+
+    def __init__(self, out_shape, diag_shape, npoints, log, batch_size=1, nthreads=1, use_mpi=False, mpi_ov=False):
         self.log = log
         self.out_shape = out_shape
         self.diag_shape = diag_shape
         self.npoints = npoints
+        self.batch_size = batch_size
+        self.nthreads = nthreads
+        if mpi_ov and (use_mpi or nthreads > 1):
+            raise ValueError("Particle-hole excitations distributed over MPI ranks require serial frequency points.")
+        self.use_mpi = use_mpi
+        self.mpi_ov = mpi_ov
+
+    def reduce_ov(self, x):
+        """Sum contraction over the particle-hole dimension over all MPI ranks, if this dimension is distributed."""
+        if self.mpi_ov:
+            return mpi.world.allreduce(x)
+        return x
+
+    def norm(self, x):
+        """L2 norm of result of the integration."""
+        if self.mpi_ov and self.distributed_output:
+            return np.sqrt(mpi.world.allreduce(np.linalg.norm(x) ** 2))
+        return np.linalg.norm(x)
 
     @property
     def npoints(self):
@@ -44,6 +82,11 @@ class NumericalIntegratorBase:
         """Evaluate contribution to numerical integral of result at given frequency point."""
         raise NotImplementedError
 
+    def eval_contrib_batch(self, freqs):
+        """Evaluate contributions to numerical integral of result at several frequency points, stacked along the first
+        axis."""
+        return np.asarray([self.eval_contrib(freq) for freq in freqs])
+
     def eval_diag_contrib(self, freq):
         """Evaluate contribution to integral of diagonal approximation at given frequency point."""
         raise NotImplementedError
@@ -62,63 +105,95 @@ class NumericalIntegratorBase:
         """Provides an exact evaluation of the integral for the diagonal approximation."""
         raise NotImplementedError
 
+    def _integrate(self, points, weight_sets, res_shape, evaluator):
+        """Evaluate weighted sums of the contributions at all quadrature points, for several sets of weights.
+
+        Parameters
+        ----------
+        points : array
+            Quadrature points.
+        weight_sets : array, shape (n(sets), n(points))
+            Sets of quadrature weights.
+        res_shape : tuple
+            Shape of the contribution of a single point.
+        evaluator : callable
+            Function returning the contributions of an array of points, stacked along the first axis.
+
+        Returns
+        -------
+        integrals : array, shape (n(sets),) + res_shape
+            Integrals for each set of weights.
+        """
+        points = np.asarray(points)
+        weight_sets = np.asarray(weight_sets)
+        batch_size = max(self.batch_size, 1)
+        batches = [slice(i, min(i + batch_size, len(points))) for i in range(0, len(points), batch_size)]
+        if self.use_mpi:
+            batches = batches[mpi.rank :: mpi.size]
+
+        def eval_batch(batch):
+            contrib = evaluator(points[batch])
+            assert contrib.shape == (len(points[batch]),) + tuple(res_shape)
+            return np.tensordot(weight_sets[:, batch], contrib, axes=1)
+
+        integrals = np.zeros((len(weight_sets),) + tuple(res_shape))
+        if self.nthreads > 1 and len(batches) > 1:
+            with ThreadPoolExecutor(max_workers=self.nthreads) as executor:
+                for contrib in executor.map(eval_batch, batches):
+                    integrals += contrib
+        else:
+            for batch in batches:
+                integrals += eval_batch(batch)
+        if self.use_mpi:
+            integrals = mpi.world.allreduce(integrals)
+        return integrals
+
     def _NI_eval(self, a, res_shape, evaluator):
         """Base function to perform numerical integration with provided quadrature grid."""
-        quadrature = self.get_quad(a)
-        integral = np.zeros(res_shape)
-        for point, weight in zip(*quadrature):
-            contrib = evaluator(point)
-            assert contrib.shape == res_shape
-            integral += weight * contrib
+        points, weights = self.get_quad(a)
+        return self._integrate(points, [weights], res_shape, evaluator)[0]
 
-        return integral
+    def _eval_diag_batch(self, evaluator, freqs):
+        """Evaluate diagonal contributions at several frequency points, stacked along the first axis."""
+        freqs = np.asarray(freqs)
+        if self.diag_broadcast:
+            return evaluator(freqs[:, None])
+        return np.asarray([evaluator(freq) for freq in freqs])
 
     def _NI_eval_w_error(self, *args):
         raise NotImplementedError(
             "Error estimation only available with naturally nested quadratures (current just Clenshaw-Curtis)."
         )
 
-    def _NI_eval_deriv(self, a, res_shape, evaluator):
-        """Base function to perform numerical integration with provided quadrature grid."""
-        quadrature = self.get_quad(a)
-        integral = np.zeros(res_shape)
-        for point, weight in zip(*quadrature):
-            contrib = evaluator(point, weight, a)
-            assert contrib.shape == res_shape
-            integral += contrib
-        return integral
-
     def eval_NI_approx(self, a):
         """Evaluate the NI approximation of the integral with a provided quadrature."""
-        return self._NI_eval(a, self.out_shape, self.eval_contrib), None
+        return self._NI_eval(a, self.out_shape, self.eval_contrib_batch), None
 
     def eval_diag_NI_approx(self, a):
         """Evaluate the NI approximation to the diagonal approximation of the integral."""
-        return self._NI_eval(a, self.diag_shape, self.eval_diag_contrib)
+        points, weights = self.get_quad(a)
+        contrib = self._eval_diag_batch(self.eval_diag_contrib, points)
+        return np.tensordot(weights, contrib, axes=1)
 
     def eval_diag_NI_approx_grad(self, a):
         """Evaluate the gradient w.r.t a of NI diagonal expression.
         Note that for all quadratures the weights and quadrature point positions are proportional to the arbitrary
         parameter `a', so we can use the same expressions for the derivatives."""
-
-        def get_grad_contrib(freq, weight, a):
-            contrib = self.eval_diag_contrib(freq)
-            deriv = self.eval_diag_deriv_contrib(freq)
-            return (weight / a) * contrib + weight * (freq / a) * deriv
-
-        return self._NI_eval_deriv(a, self.diag_shape, get_grad_contrib)
+        points, weights = map(np.asarray, self.get_quad(a))
+        contrib = self._eval_diag_batch(self.eval_diag_contrib, points)
+        deriv = self._eval_diag_batch(self.eval_diag_deriv_contrib, points)
+        return np.tensordot(weights / a, contrib, axes=1) + np.tensordot(weights * (points / a), deriv, axes=1)
 
     def eval_diag_NI_approx_deriv2(self, a):
         """Evaluate the second derivative w.r.t a of NI diagonal expression.
         Note that for all quadratures the weights and quadrature point positions are proportional to the arbitrary
         parameter `a', so we can use the same expressions for the derivatives."""
-
-        def get_deriv2_contrib(freq, weight, a):
-            deriv = self.eval_diag_deriv_contrib(freq)
-            deriv2 = self.eval_diag_deriv2_contrib(freq)
-            return 2 * (weight / a) * (freq / a) * deriv + weight * (freq / a) ** 2 * deriv2
-
-        return self._NI_eval_deriv(a, self.diag_shape, get_deriv2_contrib)
+        points, weights = map(np.asarray, self.get_quad(a))
+        deriv = self._eval_diag_batch(self.eval_diag_deriv_contrib, points)
+        deriv2 = self._eval_diag_batch(self.eval_diag_deriv2_contrib, points)
+        return np.tensordot(2 * (weights / a) * (points / a), deriv, axes=1) + np.tensordot(
+            weights * (points / a) ** 2, deriv2, axes=1
+        )
 
     def test_diag_derivs(self, a, delta=1e-6):
         freq = np.random.rand() * a
@@ -147,14 +222,14 @@ class NumericalIntegratorBase:
         """Optimise the quadrature to exactly integrate a diagonal approximation to the integral"""
 
         def get_val(a):
-            val = (self.eval_diag_NI_approx(a) - self.eval_diag_exact()).sum()
+            val = self.reduce_ov((self.eval_diag_NI_approx(a) - self.eval_diag_exact()).sum())
             return val
 
         def get_grad(a):
-            return self.eval_diag_NI_approx_grad(a).sum()
+            return self.reduce_ov(self.eval_diag_NI_approx_grad(a).sum())
 
         def get_deriv2(a):
-            return self.eval_diag_NI_approx_deriv2(a).sum()
+            return self.reduce_ov(self.eval_diag_NI_approx_deriv2(a).sum())
 
         def find_good_start(ainit=1e-6, scale_fac=10.0, maxval=1e8, relevance_factor=5):
             """Using a quick exponential search, find the lowest value of the penalty function and from this obtain
@@ -283,22 +358,14 @@ class NumericalIntegratorClenCur(NumericalIntegratorBase):
     def _NI_eval_w_error(self, a, res_shape, evaluator):
         """Base function to perform numerical integration with provided quadrature grid.
         Since Clenshaw-Curtis quadrature is naturally nested, we can generate an error estimate straightforwardly."""
-        quadrature = self.get_quad(a)
-        integral = np.zeros(res_shape)
-        integral_half = np.zeros(res_shape)
-        integral_quarter = np.zeros(res_shape)
-
-        for i, (point, weight) in enumerate(zip(*quadrature)):
-            contrib = evaluator(point)
-            assert contrib.shape == res_shape
-            integral += weight * contrib
-            if i % 2 == 0:
-                integral_half += 2 * weight * contrib
-                if i % 4 == 0:
-                    integral_quarter += 4 * weight * contrib
-
-        a = scipy.linalg.norm(integral_quarter - integral)
-        b = scipy.linalg.norm(integral_half - integral)
+        points, weights = map(np.asarray, self.get_quad(a))
+        idx = np.arange(len(points))
+        # Weights of the full grid and of the nested grids with half and a quarter of the points:
+        weight_sets = [weights, 2 * weights * (idx % 2 == 0), 4 * weights * (idx % 4 == 0)]
+        integral, integral_half, integral_quarter = self._integrate(points, weight_sets, res_shape, evaluator)
+
+        a = self.norm(integral_quarter - integral)
+        b = self.norm(integral_half - integral)
         error = self.calculate_error(a, b)
         self.log.info("Numerical Integration performed with estimated L2 norm error %6.4e.", error)
         return integral, error
@@ -353,12 +420,12 @@ class NumericalIntegratorClenCur(NumericalIntegratorBase):
 
     def eval_NI_approx(self, a):
         """Evaluate the NI approximation of the integral with a provided quadrature."""
-        return self._NI_eval_w_error(a, self.out_shape, self.eval_contrib)
+        return self._NI_eval_w_error(a, self.out_shape, self.eval_contrib_batch)
 
 
 class NumericalIntegratorClenCurInfinite(NumericalIntegratorClenCur):
-    def __init__(self, out_shape, diag_shape, npoints, log, even):
-        super().__init__(out_shape, diag_shape, npoints, log)
+    def __init__(self, out_shape, diag_shape, npoints, log, even, **kwargs):
+        super().__init__(out_shape, diag_shape, npoints, log, **kwargs)
         self.even = even
 
     def get_quad(self, a):
@@ -367,8 +434,8 @@ class NumericalIntegratorClenCurInfinite(NumericalIntegratorClenCur):
 
 
 class NumericalIntegratorClenCurSemiInfinite(NumericalIntegratorClenCur):
-    def __init__(self, out_shape, diag_shape, npoints, log):
-        super().__init__(out_shape, diag_shape, npoints, log)
+    def __init__(self, out_shape, diag_shape, npoints, log, **kwargs):
+        super().__init__(out_shape, diag_shape, npoints, log, **kwargs)
 
     def get_quad(self, a):
         if a < 0:
@@ -377,8 +444,8 @@ class NumericalIntegratorClenCurSemiInfinite(NumericalIntegratorClenCur):
 
 
 class NumericalIntegratorGaussianSemiInfinite(NumericalIntegratorBase):
-    def __init__(self, out_shape, diag_shape, npoints, log):
-        super().__init__(out_shape, diag_shape, npoints, log)
+    def __init__(self, out_shape, diag_shape, npoints, log, **kwargs):
+        super().__init__(out_shape, diag_shape, npoints, log, **kwargs)
 
     @property
     def npoints(self):
@@ -1,11 +1,15 @@
+import hashlib
 import logging
+import os
 
+import h5py
 import numpy as np
 
 import pyscf.lib
 from vayesta.core.util import dot, einsum, time_string, timer
 from vayesta.rpa.rirpa import momzero_NI, energy_NI
 from vayesta.core.eris import get_cderi
+from vayesta.mpi import mpi
 
 memory_string = lambda: "Memory usage: %.2f GB" % (pyscf.lib.current_memory()[0] / 1e3)
 
@@ -42,6 +46,25 @@ class ssRIRRPA:
         Note that in all cases these compressions will have computational cost O(N_{aux}^2 ov), the same as our later
         computations, and so a tradeoff must be made between reducing the N_{aux} in later calculations vs the cost
         of compression. Default value is 0.
+    ni_batch_size : int, optional
+        Number of frequency points of the numerical integrations evaluated together in stacked BLAS and LAPACK calls.
+        The memory required for intermediates scales linearly with this number. Default value is 1.
+    ni_threads : int, optional
+        Number of threads over which batches of frequency points are distributed. This is mostly useful if the
+        BLAS library is not multithreaded. Default value is 1.
+    ni_mpi : bool, optional
+        Whether to distribute batches of frequency points over all MPI ranks. If True, all ranks need to perform the
+        same RIRPA calculation. Default value is False.
+    mpi_ov : bool, optional
+        Whether to distribute the particle-hole (ov) dimension of the RI factors and moments over all MPI ranks, such
+        that only intermediates of size N_{aux} x N_{aux} or n_{target} x N_{aux} are reduced over the ranks. Each
+        rank then only stores the columns `ov_slice` of the moments. All ranks need to perform the same RIRPA
+        calculation, and this cannot be combined with `ni_mpi`. Default value is False.
+    ri_cache_file : str, optional
+        HDF5 file in which the compressed RI decompositions are stored and from which they are loaded, if available for
+        the same mean-field and `alpha`. Independent of this, they are cached in memory. MPI ranks other than 0 append
+        their rank to the filename. Independently running calculations need to use different files.
+        Default value is None.
     """
 
     def __init__(
@@ -53,6 +76,11 @@ class ssRIRRPA:
         svd_tol=1e-12,
         lov=None,
         compress=0,
+        ni_batch_size=1,
+        ni_threads=1,
+        ni_mpi=False,
+        mpi_ov=False,
+        ri_cache_file=None,
     ):
         self.mf = dfmf
         self.rixc = rixc
@@ -63,6 +91,63 @@ class ssRIRRPA:
         self.lov = lov
         # Determine how many times to attempt compression of low-rank expressions for various matrices.
         self.compress = compress
+        self.ni_batch_size = ni_batch_size
+        self.ni_threads = ni_threads
+        self.ni_mpi = ni_mpi
+        if mpi_ov and ni_mpi:
+            raise ValueError("Frequency points and particle-hole excitations cannot both be distributed over MPI ranks")
+        self.mpi_ov = mpi_ov
+        self.ri_cache_file = ri_cache_file
+        self._ri_cache = {}
+
+    @property
+    def ni_options(self):
+        """Options for the evaluation of frequency points in numerical integrations."""
+        return dict(batch_size=self.ni_batch_size, nthreads=self.ni_threads, use_mpi=self.ni_mpi, mpi_ov=self.mpi_ov)
+
+    def _get_ov_units(self):
+        """Range of the occupied orbitals of both spins, each with all its particle-hole excitations, which are
+        assigned to this MPI rank. Each unit is assigned to the rank in which its center falls, which results in
+        contiguous ranges of similar size."""
+        nocc = np.broadcast_to(self.nocc, 2)
+        nvir = np.broadcast_to(self.nvir, 2)
+        widths = np.repeat(nvir, nocc)
+        starts = np.concatenate([[0], np.cumsum(widths)])
+        owner = ((starts[:-1] + widths / 2) * mpi.size / self.ov_tot).astype(int)
+        u0, u1 = np.searchsorted(owner, mpi.rank, side="left"), np.searchsorted(owner, mpi.rank, side="right")
+        return u0, u1, nocc[0], starts
+
+    @property
+    def ov_slice(self):
+        """Slice of the particle-hole excitations of both spins stored on this MPI rank."""
+        if not self.mpi_ov:
+            return slice(None)
+        u0, u1, nocca, starts = self._get_ov_units()
+        return slice(starts[u0], starts[u1])
+
+    def get_occ_slices(self):
+        """Slices of the alpha and beta occupied orbitals, whose particle-hole excitations are stored on this rank."""
+        if not self.mpi_ov:
+            return slice(None), slice(None)
+        u0, u1, nocca, starts = self._get_ov_units()
+        return slice(min(u0, nocca), min(u1, nocca)), slice(max(u0 - nocca, 0), max(u1 - nocca, 0))
+
+    def _reduce_ov(self, x):
+        """Sum contraction over the particle-hole excitations over all MPI ranks, if these are distributed."""
+        if self.mpi_ov:
+            return mpi.world.allreduce(x)
+        return x
+
+    def _norm_ov(self, x):
+        """L2 norm of an array, whose last dimension are the (possibly distributed) particle-hole excitations."""
+        return np.sqrt(self._reduce_ov(np.linalg.norm(x) ** 2))
+
+    def get_local_target_rot(self, target_rot):
+        """Columns of `target_rot` corresponding to the particle-hole excitations stored on this rank. In mpi_ov mode,
+        `target_rot` can be given for all or only for the local excitations."""
+        if self.mpi_ov and target_rot.shape[1] == self.ov_tot:
+            return target_rot[:, self.ov_slice]
+        return target_rot
 
     @property
     def mol(self):
@@ -165,7 +250,8 @@ class ssRIRRPA:
         max_moment: int
             Maximum moment of the dd response to return.
         target_rot: array_like, of size (n_{target}, o_a v_a + o_b v_b)
-            Projector for one index of the moment.
+            Projector for one index of the moment. If `mpi_ov' is True, this can also contain only the columns
+            `ov_slice' stored on this MPI rank.
         npoints: int, optional.
             Integer number of points to use in numerical integrations; will be increased to next highest multiple of
             4 for error estimation purposes. Default: 48 (excessive).
@@ -194,7 +280,8 @@ class ssRIRRPA:
         Returns
         -------
         moments: array_like, shape (max_moment + 1, n_{tar}, o_a v_a + o_b v_b)
-            Array storing the i^th dd moment in the space defined by `target_rot' in moments[i].
+            Array storing the i^th dd moment in the space defined by `target_rot' in moments[i]. If `mpi_ov' is True,
+            only the columns `ov_slice' stored on this MPI rank.
         err0: tuple.
             Bounds on the error, in form (upper_bound, lower_bound). If `analytic_lower_bound'=False lower bound
             will be None.
@@ -204,8 +291,9 @@ class ssRIRRPA:
         if target_rot is None:
             self.log.warning("Warning; generating full moment rather than local component. Will scale as O(N^5).")
             target_rot = np.eye(self.ov_tot)
+        target_rot = self.get_local_target_rot(target_rot)
 
-        ri_decomps = self.get_compressed_MP()
+        ri_decomps = self.get_compressed_MP(kwargs.get("alpha", 1.0))
         ri_mp, ri_apb, ri_amb = ri_decomps
         # First need to calculate zeroth moment.
         moments = np.zeros((max_moment + 1,) + target_rot.shape)
@@ -214,12 +302,16 @@ class ssRIRRPA:
         t_start_higher = timer()
         if max_moment > 0:
             # Grab mean.
-            D = self.D
-            moments[1] = einsum("pq,q->pq", target_rot, D) + dot(target_rot, ri_amb[0].T, ri_amb[1])
+            D = self.D[self.ov_slice]
+            moments[1] = einsum("pq,q->pq", target_rot, D) + dot(
+                self._reduce_ov(dot(target_rot, ri_amb[0].T)), ri_amb[1]
+            )
 
         if max_moment > 1:
             for i in range(2, max_moment + 1):
-                moments[i] = einsum("pq,q->pq", moments[i - 2], D**2) + dot(moments[i - 2], ri_mp[1].T, ri_mp[0])
+                moments[i] = einsum("pq,q->pq", moments[i - 2], D**2) + dot(
+                    self._reduce_ov(dot(moments[i - 2], ri_mp[1].T)), ri_mp[0]
+                )
         self.record_memory()
         if max_moment > 0:
             self.log.info(
@@ -229,6 +321,40 @@ class ssRIRRPA:
             self.log.info("Overall RIRPA Moments wall time:  %s", time_string(timer() - t_start))
         return moments, err0
 
+    def kernel_moms_stacked(self, max_moment, target_rots, **kwargs):
+        """Calculates the density-density moments up to and including `max_moment' for several target spaces, such as
+        those of all fragments, in a single pass.
+        The target rotations are stacked, such that the RI decompositions, the optimisation of the quadrature and the
+        solution of the auxiliary space equations at each frequency point are shared between all target spaces.
+
+        Parameters
+        ----------
+        max_moment: int
+            Maximum moment of the dd response to return.
+        target_rots: list of array_like or None, each of size (n_{target,i}, o_a v_a + o_b v_b)
+            Projectors for one index of the moments. Entries which are None are treated as having no rows.
+        **kwargs:
+            Further keyword arguments are passed to `kernel_moms'.
+
+        Returns
+        -------
+        moments: list of array_like, each of shape (max_moment + 1, n_{target,i}, o_a v_a + o_b v_b)
+            The moments in the space of each target rotation.
+        err0: tuple.
+            Bounds on the error of the zeroth moment of all target spaces; see `kernel_moms'.
+        """
+        rots = [x for x in target_rots if x is not None]
+        if len(rots) == 0:
+            raise ValueError("At least one target rotation is required.")
+        target_rot = np.concatenate(rots, axis=0)
+        ntarget = [(x.shape[0] if x is not None else 0) for x in target_rots]
+        if target_rot.shape[0] > 0:
+            moments, err0 = self.kernel_moms(max_moment, target_rot, **kwargs)
+        else:
+            target_rot = self.get_local_target_rot(target_rot)
+            moments, err0 = np.zeros((max_moment + 1,) + target_rot.shape), (None, None)
+        return np.split(moments, np.cumsum(ntarget)[:-1], axis=1), err0
+
     def _kernel_mom0(
         self,
         target_rot=None,
@@ -266,6 +392,9 @@ class ssRIRRPA:
         if target_rot is None:
             self.log.warning("Warning; generating full moment rather than local component. Will scale as O(N^5).")
             target_rot = np.eye(self.ov_tot)
+        target_rot = self.get_local_target_rot(target_rot)
+        if self.mpi_ov and (adaptive_quad or analytic_lower_bound):
+            raise NotImplementedError("Adaptive quadrature and analytic lower bound not supported with mpi_ov.")
         if ri_decomps is None:
             ri_mp, ri_apb, ri_amb = self.get_compressed_MP(alpha)
         else:
@@ -276,18 +405,19 @@ class ssRIRRPA:
         # and so
         #   eta0 = (integral + integral_offset) P^{-1} + moment_offset
         offset_niworker = None
-        inputs = (self.D, ri_mp[0], ri_mp[1], target_rot, npoints, self.log)
+        D = self.D[self.ov_slice]
+        inputs = (D, ri_mp[0], ri_mp[1], target_rot, npoints, self.log)
         if integral_deduct == "D":
             # Evaluate (MP)^{1/2} - D,
-            niworker = momzero_NI.MomzeroDeductD(*inputs)
-            integral_offset = einsum("lp,p->lp", target_rot, self.D)
+            niworker = momzero_NI.MomzeroDeductD(*inputs, **self.ni_options)
+            integral_offset = einsum("lp,p->lp", target_rot, D)
         elif integral_deduct is None:
             # Explicitly evaluate (MP)^{1/2}, with no offsets.
-            niworker = momzero_NI.MomzeroDeductNone(*inputs)
+            niworker = momzero_NI.MomzeroDeductNone(*inputs, **self.ni_options)
             integral_offset = np.zeros_like(target_rot)
         elif integral_deduct == "HO":
-            niworker = momzero_NI.MomzeroDeductHigherOrder(*inputs)
-            offset_niworker = momzero_NI.MomzeroOffsetCalcGaussLag(*inputs)
+            niworker = momzero_NI.MomzeroDeductHigherOrder(*inputs, **self.ni_options)
+            offset_niworker = momzero_NI.MomzeroOffsetCalcGaussLag(*inputs, **self.ni_options)
             estval, offset_err = offset_niworker.kernel()
             # This computes the required value analytically, but at N^5 cost. Just keeping around for debugging.
             # mat = np.zeros(self.D.shape * 2)
@@ -295,7 +425,7 @@ class ssRIRRPA:
             # mat = (mat.T + self.D).T
             # estval2 = einsum("rp,pq,np,nq->rq", target_rot, mat ** (-1), ri_mp[0], ri_mp[1])
             # self.log.info("Error in numerical Offset Approximation=%6.4e",abs(estval - estval2).max())
-            integral_offset = einsum("lp,p->lp", target_rot, self.D) + estval
+            integral_offset = einsum("lp,p->lp", target_rot, D) + estval
         else:
             raise ValueError("Unknown integral offset specification.`")
 
@@ -308,7 +438,7 @@ class ssRIRRPA:
         else:
             integral, upper_bound = niworker.kernel(a=ainit, opt_quad=opt_quad)
 
-        ri_apb_inv = construct_inverse_RI(self.D, ri_apb)
+        ri_apb_inv = construct_inverse_RI(D, ri_apb, mpi_ov=self.mpi_ov)
 
         mom0 = self.mult_apbinv(integral + integral_offset, ri_apb_inv)
 
@@ -316,9 +446,9 @@ class ssRIRRPA:
         # Use Cauchy-Schwartz to both obtain an upper bound on resulting mom0 error, and efficiently obtain upper bound
         # on norm of low-rank portion of P^{-1}.
         if upper_bound is not None:
-            pinv_norm = np.linalg.norm(self.D ** (-2)) + np.linalg.norm(ri_apb_inv[0]) * np.linalg.norm(ri_apb_inv[1])
+            pinv_norm = self._norm_ov(D ** (-2)) + self._norm_ov(ri_apb_inv[0]) * self._norm_ov(ri_apb_inv[1])
             mom0_ub = upper_bound * pinv_norm
-            self.check_errors(mom0_ub, target_rot.size)
+            self.check_errors(mom0_ub, target_rot.shape[0] * self.ov_tot)
         else:
             mom0_ub = None
 
@@ -331,8 +461,8 @@ class ssRIRRPA:
     def mult_apbinv(self, integral, ri_apb_inv):
         if self.compress > 5:
             ri_apb_inv = self.compress_low_rank(*ri_apb_inv, name="(A+B)^-1")
-        mom0 = integral * (self.D ** (-1))[None]
-        mom0 -= dot(dot(integral, ri_apb_inv[0].T), ri_apb_inv[1])
+        mom0 = integral * (self.D[self.ov_slice] ** (-1))[None]
+        mom0 -= dot(self._reduce_ov(dot(integral, ri_apb_inv[0].T)), ri_apb_inv[1])
         return mom0
 
     def test_eta0_error(self, mom0, target_rot, ri_apb, ri_amb):
@@ -373,12 +503,14 @@ class ssRIRRPA:
     def kernel_trMPrt(self, npoints=48, ainit=10):
         """Evaluate Tr((MP)^(1/2))."""
         ri_mp, ri_apb, ri_amb = self.get_compressed_MP()
-        inputs = (self.D, ri_mp[0], ri_mp[1], npoints, self.log)
+        D = self.D[self.ov_slice]
+        inputs = (D, ri_mp[0], ri_mp[1], npoints, self.log)
 
-        niworker = energy_NI.NITrRootMP(*inputs)
+        niworker = energy_NI.NITrRootMP(*inputs, **self.ni_options)
         integral, err = niworker.kernel(a=ainit, opt_quad=True)
         # Compute offset; possible analytically in N^3 for diagonal.
-        offset = sum(self.D) + 0.5 * np.tensordot(ri_mp[0] * (self.D ** (-1)), ri_mp[1], ((0, 1), (0, 1)))
+        offset = sum(D) + 0.5 * np.tensordot(ri_mp[0] * (D ** (-1)), ri_mp[1], ((0, 1), (0, 1)))
+        offset = self._reduce_ov(offset)
         return integral[0] + offset, err
 
     def kernel_energy(self, npoints=48, ainit=10, correction="linear"):
@@ -387,7 +519,7 @@ class ssRIRRPA:
         e2 = 0.0
         ri_apb_eri, ri_apb_eri_neg = self.get_apb_eri_ri()
         # Note that eri contribution to A and B is equal, so can get trace over one by dividing by two
-        e3 = sum(self.D) + einsum("np,np->", ri_apb_eri, ri_apb_eri) / 2
+        e3 = sum(self.D[self.ov_slice]) + einsum("np,np->", ri_apb_eri, ri_apb_eri) / 2
         if ri_apb_eri_neg is not None:
             e3 -= einsum("np,np->", ri_apb_eri_neg, ri_apb_eri_neg) / 2
         err /= 2
@@ -397,12 +529,13 @@ class ssRIRRPA:
                 eta0_xc, errs = self.kernel_moms(0, target_rot=ri_b_xc[0], npoints=npoints, ainit=ainit)
                 eta0_xc = eta0_xc[0]
                 err = tuple([(err**2 + x / 2**2) ** 0.5 if x is not None else None for x in errs])
-                val = np.dot(eta0_xc, ri_b_xc[1].T).trace() / 2
+                val = self._reduce_ov(np.dot(eta0_xc, ri_b_xc[1].T).trace()) / 2
                 self.log.info("Approximated correlation energy contribution: %e", val)
                 e2 -= val
                 e3 += einsum("np,np->", ri_a_xc[0], ri_a_xc[1]) - einsum("np,np->", ri_b_xc[0], ri_b_xc[1]) / 2
             elif correction.lower() == "xc_ac":
                 pass
+        e3 = self._reduce_ov(e3)
         self.e_corr_ss = 0.5 * (e1 + e2 - e3)
         self.log.info(
             "Total RIRPA Energy Calculation wall time:  %s",
@@ -424,12 +557,13 @@ class ssRIRRPA:
         local_rot describes the rotation of the ov-excitations to the space of local excitations within a cluster, while
         fragment_projectors gives the projector within this local excitation space to the actual fragment."""
         # Get the coulomb integrals.
-        ri_eri, ri_eri_neg = self.get_apb_eri_ri() / np.sqrt(2)
+        ri_eri, ri_eri_neg = self.get_apb_eri_ri()
+        ri_eri = ri_eri / np.sqrt(2)
 
         # TODO use ri_eri_neg here.
         def get_eta_alpha(alpha, target_rot):
-            newrirpa = self.__class__(self.mf, rixc=self.rixc, log=self.log)
-            moms, errs = newrirpa.kernel_moms(0, target_rot=target_rot, npoints=npoints, alpha=alpha)
+            # The RI decompositions for each alpha are cached for repeated calls.
+            moms, errs = self.kernel_moms(0, target_rot=target_rot, npoints=npoints, alpha=alpha)
             return moms[0]
 
         def run_ac_inter(func, deg=5):
@@ -499,6 +633,8 @@ class ssRIRRPA:
         lowest eigenvalues. For a fixed number of eigenvalues in each case this scales as O(N^3), so shouldn't be
         prohibitively expensive.
         """
+        if self.mpi_ov:
+            raise NotImplementedError("Calculation of the RPA gap not supported with mpi_ov.")
         ri_mp, ri_apb, ri_amb = self.get_compressed_MP()
 
         min_d = self.D.min()
@@ -583,6 +719,108 @@ class ssRIRRPA:
         return e ** (0.5), xpy, xmy
 
     def get_compressed_MP(self, alpha=1.0):
+        """Get the compressed RI decompositions of (A-B)(A+B), A+B and A-B for the electron interaction scaled by
+        `alpha`.
+
+        The decompositions are cached for the current mean-field state, such that repeated calculations only construct
+        them once. If `ri_cache_file` is set, they are also stored in and loaded from this HDF5 file.
+        """
+        mf_key = self._get_state_key()
+        key = (float(alpha), mf_key)
+        if key not in self._ri_cache:
+            # Drop the decompositions of any previous mean-field state.
+            self._ri_cache = {k: v for k, v in self._ri_cache.items() if k[1] == mf_key}
+            ri_decomps = self._load_ri_decomps(key) if self.ri_cache_file is not None else None
+            if ri_decomps is None:
+                ri_decomps = self.make_compressed_MP(alpha)
+                if self.ri_cache_file is not None:
+                    self._save_ri_decomps(key, ri_decomps)
+            # Protect the cached arrays against modifications by callers.
+            for x in ri_decomps:
+                for y in x:
+                    y.flags.writeable = False
+            self._ri_cache[key] = ri_decomps
+        return self._ri_cache[key]
+
+    def clear_ri_cache(self):
+        """Remove all cached RI decompositions from memory; the file `ri_cache_file` is not modified."""
+        self._ri_cache = {}
+
+    def update_mf(self, mf, lov=None):
+        """Update the underlying mean-field object and invalidate the cached RI decompositions.
+
+        Parameters
+        ----------
+        mf : pyscf.scf.SCF
+            New density-fitted mean-field object.
+        lov : np.ndarray or tuple of np.ndarray, optional
+            Occupied-virtual CDERIs in the MO basis of the new mean-field. If None, recalculated from AOs.
+            Default value is None.
+        """
+        self.mf = mf
+        self.lov = lov
+        self.clear_ri_cache()
+
+    def _get_state_key(self):
+        """Fingerprint of the mean-field state and xc kernel, which determine the RI decompositions."""
+        h = hashlib.sha1()
+        for x in (self.mf.mo_coeff, self.mf.mo_energy, self.mf.mo_occ, self.rixc):
+            for y in x if isinstance(x, (tuple, list)) else [x]:
+                # Do not hash the memory address of None, which changes between processes:
+                if y is None:
+                    h.update(b"None")
+                    continue
+                if isinstance(y, (tuple, list)):
+                    y = np.concatenate([np.ravel(z) for z in y])
+                y = np.ascontiguousarray(y)
+                h.update(("%s%r" % (y.dtype, y.shape)).encode())
+                h.update(y.tobytes())
+        return h.hexdigest()
+
+    def _get_ri_cache_file(self):
+        """File of the RI decompositions of this MPI rank. Ranks other than 0 append their rank to the filename."""
+        if mpi.rank == 0:
+            return self.ri_cache_file
+        return "%s.%d" % (self.ri_cache_file, mpi.rank)
+
+    def _get_ri_cache_group(self, key):
+        alpha, mf_key = key
+        name = "%s_alpha%r" % (mf_key, alpha)
+        if self.mpi_ov:
+            name += "_rank%d_of_%d" % (mpi.rank, mpi.size)
+        return "%s/%s" % (type(self).__name__, name)
+
+    def _load_ri_decomps(self, key):
+        filename = self._get_ri_cache_file()
+        if not os.path.isfile(filename):
+            return None
+        name = self._get_ri_cache_group(key)
+        with h5py.File(filename, "r") as h5file:
+            if name not in h5file:
+                return None
+            grp = h5file[name]
+            if grp.attrs["compress"] != self.compress or grp.attrs["svd_tol"] != self.svd_tol:
+                return None
+            ri_decomps = tuple((grp["%s_L" % x][()], grp["%s_R" % x][()]) for x in ("mp", "apb", "amb"))
+        self.log.debug("Loaded RI decompositions from '%s'.", filename)
+        return ri_decomps
+
+    def _save_ri_decomps(self, key, ri_decomps):
+        filename = self._get_ri_cache_file()
+        name = self._get_ri_cache_group(key)
+        with h5py.File(filename, "a") as h5file:
+            if name in h5file:
+                del h5file[name]
+            grp = h5file.create_group(name)
+            grp.attrs["compress"] = self.compress
+            grp.attrs["svd_tol"] = self.svd_tol
+            for x, (ri_l, ri_r) in zip(("mp", "apb", "amb"), ri_decomps):
+                grp.create_dataset("%s_L" % x, data=ri_l)
+                grp.create_dataset("%s_R" % x, data=ri_r)
+        self.log.debug("Saved RI decompositions to '%s'.", filename)
+
+    def make_compressed_MP(self, alpha=1.0):
+        """Construct the compressed RI decompositions; see `get_compressed_MP`."""
         # AB corresponds to scaling RI components at this point.
         ri_apb, ri_amb = self.construct_RI_AB()
         if self.compress > 3:
@@ -591,7 +829,7 @@ class ssRIRRPA:
         ri_apb = [x * alpha ** (0.5) for x in ri_apb]
         ri_amb = [x * alpha ** (0.5) for x in ri_amb]
 
-        ri_mp = construct_product_RI(self.D, ri_amb, ri_apb)
+        ri_mp = construct_product_RI(self.D[self.ov_slice], ri_amb, ri_apb, mpi_ov=self.mpi_ov)
         if self.compress > 0:
             ri_mp = self.compress_low_rank(*ri_mp, name="(A-B)(A+B)")
         return ri_mp, ri_apb, ri_amb
@@ -635,22 +873,26 @@ class ssRIRRPA:
         )
 
     def compress_low_rank(self, ri_l, ri_r, name=None):
-        return compress_low_rank(ri_l, ri_r, tol=self.svd_tol, log=self.log, name=name)
+        return compress_low_rank(ri_l, ri_r, tol=self.svd_tol, log=self.log, name=name, mpi_ov=self.mpi_ov)
 
     def get_apb_eri_ri(self):
         # Coulomb integrals only contribute to A+B.
-        lov, lov_neg = self.get_cderi()
+        if self.mpi_ov:
+            # Only the alpha and beta excitations of this rank, which generally differ.
+            (lova, lova_neg), (lovb, lovb_neg) = [self.get_cderi(occ_slice=x) for x in self.get_occ_slices()]
+        else:
+            lova, lova_neg = lovb, lovb_neg = self.get_cderi()
 
-        lov = lov.reshape((lov.shape[0], -1))
-        if lov_neg is not None:
-            lov_neg = lov_neg.reshape((lov_neg.shape[0], -1))
+        lova, lovb = [x.reshape((x.shape[0], -1)) for x in (lova, lovb)]
+        if lova_neg is not None:
+            lova_neg, lovb_neg = [x.reshape((x.shape[0], -1)) for x in (lova_neg, lovb_neg)]
 
         # Need to include factor of two since eris appear in both A and B.
-        ri_apb_eri = np.sqrt(2) * np.concatenate([lov, lov], axis=1)
+        ri_apb_eri = np.sqrt(2) * np.concatenate([lova, lovb], axis=1)
 
         ri_neg_apb_eri = None
-        if lov_neg is not None:
-            ri_neg_apb_eri = np.sqrt(2) * np.concatenate([lov_neg, lov_neg], axis=1)
+        if lova_neg is not None:
+            ri_neg_apb_eri = np.sqrt(2) * np.concatenate([lova_neg, lovb_neg], axis=1)
 
         return ri_apb_eri, ri_neg_apb_eri
 
@@ -675,13 +917,15 @@ class ssRIRRPA:
             einsum("npq,qi,pa->nia", self.rixc[1][1], self.mo_coeff_occ, self.mo_coeff_vir).reshape((-1, self.ov)),
         ]
 
-        ri_a_xc = [np.concatenate([x, y], axis=1) for x, y in zip(ri_a_aa, ri_a_bb)]
-        ri_b_xc = [np.concatenate([x, y], axis=1) for x, y in zip(ri_b_aa, ri_b_bb)]
+        ri_a_xc = [np.concatenate([x, y], axis=1)[:, self.ov_slice] for x, y in zip(ri_a_aa, ri_a_bb)]
+        ri_b_xc = [np.concatenate([x, y], axis=1)[:, self.ov_slice] for x, y in zip(ri_b_aa, ri_b_bb)]
         return ri_a_xc, ri_b_xc
 
-    def get_cderi(self, blksize=None):
+    def get_cderi(self, blksize=None, occ_slice=None):
+        """Occupied-virtual CDERIs, optionally only for the occupied orbitals in `occ_slice`."""
+        occ_slice = occ_slice if occ_slice is not None else slice(None)
         if self.lov is None:
-            return get_cderi(self, (self.mo_coeff_occ, self.mo_coeff_vir), compact=False, blksize=blksize)
+            return get_cderi(self, (self.mo_coeff_occ[:, occ_slice], self.mo_coeff_vir), compact=False, blksize=blksize)
         else:
             if isinstance(self.lov, tuple):
                 lov, lov_neg = self.lov
@@ -689,9 +933,13 @@ class ssRIRRPA:
                 assert self.lov.shape == (self.naux_eri, self.nocc, self.nvir)
                 lov = self.lov
                 lov_neg = None
-            return lov, lov_neg
+            if lov_neg is not None:
+                lov_neg = lov_neg[:, occ_slice]
+            return lov[:, occ_slice], lov_neg
 
     def test_spectral_rep(self, freqs):
+        if self.mpi_ov:
+            raise NotImplementedError("Test of the spectral representation not supported with mpi_ov.")
         from vayesta.rpa import ssRPA
         import scipy
 
@@ -732,10 +980,17 @@ class ssRIRRPA:
         self.log.info("  %s", memory_string())
 
 
-def construct_product_RI(D, ri_1, ri_2):
+def _reduce_ov(x, mpi_ov):
+    if mpi_ov:
+        return mpi.world.allreduce(x)
+    return x
+
+
+def construct_product_RI(D, ri_1, ri_2, mpi_ov=False):
     """Given two matrices expressed as low-rank modifications, cderi_1 and cderi_2, of some full-rank matrix D,
     construct the RI expression for the deviation of their product from D**2.
-    The rank of the resulting deviation is at most the sum of the ranks of the original modifications."""
+    The rank of the resulting deviation is at most the sum of the ranks of the original modifications.
+    If `mpi_ov` is True, the columns of D and all RI expressions are distributed over the MPI ranks."""
     # Construction of this matrix is the computationally limiting step of this construction (O(N^4)) in our usual use,
     # but we only need to perform it once per calculation since it's frequency-independent.
     if type(ri_1) == np.ndarray:
@@ -748,14 +1003,14 @@ def construct_product_RI(D, ri_1, ri_2):
     else:
         (ri_2_L, ri_2_R) = ri_2
 
-    U = np.dot(ri_1_R, ri_2_L.T)
+    U = _reduce_ov(np.dot(ri_1_R, ri_2_L.T), mpi_ov)
 
     ri_L = np.concatenate([ri_1_L, einsum("p,np->np", D, ri_2_L) + np.dot(U.T, ri_1_L) / 2], axis=0)
     ri_R = np.concatenate([einsum("p,np->np", D, ri_1_R) + np.dot(U, ri_2_R) / 2, ri_2_R], axis=0)
     return ri_L, ri_R
 
 
-def construct_inverse_RI(D, ri):
+def construct_inverse_RI(D, ri, mpi_ov=False):
     if type(ri) == np.ndarray and len(ri.shape) == 2:
         ri_L = ri_R = ri
     else:
@@ -763,7 +1018,7 @@ def construct_inverse_RI(D, ri):
 
     naux = ri_R.shape[0]
     # This construction scales as O(N^4).
-    U = einsum("np,p,mp->nm", ri_R, D ** (-1), ri_L)
+    U = _reduce_ov(einsum("np,p,mp->nm", ri_R, D ** (-1), ri_L), mpi_ov)
     # This inversion and square root should only scale as O(N^3).
     U = np.linalg.inv(np.eye(naux) + U)
     # Want to split matrix between left and right fairly evenly; could just associate to one side or the other.
@@ -774,10 +1029,10 @@ def construct_inverse_RI(D, ri):
     return einsum("p,np,nm->mp", D ** (-1), ri_L, urt_l), einsum("p,np,nm->mp", D ** (-1), ri_R, urt_r.T)
 
 
-def compress_low_rank(ri_l, ri_r, tol=1e-12, log=None, name=None):
+def compress_low_rank(ri_l, ri_r, tol=1e-12, log=None, name=None, mpi_ov=False):
     naux_init = ri_l.shape[0]
 
-    inner_prod = dot(ri_l, ri_r.T)
+    inner_prod = _reduce_ov(dot(ri_l, ri_r.T), mpi_ov)
 
     e, c = np.linalg.eig(inner_prod)
 
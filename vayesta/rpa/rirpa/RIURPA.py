@@ -98,7 +98,7 @@ class ssRIURPA(ssRIRRPA):
     def get_apb_eri_ri(self):
         # Coulomb integrals only contribute to A+B.
         # This needs to be optimised, but will do for now.
-        (lova, lovb), (lova_neg, lovb_neg) = self.get_cderi()
+        (lova, lovb), (lova_neg, lovb_neg) = self.get_cderi(occ_slice=self.get_occ_slices())
 
         lova = lova.reshape((lova.shape[0], -1))
         lovb = lovb.reshape((lovb.shape[0], -1))
@@ -150,14 +150,17 @@ class ssRIURPA(ssRIRRPA):
             ).reshape((-1, self.ov[1])),
         ]
 
-        ri_a_xc = [np.concatenate([x, y], axis=1) for x, y in zip(ri_a_aa, ri_a_bb)]
-        ri_b_xc = [np.concatenate([x, y], axis=1) for x, y in zip(ri_b_aa, ri_b_bb)]
+        ri_a_xc = [np.concatenate([x, y], axis=1)[:, self.ov_slice] for x, y in zip(ri_a_aa, ri_a_bb)]
+        ri_b_xc = [np.concatenate([x, y], axis=1)[:, self.ov_slice] for x, y in zip(ri_b_aa, ri_b_bb)]
         return ri_a_xc, ri_b_xc
 
-    def get_cderi(self, blksize=None):
+    def get_cderi(self, blksize=None, occ_slice=None):
+        """Occupied-virtual CDERIs, optionally only for the alpha and beta occupied orbitals in `occ_slice`."""
+        sa, sb = occ_slice if occ_slice is not None else (slice(None), slice(None))
         if self.lov is None:
-            la, la_neg = get_cderi(self, (self.mo_coeff_occ[0], self.mo_coeff_vir[0]), compact=False, blksize=blksize)
-            lb, lb_neg = get_cderi(self, (self.mo_coeff_occ[1], self.mo_coeff_vir[1]), compact=False, blksize=blksize)
+            cocca, coccb = self.mo_coeff_occ[0][:, sa], self.mo_coeff_occ[1][:, sb]
+            la, la_neg = get_cderi(self, (cocca, self.mo_coeff_vir[0]), compact=False, blksize=blksize)
+            lb, lb_neg = get_cderi(self, (coccb, self.mo_coeff_vir[1]), compact=False, blksize=blksize)
         else:
             if isinstance(self.lov, tuple):
                 (la, lb), (la_neg, lb_neg) = self.lov
@@ -166,4 +169,7 @@ class ssRIURPA(ssRIRRPA):
                 assert self.lov[0][1].shape == (self.naux_eri, self.nocc[1], self.nvir[1])
                 la, lb = self.lov
                 la_neg = lb_neg = None
+            la, lb = la[:, sa], lb[:, sb]
+            if la_neg is not None:
+                la_neg, lb_neg = la_neg[:, sa], lb_neg[:, sb]
         return (la, lb), (la_neg, lb_neg)
@@ -11,6 +11,11 @@ from pyscf import lib
 class ssRIdRRPA(ssRIRRPA):
     """Class for computing direct RPA correlated quantites with a restricted reference state."""
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.mpi_ov:
+            raise NotImplementedError("Distributed particle-hole excitations not supported in dRPA specific code.")
+
     @with_doc(ssRIRRPA.kernel_moms)
     def kernel_moms(self, max_moment, target_rot=None, return_spatial=False, **kwargs):
         t_start = timer()
@@ -23,7 +28,7 @@ class ssRIdRRPA(ssRIRRPA):
             else:
                 target_rot = np.eye(self.ov_tot)
 
-        ri_decomps = self.get_compressed_MP()
+        ri_decomps = self.get_compressed_MP(kwargs.get("alpha", 1.0))
         ri_mp, ri_apb, ri_amb = ri_decomps
         # First need to calculate zeroth moment. This only generates the spin-independent contribution in a single
         # spin channel; the spin-dependent contribution is just the identity rotated to our target rotation.
@@ -114,8 +119,8 @@ class ssRIdRRPA(ssRIRRPA):
         # resolved basis. As such, we need to be careful to ensure we know which terms are spin-diagonal and which are
         # spin-invariant.
 
-        niworker = MomzeroDeductHigherOrder_dRHF(*inputs)
-        offset_niworker = MomzeroOffsetCalcGaussLag(*inputs)
+        niworker = MomzeroDeductHigherOrder_dRHF(*inputs, **self.ni_options)
+        offset_niworker = MomzeroOffsetCalcGaussLag(*inputs, **self.ni_options)
 
         if return_niworker:
             return niworker, offset_niworker
@@ -181,7 +186,7 @@ class ssRIdRRPA(ssRIRRPA):
         ri_mp, ri_apb, ri_amb = self.get_compressed_MP()
         inputs = (self.eps, ri_mp[0], ri_mp[1], npoints, self.log)
 
-        niworker = NITrRootMP_dRHF(*inputs)
+        niworker = NITrRootMP_dRHF(*inputs, **self.ni_options)
         integral, err = niworker.kernel(a=ainit, opt_quad=True)
         # Compute offset; possible analytically in N^3 for diagonal.
         offset = 2 * sum(self.eps) + np.tensordot(ri_mp[0] * self.eps ** (-1), ri_mp[1], ((0, 1), (0, 1)))
@@ -207,7 +212,8 @@ class ssRIdRRPA(ssRIRRPA):
         )
         return self.e_corr_ss, err
 
-    def get_compressed_MP(self, alpha=1.0):
+    @with_doc(ssRIRRPA.make_compressed_MP)
+    def make_compressed_MP(self, alpha=1.0):
         lov, lov_neg = self.get_cderi()
 
         lov = lov.reshape(lov.shape[0], self.ov)
@@ -7,6 +7,9 @@ import pyscf.scf
 def ssRIRPA(mf, *args, **kwargs):
     if isinstance(mf, pyscf.scf.uhf.UHF):
         return ssRIURPA(mf, *args, **kwargs)
+    if kwargs.get("mpi_ov", False):
+        # The specialised dRPA code does not support distributed particle-hole excitations.
+        return ssRIRRPA(mf, *args, **kwargs)
     if "rixc" in kwargs:
         if kwargs["rixc"] is not None:
             return ssRIRRPA(mf, *args, **kwargs)
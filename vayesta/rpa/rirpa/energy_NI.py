@@ -13,13 +13,15 @@ class NIError(Exception):
 
 
 class NITrRootMP(NumericalIntegratorClenCurInfinite):
-    def __init__(self, D, S_L, S_R, npoints, log):
+    distributed_output = False
+
+    def __init__(self, D, S_L, S_R, npoints, log, **kwargs):
         self.D = D
         self.S_L = S_L
         self.S_R = S_R
         out_shape = (1,)
         diag_shape = (1,)
-        super().__init__(out_shape, diag_shape, npoints, log, True)
+        super().__init__(out_shape, diag_shape, npoints, log, True, **kwargs)
         self.diagRI = einsum("np,np->p", self.S_L, self.S_R)
         self.diagmat1 = self.D**2 + self.diagRI
         self.diagmat2 = self.D**2
@@ -37,7 +39,12 @@ class NITrRootMP(NumericalIntegratorClenCurInfinite):
         This is generally the limiting
         """
         S_L = self.S_L * self.get_F(freq)[None]
-        return dot(self.S_R, S_L.T)
+        return self.reduce_ov(dot(self.S_R, S_L.T))
+
+    def get_Q_batch(self, freqs):
+        """Construct Q = S_R F S_L^T for several frequency points, stacked along the first axis."""
+        F = self.get_F(np.asarray(freqs)[:, None])
+        return self.reduce_ov(np.matmul(self.S_R[None] * F[:, None], self.S_L.T))
 
     @property
     def diagmat1(self):
@@ -98,10 +105,19 @@ class NITrRootMP(NumericalIntegratorClenCurInfinite):
         F = self.get_F(freq)
         val_aux = np.linalg.inv(np.eye(self.n_aux) + Q) - np.eye(self.n_aux)
         lhs = dot(val_aux, self.S_L * F[None])
-        res = np.tensordot(lhs, self.S_R * F[None], ((0, 1), (0, 1)))
+        res = self.reduce_ov(np.tensordot(lhs, self.S_R * F[None], ((0, 1), (0, 1))))
         res = (freq**2) * res / np.pi
         return np.array([res])
 
+    def eval_contrib_batch(self, freqs):
+        freqs = np.asarray(freqs)
+        F = self.get_F(freqs[:, None])
+        Q = self.get_Q_batch(freqs) + np.eye(self.n_aux)[None]
+        # Tr(((I + Q)^{-1} - I) S_L F^2 S_R^T), using LU solves rather than explicit inverses:
+        G = self.reduce_ov(np.matmul(self.S_L[None] * (F**2)[:, None], self.S_R.T))
+        res = np.trace(np.linalg.solve(Q, G), axis1=1, axis2=2) - np.trace(G, axis1=1, axis2=2)
+        return ((freqs**2) * res / np.pi)[:, None]
+
 
 class NITrRootMP_dRHF(NITrRootMP):
     """All provided quantities are now in spatial orbitals. This actually only requires an additional factor in the
@@ -111,5 +127,11 @@ class NITrRootMP_dRHF(NITrRootMP):
         # Have equal contributions from both spin channels.
         return 2 * super().get_Q(freq)
 
+    def get_Q_batch(self, freqs):
+        return 2 * super().get_Q_batch(freqs)
+
     def eval_contrib(self, freq):
         return 2 * super().eval_contrib(freq)
+
+    def eval_contrib_batch(self, freqs):
+        return 2 * super().eval_contrib_batch(freqs)
@@ -13,7 +13,9 @@ from vayesta.rpa.rirpa.NI_eval import (
 
 
 class NIMomZero(NumericalIntegratorClenCurInfinite):
-    def __init__(self, D, S_L, S_R, target_rot, npoints, log):
+    diag_broadcast = True
+
+    def __init__(self, D, S_L, S_R, target_rot, npoints, log, **kwargs):
         self.D = D
         self.S_L = S_L
         self.S_R = S_R
@@ -21,7 +23,7 @@ class NIMomZero(NumericalIntegratorClenCurInfinite):
         out_shape = self.target_rot.shape
         diag_shape = self.D.shape
         self.diagmat1 = self.diagmat2 = None
-        super().__init__(out_shape, diag_shape, npoints, log, True)
+        super().__init__(out_shape, diag_shape, npoints, log, True, **kwargs)
 
     @property
     def n_aux(self):
@@ -36,7 +38,25 @@ class NIMomZero(NumericalIntegratorClenCurInfinite):
         This is generally the limiting step.
         """
         S_L = self.S_L * self.get_F(freq)[None]
-        return dot(self.S_R, S_L.T)
+        return self.reduce_ov(dot(self.S_R, S_L.T))
+
+    def get_Q_batch(self, freqs):
+        """Construct Q = S_R F S_L^T for several frequency points, stacked along the first axis."""
+        F = self.get_F(np.asarray(freqs)[:, None])
+        return self.reduce_ov(np.matmul(self.S_R[None] * F[:, None], self.S_L.T))
+
+    def solve_aux(self, Q, lres):
+        """Evaluate lres (I + Q)^{-1} for stacked Q and lres, using LU solves rather than explicit inverses."""
+        Q = Q + np.eye(self.n_aux)[None]
+        return np.linalg.solve(Q.transpose(0, 2, 1), lres.transpose(0, 2, 1)).transpose(0, 2, 1)
+
+    def _get_lres_batch(self, freqs):
+        """Frequency-dependent quantities for batched evaluations: F, Q, (target_rot F) and (target_rot F) S_L^T."""
+        F = self.get_F(np.asarray(freqs)[:, None])
+        Q = self.get_Q_batch(freqs)
+        lrot = self.target_rot[None] * F[:, None]
+        lres = self.reduce_ov(np.matmul(lrot, self.S_L.T))
+        return F, Q, lrot, lres
 
     @property
     def diagmat1(self):
@@ -100,10 +120,18 @@ class MomzeroDeductNone(NIMomZero):
         rrot = F
         lrot = self.target_rot * rrot[None]
         val_aux = np.linalg.inv(np.eye(self.n_aux) + Q)
-        lres = dot(lrot, self.S_L.T)
+        lres = self.reduce_ov(dot(lrot, self.S_L.T))
         res = dot(dot(lres, val_aux), self.S_R * rrot[None])
         return (self.target_rot + (freq**2) * (res - lrot)) / np.pi
 
+    def eval_contrib_batch(self, freqs):
+        if not (self.diagmat2 is None):
+            return super().eval_contrib_batch(freqs)
+        freqs = np.asarray(freqs)
+        F, Q, lrot, lres = self._get_lres_batch(freqs)
+        res = np.matmul(self.solve_aux(Q, lres), self.S_R) * F[:, None]
+        return (self.target_rot[None] + (freqs**2)[:, None, None] * (res - lrot)) / np.pi
+
 
 class MomzeroDeductD(MomzeroDeductNone):
     def __init__(self, *args, **kwargs):
@@ -117,10 +145,16 @@ class MomzeroDeductD(MomzeroDeductNone):
         rrot = F
         lrot = einsum("lq,q->lq", self.target_rot, F)
         val_aux = np.linalg.inv(np.eye(self.n_aux) + Q)
-        res = dot(dot(dot(lrot, self.S_L.T), val_aux), einsum("np,p->np", self.S_R, rrot))
+        res = dot(dot(self.reduce_ov(dot(lrot, self.S_L.T)), val_aux), einsum("np,p->np", self.S_R, rrot))
         res = (freq**2) * res / np.pi
         return res
 
+    def eval_contrib_batch(self, freqs):
+        freqs = np.asarray(freqs)
+        F, Q, lrot, lres = self._get_lres_batch(freqs)
+        res = np.matmul(self.solve_aux(Q, lres), self.S_R) * F[:, None]
+        return (freqs**2)[:, None, None] * res / np.pi
+
 
 class MomzeroDeductHigherOrder(MomzeroDeductD):
     def __init__(self, *args, **kwargs):
@@ -162,22 +196,30 @@ class MomzeroDeductHigherOrder(MomzeroDeductD):
         rrot = F
         lrot = einsum("lq,q->lq", self.target_rot, F)
         val_aux = np.linalg.inv(np.eye(self.n_aux) + Q) - np.eye(self.n_aux)
-        res = dot(dot(dot(lrot, self.S_L.T), val_aux), self.S_R * rrot[None])
+        res = dot(dot(self.reduce_ov(dot(lrot, self.S_L.T)), val_aux), self.S_R * rrot[None])
         res = (freq**2) * res / np.pi
         return res
 
+    def eval_contrib_batch(self, freqs):
+        freqs = np.asarray(freqs)
+        F, Q, lrot, lres = self._get_lres_batch(freqs)
+        res = np.matmul(self.solve_aux(Q, lres) - lres, self.S_R) * F[:, None]
+        return (freqs**2)[:, None, None] * res / np.pi
+
 
 class BaseMomzeroOffset(NumericalIntegratorBase):
     """NB this is an abstract class!"""
 
-    def __init__(self, D, S_L, S_R, target_rot, npoints, log):
+    diag_broadcast = True
+
+    def __init__(self, D, S_L, S_R, target_rot, npoints, log, **kwargs):
         self.D = D
         self.S_L = S_L
         self.S_R = S_R
         self.target_rot = target_rot
         out_shape = self.target_rot.shape
         diag_shape = self.D.shape
-        super().__init__(out_shape, diag_shape, npoints, log)
+        super().__init__(out_shape, diag_shape, npoints, log, **kwargs)
         self.diagRI = einsum("np,np->p", self.S_L, self.S_R)
 
     def get_offset(self):
@@ -188,9 +230,14 @@ class BaseMomzeroOffset(NumericalIntegratorBase):
         expval = np.exp(-freq * self.D)
         lrot = self.target_rot * expval[None]
         rrot = expval
-        res = dot(dot(lrot, self.S_L.T), self.S_R * rrot[None])
+        res = dot(self.reduce_ov(dot(lrot, self.S_L.T)), self.S_R * rrot[None])
         return res
 
+    def eval_contrib_batch(self, freqs):
+        expval = np.exp(-np.asarray(freqs)[:, None] * self.D)
+        lrot = self.target_rot[None] * expval[:, None]
+        return np.matmul(self.reduce_ov(np.matmul(lrot, self.S_L.T)), self.S_R) * expval[:, None]
+
     def eval_diag_contrib(self, freq):
         expval = np.exp(-2 * freq * self.D)
         return np.multiply(expval, self.diagRI)
@@ -240,3 +287,6 @@ class MomzeroDeductHigherOrder_dRHF(MomzeroDeductHigherOrder):
     def get_Q(self, freq):
         # Have equal contributions from both spin channels.
         return 2 * super().get_Q(freq)
+
+    def get_Q_batch(self, freqs):
+        return 2 * super().get_Q_batch(freqs)
@@ -1,10 +1,13 @@
 import dataclasses
+from typing import Optional
 
 import numpy as np
 import pyscf.cc
+import pyscf.cc.dfccsd
+import pyscf.lib
 
 from vayesta.core.types import CCSD_WaveFunction
-from vayesta.core.util import dot, log_method, einsum
+from vayesta.core.util import dot, log_method, einsum, memory_string
 from vayesta.solver._uccsd_eris import uao2mo
 from vayesta.solver.cisd import CISD_Solver
 from vayesta.solver.solver import ClusterSolver, UClusterSolver
@@ -26,9 +29,13 @@ class RCCSD_Solver(ClusterSolver):
         n_moments: tuple = None
         # Self-consistent mode
         sc_mode: int = None
+        # Density-fitting
+        df: Optional[bool] = None  # [None: PySCF DF-CCSD if possible, True: integral-direct DF-CCSD, False: no DF]
 
     def kernel(self, t1=None, t2=None, l1=None, l2=None, coupled_fragments=None, t_diagnostic=True):
-        mf_clus, frozen = self.hamil.to_pyscf_mf(allow_dummy_orbs=True, allow_df=True)
+        mf_clus, frozen = self.hamil.to_pyscf_mf(allow_dummy_orbs=True, allow_df=(self.opts.df is not False))
+        if self.opts.df and getattr(mf_clus, "with_df", None) is None:
+            raise ValueError("DF-CCSD requires a spin-restricted, unscreened cluster Hamiltonian with density-fitting.")
         solver_cls = self.get_solver_class(mf_clus)
         self.log.debugv("PySCF solver class= %r" % solver_cls)
         mycc = solver_cls(mf_clus, frozen=frozen)
@@ -56,6 +63,7 @@ class RCCSD_Solver(ClusterSolver):
 
         mycc.kernel(t1=t1, t2=t2)
         self.converged = mycc.converged
+        self.log_memory(mycc)
 
         if t_diagnostic:
             self.t_diagnostic(mycc)
@@ -102,9 +110,26 @@ class RCCSD_Solver(ClusterSolver):
 
     def get_solver_class(self, mf):
         if hasattr(mf, "with_df") and mf.with_df is not None:
+            if self.opts.df:
+                return DFCCSD
             return pyscf.cc.dfccsd.RCCSD
         return pyscf.cc.ccsd.RCCSD
 
+    def log_memory(self, mycc):
+        """Log memory of cluster integrals and amplitudes."""
+        nocc, nvir = mycc.t1.shape
+        nmo = nocc + nvir
+        mem_amps = 2 * (mycc.t1.nbytes + mycc.t2.nbytes)
+        mem_full = 8 * nmo**4
+        if isinstance(mycc, DFCCSD):
+            mem_eris = mycc.eris_memory
+        else:
+            mem_eris = mem_full
+        self.log.debug(
+            "Memory for integrals= %s (full ERIs= %s)  amplitudes= %s  current= %s",
+            *map(memory_string, (mem_eris, mem_full, mem_amps, int(1e6 * pyscf.lib.current_memory()[0]))),
+        )
+
     def generate_init_guess(self, eris=None):
         if self.opts.init_guess in ("default", "MP2"):
             # CCSD will build MP2 amplitudes
@@ -176,6 +201,13 @@ class UCCSD_Solver(UClusterSolver, RCCSD_Solver):
     def get_solver_class(self, mf):
         return UCCSD
 
+    def log_memory(self, mycc):
+        mem_amps = 2 * sum(x.nbytes for x in (*mycc.t1, *mycc.t2))
+        self.log.debug(
+            "Memory for amplitudes= %s  current= %s",
+            *map(memory_string, (mem_amps, int(1e6 * pyscf.lib.current_memory()[0]))),
+        )
+
     def t_diagnostic(self, solver):
         """T diagnostic not implemented for UCCSD in PySCF."""
         self.log.info("T diagnostic not implemented for UCCSD in PySCF.")
@@ -212,6 +244,73 @@ class UCCSD_Solver(UClusterSolver, RCCSD_Solver):
         raise NotImplementedError
 
 
+class _DirectOVVV:
+    """(ov|vv) integrals in the packed PySCF format, which are constructed on access from (L|ov) and (L|vv)."""
+
+    def __init__(self, lov, vvl):
+        self.lov = lov
+        self.vvl = vvl
+        self.shape = (*lov.shape[1:], vvl.shape[0])
+        self.ndim = 3
+        self.dtype = lov.dtype
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+        key = key + (self.ndim - len(key)) * (slice(None),)
+        if not all(isinstance(k, slice) for k in key):
+            raise NotImplementedError("Indexing with %r" % (key,))
+        lov = self.lov[:, key[0], key[1]]
+        ni, na = lov.shape[1:]
+        vvl = self.vvl[key[2]]
+        return pyscf.lib.ddot(lov.reshape(lov.shape[0], -1).T, vvl.T).reshape(ni, na, vvl.shape[0])
+
+
+def _make_df_eris_direct(cc, mo_coeff=None):
+    """Build in-core DF-CCSD integrals, without the (ov|vv) and (vv|vv) blocks."""
+    eris = pyscf.cc.dfccsd._ChemistsERIs()
+    eris._common_init_(cc, mo_coeff)
+    nocc = eris.nocc
+    nmo = eris.fock.shape[0]
+    o, v = np.s_[:nocc], np.s_[nocc:]
+    cderi = pyscf.lib.unpack_tril(cc.with_df._cderi)
+    naux = eris.naux = cderi.shape[0]
+    lpq = einsum("Lab,ai,bj->Lij", cderi, eris.mo_coeff, eris.mo_coeff)
+    loo = lpq[:, o, o].reshape(naux, nocc**2)
+    lov = np.ascontiguousarray(lpq[:, o, v])
+    eris.vvL = np.ascontiguousarray(pyscf.lib.pack_tril(lpq[:, v, v]).T)
+    lpq = cderi = None
+    nvir = nmo - nocc
+    eris.oooo = pyscf.lib.ddot(loo.T, loo).reshape(nocc, nocc, nocc, nocc)
+    eris.ovoo = pyscf.lib.ddot(lov.reshape(naux, -1).T, loo).reshape(nocc, nvir, nocc, nocc)
+    eris.ovov = pyscf.lib.ddot(lov.reshape(naux, -1).T, lov.reshape(naux, -1)).reshape(nocc, nvir, nocc, nvir)
+    eris.ovvo = eris.ovov.transpose(0, 1, 3, 2)
+    eris.oovv = pyscf.lib.unpack_tril(pyscf.lib.ddot(loo.T, eris.vvL.T)).reshape(nocc, nocc, nvir, nvir)
+    eris.ovvv = _DirectOVVV(lov, eris.vvL)
+    return eris
+
+
+class DFCCSD(pyscf.cc.dfccsd.RCCSD):
+    """Integral-direct DF-CCSD.
+
+    The (ov|vv) and (vv|vv) integrals are never stored, but contracted blockwise from the (L|ov) and (L|vv)
+    three-center integrals, such that the memory is dominated by O(N(aux) N(vir)^2) instead of O(N(occ) N(vir)^3).
+    """
+
+    def ao2mo(self, mo_coeff=None):
+        return _make_df_eris_direct(self, mo_coeff)
+
+    @property
+    def eris_memory(self):
+        """Memory of integrals in bytes."""
+        nocc, nvir = self.nocc, self.nmo - self.nocc
+        naux = self.with_df.get_naoaux()
+        # oooo, ovoo, ovov (ovvo is a view), oovv, (L|ov), and (L|vv):
+        mem = nocc**4 + nocc**3 * nvir + 2 * nocc**2 * nvir**2
+        mem += naux * (nocc * nvir + nvir * (nvir + 1) // 2)
+        return 8 * mem
+
+
 # Subclass pyscf UCCSD to enable support of spin-dependent ERIs.
 class UCCSD(pyscf.cc.uccsd.UCCSD):
     ao2mo = uao2mo
@@ -183,6 +183,9 @@ def tailor_with_fragments(solver, fragments, project=False, tailor_t1=True, tail
     nxy_occ = fragment.base.get_fragment_overlap_norm(fragments=([fragment], fragments), virtual=False, norm=None)[0]
     nxy_vir = fragment.base.get_fragment_overlap_norm(fragments=([fragment], fragments), occupied=False, norm=None)[0]
 
+    # Fragments without cluster overlap can be skipped in each CCSD iteration:
+    neighbors = {fy.id for fy in base.get_fragment_neighbors(fragment, ovlp_tol, fragments=fragments)}
+
     spinsym = base.spinsym
 
     def tailor_func(kwargs):
@@ -197,6 +200,9 @@ def tailor_with_fragments(solver, fragments, project=False, tailor_t1=True, tail
         # Loop over all *other* fragments/cluster X
         for y, fy in enumerate(fragments):
             assert fy is not fragment
+            if fy.id not in neighbors:
+                solver.log.debug("Skipping tailoring fragment %s due to small overlap", fy)
+                continue
 
             # Rotation & projections from cluster X active space to current fragment active space
             rxy_occ = spinalg.dot(cxs_occ, fy.cluster.c_active_occ)
@@ -12,13 +12,19 @@ from pyscf.fci import rdm
 from pyscf.fci.direct_spin1 import _unpack_nelec
 
 
-def contract_all(h1e, g2e, hep, hpp, ci0, norbs, nelec, nbosons, max_occ, ecore=0.0, adj_zero_pho=False):
+def contract_all(
+    h1e, g2e, hep, hpp, ci0, norbs, nelec, nbosons, max_occ, ecore=0.0, adj_zero_pho=False, link_index=None
+):
+    if link_index is None:
+        link_index = gen_link_tables(norbs, nelec)
     # ci1  = contract_1e(h1e, ci0, norbs, nelec, nbosons, max_occ)
-    contrib1 = contract_2e(g2e, ci0, norbs, nelec, nbosons, max_occ)
+    contrib1 = contract_2e(g2e, ci0, norbs, nelec, nbosons, max_occ, link_index=link_index)
     incbosons = nbosons > 0 and max_occ > 0
 
     if incbosons:
-        contrib2 = contract_ep(hep, ci0, norbs, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho)
+        contrib2 = contract_ep(
+            hep, ci0, norbs, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho, link_index=link_index
+        )
         contrib3 = contract_pp(hpp, ci0, norbs, nelec, nbosons, max_occ)
 
     cishape = make_shape(norbs, nelec, nbosons, max_occ)
@@ -44,6 +50,85 @@ def make_shape(norbs, nelec, nbosons, max_occ):
     return (na, nb) + (max_occ + 1,) * nbosons
 
 
+def gen_link_tables(norb, nelec):
+    """Tables for the vectorised application of the excitation operators E_pq = p^+ q to alpha and beta strings.
+
+    The tables only need to be generated once per calculation and can be passed to the contraction functions
+    via the `link_index` argument.
+
+    Returns
+    -------
+    link_tables : tuple(2) of tuple(2) of arrays
+        For both spins, addresses `addr` and signs `sign`, each of shape (norb, norb, n(strings)), such that
+        (E_pq c)[I] = sign[p,q,I] * c[addr[p,q,I]] for the string index I of the CI vector c.
+    """
+    neleca, nelecb = _unpack_nelec(nelec)
+    return _gen_link_table(norb, neleca), _gen_link_table(norb, nelecb)
+
+
+def _gen_link_table(norb, nelec):
+    link_index = cistring.gen_linkstr_index(range(norb), nelec)
+    nstr = link_index.shape[0]
+    # For each string str0: a^+ i |str0> = sign |str1>
+    a, i, str1, sign = link_index.transpose(2, 0, 1)
+    addr = numpy.zeros((norb, norb, nstr), dtype=int)
+    signs = numpy.zeros((norb, norb, nstr))
+    addr[a, i, str1] = numpy.arange(nstr)[:, None]
+    signs[a, i, str1] = sign
+    return addr, signs
+
+
+def apply_excitations(ci0, link_table, spin):
+    """Apply all excitation operators of one spin to CI vector.
+
+    Parameters
+    ----------
+    ci0 : array
+        CI vector of shape (n(alpha strings), n(beta strings), ...).
+    link_table : tuple(2) of arrays
+        Link table of the spin, as returned by `gen_link_tables`.
+    spin : int
+        0 for alpha and 1 for beta excitations.
+
+    Returns
+    -------
+    t1 : array
+        E_pq |ci0> in t1[p,q], of shape (norb, norb) + ci0.shape.
+    """
+    addr, sign = link_table
+    t1 = numpy.take(ci0, addr, axis=spin)
+    if spin == 1:
+        t1 = numpy.moveaxis(t1, 0, 2)
+    return t1 * sign.reshape(sign.shape[:2] + spin * (1,) + sign.shape[2:] + (ci0.ndim - 1 - spin) * (1,))
+
+
+def contract_excitations(t1, link_table, spin):
+    """Contract excitation operators of one spin with vectors t1, sum_pq E_pq |t1[p,q]>.
+
+    Parameters
+    ----------
+    t1 : array
+        Vectors of shape (norb, norb) + CI shape.
+    link_table : tuple(2) of arrays
+        Link table of the spin, as returned by `gen_link_tables`.
+    spin : int
+        0 for alpha and 1 for beta excitations.
+
+    Returns
+    -------
+    ci1 : array
+        Contracted vector with CI shape.
+    """
+    addr, sign = link_table
+    norb = addr.shape[0]
+    p = numpy.arange(norb)[:, None, None]
+    q = numpy.arange(norb)[None, :, None]
+    if spin == 0:
+        return numpy.einsum("pqi,pqi...->i...", sign, t1[p, q, addr])
+    # Advanced indices separated by a slice are moved to the front: (norb, norb, n(beta), n(alpha), ...)
+    return numpy.einsum("pqj,pqji...->ij...", sign, t1[p, q, :, addr])
+
+
 # Contract 1-electron integrals with fcivec.
 def contract_1e(h1e, fcivec, norb, nelec, nbosons, max_occ):
     raise NotImplementedError(
@@ -56,70 +141,47 @@ def contract_1e(h1e, fcivec, norb, nelec, nbosons, max_occ):
         neleca = nelec - nelecb
     else:
         neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nelec)
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
 
     ci0 = fcivec.reshape(cishape)
-    fcinew = numpy.zeros(cishape, dtype=fcivec.dtype)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            fcinew[str1] += sign * ci0[str0] * h1e[a, i]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            fcinew[:, str1] += sign * ci0[:, str0] * h1e[a, i]
+    fcinew = numpy.tensordot(h1e, apply_excitations(ci0, link_indexa, 0), 2)
+    fcinew += numpy.tensordot(h1e, apply_excitations(ci0, link_indexb, 1), 2)
     return fcinew.reshape(fcivec.shape)
 
 
 # Contract 2-electron integrals with fcivec.
-def contract_2e(eri, fcivec, norb, nelec, nbosons, max_occ):
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+def contract_2e(eri, fcivec, norb, nelec, nbosons, max_occ, link_index=None):
+    if link_index is None:
+        link_index = gen_link_tables(norb, nelec)
+    link_indexa, link_indexb = link_index
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
     ci0 = fcivec.reshape(cishape)
-    t1 = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            t1[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            t1[a, i, :, str1] += sign * ci0[:, str0]
+    t1 = apply_excitations(ci0, link_indexa, 0)
+    t1 += apply_excitations(ci0, link_indexb, 1)
 
     # t1 = lib.einsum('bjai,aiAB...->bjAB...', eri.reshape([norb]*4), t1)
     t1 = numpy.tensordot(eri.reshape([norb] * 4), t1, 2)
 
-    fcinew = numpy.zeros_like(ci0)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            fcinew[str1] += sign * t1[a, i, str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            fcinew[:, str1] += sign * t1[a, i, :, str0]
+    fcinew = contract_excitations(t1, link_indexa, 0)
+    fcinew += contract_excitations(t1, link_indexb, 1)
     return fcinew.reshape(fcivec.shape)
 
 
 # Contract electron-phonon portion of the Hamiltonian.
-def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False):
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False, link_index=None):
+    neleca, nelecb = _unpack_nelec(nelec)
+    if link_index is None:
+        link_index = gen_link_tables(norb, nelec)
+    link_indexa, link_indexb = link_index
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
 
     ci0 = fcivec.reshape(cishape)
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
-    t1b = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
+    t1a = apply_excitations(ci0, link_indexa, 0)
+    t1b = apply_excitations(ci0, link_indexb, 1)
 
     if adj_zero_pho:
         zfac = float(neleca + nelecb) / norb
@@ -128,13 +190,6 @@ def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False):
         for i in range(norb):
             t1a[i, i] -= adj_val
             t1b[i, i] -= adj_val
-
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
     # Now have contribution to a particular state via given excitation
     # channel; just need to apply bosonic (de)excitations.
     # Note that while the contribution {a^{+} i p} and {i a^{+} p^{+}}
@@ -159,22 +214,9 @@ def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False):
     # The leading index tells us which bosonic degree of freedom is coupled
     # to in each case.
     fcinew = numpy.zeros_like(ci0)
-
-    bos_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-
     for ibos in range(nbosons):
-        for iocc in range(0, max_occ):
-            ex_slice = slices_for_cre(ibos, nbosons, iocc)
-            norm_slice = slices_for(ibos, nbosons, iocc)
-            # NB bos_cre[iocc] = sqrt(iocc+1)
-            fcinew[ex_slice] += tex[ibos][norm_slice] * bos_cre[iocc]
-
-        for iocc in range(1, max_occ + 1):
-            dex_slice = slices_for_des(ibos, nbosons, iocc)
-            norm_slice = slices_for(ibos, nbosons, iocc)
-            # NB bos_cre[iocc] = sqrt(iocc+1)
-            fcinew[dex_slice] += tdex[ibos][norm_slice] * bos_cre[iocc - 1]
-
+        fcinew += apply_bos_ladder(tex[ibos], ibos, max_occ, creation=True)
+        fcinew += apply_bos_ladder(tdex[ibos], ibos, max_occ, creation=False)
     return fcinew.reshape(fcivec.shape)
 
 
@@ -187,45 +229,38 @@ def contract_pp(hpp, fcivec, norb, nelec, nbosons, max_occ):
     ci0 = fcivec.reshape(cishape)
     fcinew = numpy.zeros_like(ci0)
 
-    phonon_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    # t1 = numpy.zeros((nbosons,)+cishape, dtype=fcivec.dtype)
-    # for psite_id in range(nbosons):
-    #    for i in range(max_occ):
-    #        slices1 = slices_for_cre(psite_id, nbosons, i)
-    #        slices0 = slices_for    (psite_id, nbosons, i)
-    #        t1[(psite_id,)+slices0] += ci0[slices1] * phonon_cre[i]     # annihilation
-
     t1 = apply_bos_annihilation(ci0, nbosons, max_occ)
     t1 = lib.dot(hpp, t1.reshape(nbosons, -1)).reshape(t1.shape)
 
     for psite_id in range(nbosons):
-        for i in range(max_occ):
-            slices1 = slices_for_cre(psite_id, nbosons, i)
-            slices0 = slices_for(psite_id, nbosons, i)
-            fcinew[slices1] += t1[(psite_id,) + slices0] * phonon_cre[i]  # creation
+        fcinew += apply_bos_ladder(t1[psite_id], psite_id, max_occ, creation=True)
     return fcinew.reshape(fcivec.shape)
 
 
-def apply_bos_annihilation(ci0, nbosons, max_occ):
-    phonon_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    res = numpy.zeros((nbosons,) + ci0.shape, dtype=ci0.dtype)
-    for psite_id in range(nbosons):
-        for i in range(max_occ):
-            slices1 = slices_for_cre(psite_id, nbosons, i)
-            slices0 = slices_for(psite_id, nbosons, i)
-            res[(psite_id,) + slices0] += ci0[slices1] * phonon_cre[i]  # annihilation
+def apply_bos_ladder(ci0, ibos, max_occ, creation=True):
+    """Apply bosonic creation or annihilation operator of mode `ibos` to CI vector.
+
+    The operator is bidiagonal in the occupation of the mode, such that it is applied as a single shifted
+    slice of the CI vector, scaled by the factors sqrt(n).
+    """
+    axis = 2 + ibos
+    fac = numpy.sqrt(numpy.arange(1, max_occ + 1)).reshape((-1,) + (ci0.ndim - axis - 1) * (1,))
+    lower = slices_for(ibos, ci0.ndim - 2, slice(0, max_occ))
+    upper = slices_for(ibos, ci0.ndim - 2, slice(1, max_occ + 1))
+    res = numpy.zeros_like(ci0)
+    if creation:
+        res[upper] = ci0[lower] * fac
+    else:
+        res[lower] = ci0[upper] * fac
     return res
 
 
+def apply_bos_annihilation(ci0, nbosons, max_occ):
+    return numpy.asarray([apply_bos_ladder(ci0, ibos, max_occ, creation=False) for ibos in range(nbosons)])
+
+
 def apply_bos_creation(ci0, nbosons, max_occ):
-    phonon_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    res = numpy.zeros((nbosons,) + ci0.shape, dtype=ci0.dtype)
-    for psite_id in range(nbosons):
-        for i in range(max_occ):
-            slices1 = slices_for_cre(psite_id, nbosons, i)
-            slices0 = slices_for(psite_id, nbosons, i)
-            res[(psite_id,) + slices1] += ci0[slices0] * phonon_cre[i]  # creation
-    return res
+    return numpy.asarray([apply_bos_ladder(ci0, ibos, max_occ, creation=True) for ibos in range(nbosons)])
 
 
 def contract_pp_for_future(hpp, fcivec, norb, nelec, nbosons, max_occ):
@@ -267,31 +302,24 @@ def slices_for_occ_reduction(nbos, new_max_occ):
 
 def make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ):
     neleca, nelecb = _unpack_nelec(nelec)
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
-    occslista = [tab[:neleca, 0] for tab in link_indexa]
-    occslistb = [tab[:nelecb, 0] for tab in link_indexb]
-
-    nelec_tot = neleca + nelecb
+    # Occupation numbers of all alpha and beta strings:
+    occa = _get_occupations(norb, neleca)
+    occb = _get_occupations(norb, nelecb)
 
     # electron part
     cishape = make_shape(norb, nelec, nbosons, max_occ)
-    hdiag = numpy.zeros(cishape)
     g2e = ao2mo.restore(1, g2e, norb)
     diagj = numpy.einsum("iijj->ij", g2e)
     diagk = numpy.einsum("ijji->ij", g2e)
-    for ia, aocc in enumerate(occslista):
-        for ib, bocc in enumerate(occslistb):
-            e1 = h1e[aocc, aocc].sum() + h1e[bocc, bocc].sum()
-            e2 = (
-                diagj[aocc][:, aocc].sum()
-                + diagj[aocc][:, bocc].sum()
-                + diagj[bocc][:, aocc].sum()
-                + diagj[bocc][:, bocc].sum()
-                - diagk[aocc][:, aocc].sum()
-                - diagk[bocc][:, bocc].sum()
-            )
-            hdiag[ia, ib] += e1 + e2 * 0.5
+    e1 = numpy.dot(occa, h1e.diagonal())[:, None] + numpy.dot(occb, h1e.diagonal())[None, :]
+    e2 = (
+        numpy.einsum("ap,pq,aq->a", occa, diagj - diagk, occa)[:, None]
+        + numpy.einsum("bp,pq,bq->b", occb, diagj - diagk, occb)[None, :]
+        + numpy.linalg.multi_dot((occa, diagj, occb.T))
+        + numpy.linalg.multi_dot((occb, diagj, occa.T)).T
+    )
+    hdiag = numpy.zeros(cishape)
+    hdiag += (e1 + e2 * 0.5).reshape(cishape[:2] + (1,) * nbosons)
 
     # No electron-phonon part?
 
@@ -299,13 +327,19 @@ def make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ):
     if len(hpp.shape) == 2:
         hpp = hpp.diagonal()
     for b_id in range(nbosons):
-        for i in range(max_occ + 1):
-            slices0 = slices_for(b_id, nbosons, i)
-            hdiag[slices0] += hpp[b_id] * i
+        hdiag += hpp[b_id] * numpy.arange(max_occ + 1).reshape((-1,) + (1,) * (nbosons - b_id - 1))
 
     return hdiag.ravel()
 
 
+def _get_occupations(norb, nelec):
+    """Occupation numbers of all strings, in an array of shape (n(strings), norb)."""
+    occslst = cistring.gen_occslst(range(norb), nelec)
+    occ = numpy.zeros((len(occslst), norb))
+    numpy.put_along_axis(occ, occslst, 1, axis=1)
+    return occ
+
+
 def kernel(
     h1e,
     g2e,
@@ -331,8 +365,12 @@ def kernel(
     ci0 += numpy.random.random(ci0.shape) * 1e-10
     ci0.__setitem__((0, 0) + (0,) * nbosons, 1)
 
+    link_index = gen_link_tables(norb, nelec)
+
     def hop(c):
-        hc = contract_all(h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho)
+        hc = contract_all(
+            h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho, link_index=link_index
+        )
         return hc.reshape(-1)
 
     hdiag = make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ)
@@ -389,8 +427,12 @@ def kernel_multiroot(
     ci0[0, :] += numpy.random.random(ci0[0, :].shape) * 1e-6
     ci0[:, 0] += numpy.random.random(ci0[:, 0].shape) * 1e-6
 
+    link_index = gen_link_tables(norb, nelec)
+
     def hop(c):
-        hc = contract_all(h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho)
+        hc = contract_all(
+            h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho, link_index=link_index
+        )
         return hc.reshape(-1)
 
     hdiag = make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ)
@@ -416,21 +458,14 @@ def kernel_multiroot(
 def make_rdm1(fcivec, norb, nelec):
     """1-electron density matrix dm_pq = <|p^+ q|>"""
     neleca, nelecb = _unpack_nelec(nelec)
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nelec)
     na = cistring.num_strings(norb, neleca)
     nb = cistring.num_strings(norb, nelecb)
 
-    rdm1 = numpy.zeros((norb, norb))
-    ci0 = fcivec.reshape(na, -1)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            rdm1[a, i] += sign * numpy.dot(ci0[str1], ci0[str0])
-
     ci0 = fcivec.reshape(na, nb, -1)
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            rdm1[a, i] += sign * numpy.einsum("ax,ax->", ci0[:, str1], ci0[:, str0])
+    t1 = apply_excitations(ci0, link_indexa, 0)
+    t1 += apply_excitations(ci0, link_indexb, 1)
+    rdm1 = numpy.dot(t1.reshape(norb * norb, -1), ci0.reshape(-1)).reshape(norb, norb)
     return rdm1
 
 
@@ -536,13 +571,7 @@ def make_eb_rdm(fcivec, norb, nelec, nbosons, max_occ):
     :param max_occ:
     :return:
     """
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nelec)
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
 
@@ -551,27 +580,12 @@ def make_eb_rdm(fcivec, norb, nelec, nbosons, max_occ):
         return numpy.zeros((norb, norb, 0)), numpy.zeros((norb, norb, 0))
 
     ci0 = fcivec.reshape(cishape)
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
-    t1b = numpy.zeros_like(t1a)
-
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in link_indexa[str0]:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in link_indexb[str0]:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
-    bos_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    tempa = numpy.zeros((norb, norb, nbosons) + ci0.shape)
-    tempb = np.zeros_like(tempa)
-    for ibos in range(nbosons):
-        # We could tidy this up with nicer slicing and einsum, but it works for now.
-        for iocc in range(0, max_occ):
-            ex_slice = (slice(None, None, None),) * 2 + (ibos,) + slices_for_cre(ibos, nbosons, iocc)
-            norm_slice = (slice(None, None, None),) * 2 + slices_for(ibos, nbosons, iocc)
-            tempa[ex_slice] += t1a[norm_slice] * bos_cre[iocc]
-            tempb[ex_slice] += t1b[norm_slice] * bos_cre[iocc]
-    rdm_fba = numpy.dot(tempa.reshape((norb**2 * nbosons, -1)), ci0.reshape(-1)).reshape((norb, norb, nbosons))
-    rdm_fbb = numpy.dot(tempb.reshape((norb**2 * nbosons, -1)), ci0.reshape(-1)).reshape((norb, norb, nbosons))
+    # <0|b^+ p^+ q|0> = (b|0>)^+ p^+ q|0>:
+    bci0 = apply_bos_annihilation(ci0, nbosons, max_occ).reshape(nbosons, -1)
+    t1a = apply_excitations(ci0, link_indexa, 0).reshape(norb**2, -1)
+    t1b = apply_excitations(ci0, link_indexb, 1).reshape(norb**2, -1)
+    rdm_fba = numpy.dot(t1a, bci0.T).reshape((norb, norb, nbosons))
+    rdm_fbb = numpy.dot(t1b, bci0.T).reshape((norb, norb, nbosons))
     return rdm_fba, rdm_fbb
 
 
@@ -591,24 +605,12 @@ def calc_dd_resp_mom(
     # equivalent charge-density response.
     hop = kernel(h1e, eri, heb, hbb, norb, nel, nbos, max_boson_occ, returnhop=True, **kwargs)[0]
 
-    if isinstance(nel, (int, numpy.integer)):
-        nelecb = nel // 2
-        neleca = nel - nelecb
-    else:
-        neleca, nelecb = nel
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nel)
     cishape = make_shape(norb, nel, nbos, max_boson_occ)
 
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=numpy.dtype(numpy.float64))
-    t1b = numpy.zeros_like(t1a)
-
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
+    ci0 = ci0.reshape(cishape)
+    t1a = apply_excitations(ci0, link_indexa, 0)
+    t1b = apply_excitations(ci0, link_indexb, 1)
     # If we want not in HF basis we can perform transformation at this stage.
     t1a = t1a.reshape((norb, norb, -1))
     t1b = t1b.reshape((norb, norb, -1))
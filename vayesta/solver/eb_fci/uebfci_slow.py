@@ -11,14 +11,30 @@ from pyscf.fci import direct_uhf
 from pyscf.fci import rdm
 from pyscf.fci.direct_spin1 import _unpack_nelec
 
-
-def contract_all(h1e, g2e, hep, hpp, ci0, norbs, nelec, nbosons, max_occ, ecore=0.0, adj_zero_pho=False):
+from vayesta.solver.eb_fci.ebfci_slow import (
+    gen_link_tables,
+    apply_excitations,
+    contract_excitations,
+    apply_bos_ladder,
+    apply_bos_annihilation,
+    apply_bos_creation,
+    _get_occupations,
+)
+
+
+def contract_all(
+    h1e, g2e, hep, hpp, ci0, norbs, nelec, nbosons, max_occ, ecore=0.0, adj_zero_pho=False, link_index=None
+):
+    if link_index is None:
+        link_index = gen_link_tables(norbs, nelec)
     # ci1  = contract_1e(h1e, ci0, norbs, nelec, nbosons, max_occ)
-    contrib1 = contract_2e(g2e, ci0, norbs, nelec, nbosons, max_occ)
+    contrib1 = contract_2e(g2e, ci0, norbs, nelec, nbosons, max_occ, link_index=link_index)
     incbosons = nbosons > 0 and max_occ > 0
 
     if incbosons:
-        contrib2 = contract_ep(hep, ci0, norbs, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho)
+        contrib2 = contract_ep(
+            hep, ci0, norbs, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho, link_index=link_index
+        )
         contrib3 = contract_pp(hpp, ci0, norbs, nelec, nbosons, max_occ)
 
         return contrib1 + contrib2 + contrib3
@@ -42,48 +58,27 @@ def contract_1e(h1e, fcivec, norb, nelec, nbosons, max_occ):
         "bugged for coupled electron-boson systems."
         "This should instead be folded into a two-body operator."
     )
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nelec)
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
 
     ci0 = fcivec.reshape(cishape)
-    fcinew = numpy.zeros(cishape, dtype=fcivec.dtype)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            fcinew[str1] += sign * ci0[str0] * h1e[a, i]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            fcinew[:, str1] += sign * ci0[:, str0] * h1e[a, i]
+    fcinew = numpy.tensordot(h1e, apply_excitations(ci0, link_indexa, 0), 2)
+    fcinew += numpy.tensordot(h1e, apply_excitations(ci0, link_indexb, 1), 2)
     return fcinew.reshape(fcivec.shape)
 
 
 # Contract 2-electron integrals with fcivec.
-def contract_2e(eri, fcivec, norb, nelec, nbosons, max_occ):
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+def contract_2e(eri, fcivec, norb, nelec, nbosons, max_occ, link_index=None):
+    if link_index is None:
+        link_index = gen_link_tables(norb, nelec)
+    link_indexa, link_indexb = link_index
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
 
     ci0 = fcivec.reshape(cishape)
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
-    t1b = numpy.zeros_like(t1a)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
+    t1a = apply_excitations(ci0, link_indexa, 0)
+    t1b = apply_excitations(ci0, link_indexb, 1)
 
     # t1 = lib.einsum('bjai,aiAB...->bjAB...', eri.reshape([norb]*4), t1)
     t1a_ = numpy.tensordot(eri[0].reshape([norb] * 4), t1a, 2) + numpy.tensordot(eri[1].reshape([norb] * 4), t1b, 2)
@@ -92,31 +87,23 @@ def contract_2e(eri, fcivec, norb, nelec, nbosons, max_occ):
     )
     t1a, t1b = t1a_, t1b_
 
-    fcinew = numpy.zeros_like(ci0)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            fcinew[str1] += sign * t1a[a, i, str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            fcinew[:, str1] += sign * t1b[a, i, :, str0]
+    fcinew = contract_excitations(t1a, link_indexa, 0)
+    fcinew += contract_excitations(t1b, link_indexb, 1)
     return fcinew.reshape(fcivec.shape)
 
 
 # Contract electron-phonon portion of the Hamiltonian.
-def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False):
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False, link_index=None):
+    neleca, nelecb = _unpack_nelec(nelec)
+    if link_index is None:
+        link_index = gen_link_tables(norb, nelec)
+    link_indexa, link_indexb = link_index
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
 
     ci0 = fcivec.reshape(cishape)
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
-    t1b = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
+    t1a = apply_excitations(ci0, link_indexa, 0)
+    t1b = apply_excitations(ci0, link_indexb, 1)
 
     if adj_zero_pho:
         zfac = float(neleca + nelecb) / norb
@@ -125,13 +112,6 @@ def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False):
         for i in range(norb):
             t1a[i, i] -= adj_val
             t1b[i, i] -= adj_val
-
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
     # Now have contribution to a particular state via given excitation
     # channel; just need to apply bosonic (de)excitations.
     # Note that while the contribution {a^{+} i p} and {i a^{+} p^{+}}
@@ -156,22 +136,9 @@ def contract_ep(heb, fcivec, norb, nelec, nbosons, max_occ, adj_zero_pho=False):
     # The leading index tells us which bosonic degree of freedom is coupled
     # to in each case.
     fcinew = numpy.zeros_like(ci0)
-
-    bos_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-
     for ibos in range(nbosons):
-        for iocc in range(0, max_occ):
-            ex_slice = slices_for_cre(ibos, nbosons, iocc)
-            norm_slice = slices_for(ibos, nbosons, iocc)
-            # NB bos_cre[iocc] = sqrt(iocc+1)
-            fcinew[ex_slice] += tex[ibos][norm_slice] * bos_cre[iocc]
-
-        for iocc in range(1, max_occ + 1):
-            dex_slice = slices_for_des(ibos, nbosons, iocc)
-            norm_slice = slices_for(ibos, nbosons, iocc)
-            # NB bos_cre[iocc] = sqrt(iocc+1)
-            fcinew[dex_slice] += tdex[ibos][norm_slice] * bos_cre[iocc - 1]
-
+        fcinew += apply_bos_ladder(tex[ibos], ibos, max_occ, creation=True)
+        fcinew += apply_bos_ladder(tdex[ibos], ibos, max_occ, creation=False)
     return fcinew.reshape(fcivec.shape)
 
 
@@ -184,48 +151,14 @@ def contract_pp(hpp, fcivec, norb, nelec, nbosons, max_occ):
     ci0 = fcivec.reshape(cishape)
     fcinew = numpy.zeros_like(ci0)
 
-    phonon_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    # t1 = numpy.zeros((nbosons,)+cishape, dtype=fcivec.dtype)
-    # for psite_id in range(nbosons):
-    #    for i in range(max_occ):
-    #        slices1 = slices_for_cre(psite_id, nbosons, i)
-    #        slices0 = slices_for    (psite_id, nbosons, i)
-    #        t1[(psite_id,)+slices0] += ci0[slices1] * phonon_cre[i]     # annihilation
-
     t1 = apply_bos_annihilation(ci0, nbosons, max_occ)
-
     t1 = lib.dot(hpp, t1.reshape(nbosons, -1)).reshape(t1.shape)
 
     for psite_id in range(nbosons):
-        for i in range(max_occ):
-            slices1 = slices_for_cre(psite_id, nbosons, i)
-            slices0 = slices_for(psite_id, nbosons, i)
-            fcinew[slices1] += t1[(psite_id,) + slices0] * phonon_cre[i]  # creation
+        fcinew += apply_bos_ladder(t1[psite_id], psite_id, max_occ, creation=True)
     return fcinew.reshape(fcivec.shape)
 
 
-def apply_bos_annihilation(ci0, nbosons, max_occ):
-    phonon_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    res = numpy.zeros((nbosons,) + ci0.shape, dtype=ci0.dtype)
-    for psite_id in range(nbosons):
-        for i in range(max_occ):
-            slices1 = slices_for_cre(psite_id, nbosons, i)
-            slices0 = slices_for(psite_id, nbosons, i)
-            res[(psite_id,) + slices0] += ci0[slices1] * phonon_cre[i]  # annihilation
-    return res
-
-
-def apply_bos_creation(ci0, nbosons, max_occ):
-    phonon_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    res = numpy.zeros((nbosons,) + ci0.shape, dtype=ci0.dtype)
-    for psite_id in range(nbosons):
-        for i in range(max_occ):
-            slices1 = slices_for_cre(psite_id, nbosons, i)
-            slices0 = slices_for(psite_id, nbosons, i)
-            res[(psite_id,) + slices1] += ci0[slices0] * phonon_cre[i]  # creation
-    return res
-
-
 def contract_pp_for_future(hpp, fcivec, norb, nelec, nbosons, max_occ):
     """Our bosons are decoupled; only have diagonal couplings,
     ie. to the boson number.
@@ -265,16 +198,12 @@ def slices_for_occ_reduction(nbos, new_max_occ):
 
 def make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ):
     neleca, nelecb = _unpack_nelec(nelec)
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
-    occslista = [tab[:neleca, 0] for tab in link_indexa]
-    occslistb = [tab[:nelecb, 0] for tab in link_indexb]
-
-    nelec_tot = neleca + nelecb
+    # Occupation numbers of all alpha and beta strings:
+    occa = _get_occupations(norb, neleca)
+    occb = _get_occupations(norb, nelecb)
 
     # electron part
     cishape = make_shape(norb, nelec, nbosons, max_occ)
-    hdiag = numpy.zeros(cishape)
     g2e_aa = ao2mo.restore(1, g2e[0], norb)
     g2e_ab = ao2mo.restore(1, g2e[1], norb)
     g2e_bb = ao2mo.restore(1, g2e[2], norb)
@@ -286,18 +215,14 @@ def make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ):
     diagk_aa = numpy.einsum("ijji->ij", g2e_aa)
     diagk_bb = numpy.einsum("ijji->ij", g2e_bb)
 
-    for ia, aocc in enumerate(occslista):
-        for ib, bocc in enumerate(occslistb):
-            e1 = h1e[0][aocc, aocc].sum() + h1e[1][bocc, bocc].sum()
-            e2 = (
-                diagj_aa[aocc][:, aocc].sum()
-                + diagj_ab[aocc][:, bocc].sum()
-                + diagj_ab.T[bocc][:, aocc].sum()
-                + diagj_bb[bocc][:, bocc].sum()
-                - diagk_aa[aocc][:, aocc].sum()
-                - diagk_bb[bocc][:, bocc].sum()
-            )
-            hdiag[ia, ib] += e1 + e2 * 0.5
+    e1 = numpy.dot(occa, h1e[0].diagonal())[:, None] + numpy.dot(occb, h1e[1].diagonal())[None, :]
+    e2 = (
+        numpy.einsum("ap,pq,aq->a", occa, diagj_aa - diagk_aa, occa)[:, None]
+        + numpy.einsum("bp,pq,bq->b", occb, diagj_bb - diagk_bb, occb)[None, :]
+        + 2 * numpy.linalg.multi_dot((occa, diagj_ab, occb.T))
+    )
+    hdiag = numpy.zeros(cishape)
+    hdiag += (e1 + e2 * 0.5).reshape(cishape[:2] + (1,) * nbosons)
 
     # No electron-phonon part?
 
@@ -305,9 +230,7 @@ def make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ):
     if len(hpp.shape) == 2:
         hpp = hpp.diagonal()
     for b_id in range(nbosons):
-        for i in range(max_occ + 1):
-            slices0 = slices_for(b_id, nbosons, i)
-            hdiag[slices0] += hpp[b_id] * i
+        hdiag += hpp[b_id] * numpy.arange(max_occ + 1).reshape((-1,) + (1,) * (nbosons - b_id - 1))
 
     return hdiag.ravel()
 
@@ -336,8 +259,12 @@ def kernel(
     ci0 += numpy.random.random(ci0.shape) * 1e-10
     ci0.__setitem__((0, 0) + (0,) * nbosons, 1)
 
+    link_index = gen_link_tables(norb, nelec)
+
     def hop(c):
-        hc = contract_all(h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho)
+        hc = contract_all(
+            h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho, link_index=link_index
+        )
         return hc.reshape(-1)
 
     hdiag = make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ)
@@ -394,8 +321,12 @@ def kernel_multiroot(
     ci0[0, :] += numpy.random.random(ci0[0, :].shape) * 1e-6
     ci0[:, 0] += numpy.random.random(ci0[:, 0].shape) * 1e-6
 
+    link_index = gen_link_tables(norb, nelec)
+
     def hop(c):
-        hc = contract_all(h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho)
+        hc = contract_all(
+            h1e, h2e, hep, hpp, c, norb, nelec, nbosons, max_occ, adj_zero_pho=adj_zero_pho, link_index=link_index
+        )
         return hc.reshape(-1)
 
     hdiag = make_hdiag(h1e, g2e, hep, hpp, norb, nelec, nbosons, max_occ)
@@ -421,23 +352,14 @@ def kernel_multiroot(
 def make_rdm1(fcivec, norb, nelec):
     """1-electron density matrix dm_pq = <|p^+ q|>"""
     neleca, nelecb = _unpack_nelec(nelec)
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nelec)
     na = cistring.num_strings(norb, neleca)
     nb = cistring.num_strings(norb, nelecb)
 
-    rdm1a = numpy.zeros((norb, norb))
-    rdm1b = np.zeros_like(rdm1a)
-    ci0 = fcivec.reshape(na, -1)
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            rdm1a[a, i] += sign * numpy.dot(ci0[str1], ci0[str0])
-
     ci0 = fcivec.reshape(na, nb, -1)
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            rdm1b[a, i] += sign * numpy.einsum("ax,ax->", ci0[:, str1], ci0[:, str0])
-    return rdm1a, rdm1b
+    rdm1a = numpy.dot(apply_excitations(ci0, link_indexa, 0).reshape(norb * norb, -1), ci0.reshape(-1))
+    rdm1b = numpy.dot(apply_excitations(ci0, link_indexb, 1).reshape(norb * norb, -1), ci0.reshape(-1))
+    return rdm1a.reshape(norb, norb), rdm1b.reshape(norb, norb)
 
 
 def make_rdm12(fcivec, norb, nelec):
@@ -536,13 +458,7 @@ def make_eb_rdm(fcivec, norb, nelec, nbosons, max_occ):
     :param max_occ:
     :return:
     """
-    if isinstance(nelec, (int, numpy.integer)):
-        nelecb = nelec // 2
-        neleca = nelec - nelecb
-    else:
-        neleca, nelecb = nelec
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nelec)
 
     cishape = make_shape(norb, nelec, nbosons, max_occ)
     nspinorb = 2 * norb
@@ -552,27 +468,12 @@ def make_eb_rdm(fcivec, norb, nelec, nbosons, max_occ):
         return numpy.zeros((nspinorb, nspinorb, 0))
 
     ci0 = fcivec.reshape(cishape)
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=fcivec.dtype)
-    t1b = numpy.zeros_like(t1a)
-
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in link_indexa[str0]:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in link_indexb[str0]:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
-    bos_cre = numpy.sqrt(numpy.arange(1, max_occ + 1))
-    tempa = numpy.zeros((norb, norb, nbosons) + ci0.shape)
-    tempb = np.zeros_like(tempa)
-    for ibos in range(nbosons):
-        # We could tidy this up with nicer slicing and einsum, but it works for now.
-        for iocc in range(0, max_occ):
-            ex_slice = (slice(None, None, None),) * 2 + (ibos,) + slices_for_cre(ibos, nbosons, iocc)
-            norm_slice = (slice(None, None, None),) * 2 + slices_for(ibos, nbosons, iocc)
-            tempa[ex_slice] += t1a[norm_slice] * bos_cre[iocc]
-            tempb[ex_slice] += t1b[norm_slice] * bos_cre[iocc]
-    rdm_fba = numpy.dot(tempa.reshape((norb**2 * nbosons, -1)), ci0.reshape(-1)).reshape((norb, norb, nbosons))
-    rdm_fbb = numpy.dot(tempb.reshape((norb**2 * nbosons, -1)), ci0.reshape(-1)).reshape((norb, norb, nbosons))
+    # <0|b^+ p^+ q|0> = (b|0>)^+ p^+ q|0>:
+    bci0 = apply_bos_annihilation(ci0, nbosons, max_occ).reshape(nbosons, -1)
+    t1a = apply_excitations(ci0, link_indexa, 0).reshape(norb**2, -1)
+    t1b = apply_excitations(ci0, link_indexb, 1).reshape(norb**2, -1)
+    rdm_fba = numpy.dot(t1a, bci0.T).reshape((norb, norb, nbosons))
+    rdm_fbb = numpy.dot(t1b, bci0.T).reshape((norb, norb, nbosons))
     return rdm_fba, rdm_fbb
 
 
@@ -591,24 +492,12 @@ def calc_dd_resp_mom(
     # spin-density response (rather than charge-density) we'll need to use commutation relations to relate to the
     # equivalent charge-density response.
     hop = kernel(h1e, eri, heb, hbb, norb, nel, nbos, max_boson_occ, returnhop=True, **kwargs)[0]
-    if isinstance(nel, (int, numpy.integer)):
-        nelecb = nel // 2
-        neleca = nel - nelecb
-    else:
-        neleca, nelecb = nel
-    link_indexa = cistring.gen_linkstr_index(range(norb), neleca)
-    link_indexb = cistring.gen_linkstr_index(range(norb), nelecb)
+    link_indexa, link_indexb = gen_link_tables(norb, nel)
     cishape = make_shape(norb, nel, nbos, max_boson_occ)
 
-    t1a = numpy.zeros((norb, norb) + cishape, dtype=numpy.dtype(numpy.float64))
-    t1b = numpy.zeros_like(t1a)
-
-    for str0, tab in enumerate(link_indexa):
-        for a, i, str1, sign in tab:
-            t1a[a, i, str1] += sign * ci0[str0]
-    for str0, tab in enumerate(link_indexb):
-        for a, i, str1, sign in tab:
-            t1b[a, i, :, str1] += sign * ci0[:, str0]
+    ci0 = ci0.reshape(cishape)
+    t1a = apply_excitations(ci0, link_indexa, 0)
+    t1b = apply_excitations(ci0, link_indexb, 1)
     # If we want not in HF basis we can perform transformation at this stage.
     t1a = t1a.reshape((norb, norb, -1))
     t1b = t1b.reshape((norb, norb, -1))
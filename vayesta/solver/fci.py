@@ -62,15 +62,13 @@ class FCI_Solver(ClusterSolver):
     def kernel(self, ci=None):
         self.hamil.assert_equal_spin_channels()
 
-        if self.opts.init_guess == "CISD":
+        # An initial guess passed as argument (e.g. from a previous calculation) is used without added noise
+        if ci is None and self.opts.init_guess == "CISD":
             cisd = self.cisd_solver(self.hamil)
             cisd.kernel()
             ci = cisd.wf.as_fci().ci
-        elif self.opts.init_guess in ["mf", "meanfield"]:
-            ci = None
-
-        if self.opts.init_guess_noise and ci is not None:
-            ci += self.opts.init_guess_noise * np.random.random(ci.shape)
+            if self.opts.init_guess_noise:
+                ci += self.opts.init_guess_noise * np.random.random(ci.shape)
 
         heff, eris = self.hamil.get_integrals(with_vext=True)
 
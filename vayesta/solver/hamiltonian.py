@@ -1,5 +1,5 @@
 import dataclasses
-from typing import Optional
+from typing import Optional, Union
 
 import numpy as np
 import pyscf.lib
@@ -59,7 +59,7 @@ class RClusterHamiltonian:
     @dataclasses.dataclass
     class Options(OptionsBase):
         screening: Optional[str] = None
-        cache_eris: bool = True
+        cache_eris: Union[bool, str] = True  # If 'disk', use the ERI store of the embedding object
         match_fock: bool = True
 
     @property
@@ -174,13 +174,23 @@ class RClusterHamiltonian:
         else:
             return self._get_eris_block(self._seris, block)
 
+    def _get_eris_store(self):
+        if self.opts.cache_eris == "disk":
+            return self._fragment.base._get_eris_store()
+        return None
+
     def get_eris_bare(self, block=None):
+        store = self._get_eris_store()
         if block is None:
             if self._eris is None:
-                with log_time(self.log.timing, "Time for AO->MO of ERIs:  %s"):
-                    coeff = self.cluster.c_active
-                    eris = self._fragment.base.get_eris_array(coeff)
-                if self.opts.cache_eris:
+                coeff = self.cluster.c_active
+                eris = store.get(coeff) if store is not None else None
+                if eris is None:
+                    with log_time(self.log.timing, "Time for AO->MO of ERIs:  %s"):
+                        eris = self._fragment.base.get_eris_array(coeff)
+                    if store is not None:
+                        store.add(coeff, eris)
+                if self.opts.cache_eris and store is None:
                     self._eris = eris
                 return eris
             else:
@@ -188,19 +198,25 @@ class RClusterHamiltonian:
         else:
             assert len(block) == 4 and set(block.lower()).issubset(set("ov"))
             if self._eris is None:
+                if store is not None:
+                    eris = store.get(self.cluster.c_active, block=self._get_eris_slices(block))
+                    if eris is not None:
+                        return eris
                 # Actually generate the relevant block.
                 coeffs = [self.cluster.c_active_occ if i == "o" else self.cluster.c_active_vir for i in block.lower()]
                 return self._fragment.base.get_eris_array(coeffs)
             else:
                 return self._get_eris_block(self._eris, block)
 
+    def _get_eris_slices(self, block):
+        occ = slice(self.cluster.nocc_active)
+        vir = slice(self.cluster.nocc_active, self.cluster.norb_active)
+        return tuple([occ if i == "o" else vir for i in block.lower()])
+
     def _get_eris_block(self, eris, block):
         assert len(block) == 4 and set(block.lower()).issubset({"o", "v"})
         # Just get slices of cached eri.
-        occ = slice(self.cluster.nocc_active)
-        vir = slice(self.cluster.nocc_active, self.cluster.norb_active)
-        sl = tuple([occ if i == "o" else vir for i in block.lower()])
-        return eris[sl]
+        return eris[self._get_eris_slices(block)]
 
     def _get_cderi(self, coeff, *args, **kwargs):
         return self._fragment.base.get_cderi(coeff)
@@ -328,14 +344,13 @@ class RClusterHamiltonian:
         #   -using RHF (UHF would be more complicated).
         #   -using bare ERIs in cluster.
         #   -ERIs are PSD.
-        #   -our mean-field has DF.
+        #   -our mean-field has DF (or Cholesky-decomposed ERIs).
         use_df = (
             allow_df
             and np.ndim(clusmf.mo_coeff[1]) == 1
             and self.opts.screening is None
             and not (self._fragment.base.pbc_dimension in (1, 2))
-            and hasattr(self.orig_mf, "with_df")
-            and self.orig_mf.with_df is not None
+            and self._fragment.base.cderi_df is not None
         )
         clusmol.incore_anyway = not use_df
 
@@ -668,16 +683,26 @@ class UClusterHamiltonian(RClusterHamiltonian):
         return h_eff
 
     def get_eris_bare(self, block=None):
+        store = self._get_eris_store()
         if block is None:
             if self._eris is None:
-                with log_time(self.log.timing, "Time for AO->MO of ERIs:  %s"):
-                    eris = self._fragment.base.get_eris_array_uhf(self.cluster.c_active)
-                if self.opts.cache_eris:
+                coeff = self.cluster.c_active
+                eris = store.get(coeff) if store is not None else None
+                if eris is None:
+                    with log_time(self.log.timing, "Time for AO->MO of ERIs:  %s"):
+                        eris = self._fragment.base.get_eris_array_uhf(coeff)
+                    if store is not None:
+                        store.add(coeff, eris)
+                if self.opts.cache_eris and store is None:
                     self._eris = eris
                 return eris
             else:
                 return self._eris
         else:
+            if self._eris is None and store is not None:
+                eris = store.get(self.cluster.c_active)
+                if eris is not None:
+                    return self._get_eris_block(eris, block)
             if self._eris is None:
                 coeffs = [
                     self.cluster.c_active_occ[int(i.upper() == i)]
@@ -5,6 +5,7 @@ import scipy
 import scipy.optimize
 
 from vayesta.core.util import einsum, OptionsBase, break_into_lines, AbstractMethodError, replace_attr, ConvergenceError
+from vayesta.misc.cptbisect import ChempotNewton, get_mf_electron_response
 
 
 class ClusterSolver:
@@ -49,7 +50,7 @@ class ClusterSolver:
         information."""
         raise AbstractMethodError
 
-    def optimize_cpt(self, nelectron, c_frag, cpt_guess=0, atol=1e-6, rtol=1e-6, cpt_radius=0.5):
+    def optimize_cpt(self, nelectron, c_frag, cpt_guess=0, atol=1e-6, rtol=1e-6, cpt_radius=0.5, method="brentq"):
         """Enables chemical potential optimization to match a number of electrons in the fragment space.
 
         Parameters
@@ -65,7 +66,10 @@ class ClusterSolver:
         rtol: float, optional
             Relative electron number tolerance. Default: 1e-6
         cpt_radius: float, optional
-            Search radius for chemical potential. Default: 0.5.
+            Search radius for chemical potential. For method 'newton', this is the maximum step size. Default: 0.5.
+        method: {'brentq', 'newton'}, optional
+            Bracketing and Brent's method, or safeguarded Newton-secant iterations, starting from the mean-field
+            response of the fragment electron number. Default: 'brentq'.
 
         Returns
         -------
@@ -73,6 +77,8 @@ class ClusterSolver:
             Solver results.
         """
 
+        if method not in ("brentq", "newton"):
+            raise ValueError("Invalid method for chemical potential optimization: %r" % method)
         kernel_orig = self.kernel
         # Make projector into fragment space
 
@@ -120,10 +126,14 @@ class ClusterSolver:
                     )
 
                 err = ne_frag - nelectron
+                iterations += 1
                 self.log.debug(
-                    "Fragment chemical potential= %+12.8f Ha:  electrons= %.8f  error= %+.3e", cpt, ne_frag, err
+                    "Fragment chemical potential evaluation %2d: cpt= %+12.8f Ha  electrons= %.8f  error= %+.3e",
+                    iterations,
+                    cpt,
+                    ne_frag,
+                    err,
                 )
-                iterations += 1
                 if abs(err) < (atol + rtol * nelectron):
                     cpt_opt = cpt
                     raise CptFound()
@@ -132,6 +142,29 @@ class ClusterSolver:
                 init_guess = self.get_init_guess()
                 return err
 
+            if method == "newton":
+                dndcpt = get_mf_electron_response(
+                    self.hamil.get_fock(), self.hamil.cluster.nocc_active, self.hamil.target_space_projector(), p_frag
+                )
+                self.log.debug("Mean-field response of fragment electron number= %.3e", dndcpt)
+                newton = ChempotNewton(
+                    electron_err,
+                    cpt_init=cpt_guess,
+                    dfdx=dndcpt,
+                    tol=0,
+                    max_step=cpt_radius,
+                    errors=(ConvergenceError,),
+                    log=self.log,
+                )
+                try:
+                    newton.kernel()
+                except CptFound:
+                    self.log.info("Chemical potential optimized in %d iterations= %+16.8f Ha", iterations, cpt_opt)
+                    return result
+                errmsg = "Could not find chemical potential in %d iterations!" % iterations
+                self.log.critical(errmsg)
+                raise RuntimeError(errmsg)
+
             # First run with cpt_guess:
             try:
                 err0 = electron_err(cpt_guess)
@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+import pyscf.ao2mo
+
+import vayesta
+import vayesta.ewf
+from vayesta.core.ao2mo.cholesky import cholesky_eris
+from vayesta.tests import testsystems
+from vayesta.tests.common import TestCase
+
+
+class Test_Cholesky(TestCase):
+    def test_cholesky_eris(self):
+        mf = testsystems.water_631g.rhf()
+        nao = mf.mol.nao
+        eris_ref = pyscf.ao2mo.restore(4, mf.mol.intor("int2e", aosym="s8"), nao)
+        for eri in (mf._eri, None):
+            cderi = cholesky_eris(mf.mol, threshold=1e-10, eri=eri)
+            self.assertLess(cderi.shape[0], eris_ref.shape[0])
+            self.assertAllclose(np.dot(cderi.T, cderi), eris_ref, rtol=0, atol=1e-9)
+        cderi = cholesky_eris(mf.mol, max_vectors=10)
+        self.assertEqual(cderi.shape[0], 10)
+
+    def _test_embedding(self, mf):
+        emb = vayesta.ewf.EWF(mf, bath_options=dict(threshold=1e-4))
+        emb.kernel()
+        emb_cd = vayesta.ewf.EWF(mf, bath_options=dict(threshold=1e-4), cholesky_eris=1e-10)
+        emb_cd.kernel()
+        self.assertTrue(emb_cd.has_df)
+        # The mean-field has no density-fitting:
+        self.assertIsNone(emb_cd.df)
+        self.assertIsNotNone(emb_cd.cderi_df)
+        self.assertAlmostEqual(emb_cd.e_tot, emb.e_tot, 7)
+        for x, x_ref in zip(emb_cd.fragments, emb.fragments):
+            eris, eris_ref = x.hamil.get_eris_bare(), x_ref.hamil.get_eris_bare()
+            if isinstance(eris, tuple):
+                for g1, g2 in zip(eris, eris_ref):
+                    self.assertAllclose(g1, g2, rtol=0, atol=1e-8)
+            else:
+                self.assertAllclose(eris, eris_ref, rtol=0, atol=1e-8)
+
+    def test_rhf(self):
+        self._test_embedding(testsystems.water_631g.rhf())
+
+    def test_uhf(self):
+        self._test_embedding(testsystems.water_cation_631g.uhf())
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
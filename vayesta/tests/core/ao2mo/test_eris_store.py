@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+import vayesta
+import vayesta.ewf
+from vayesta.core.ao2mo.eris_store import ERIs_Store
+from vayesta.tests import testsystems
+from vayesta.tests.common import TestCase
+
+
+class Test_ERIs_Store(TestCase):
+    def test_lru(self):
+        rng = np.random.default_rng(0)
+        coeffs = [rng.random((5, 3)) for i in range(3)]
+        eris = [rng.random((3, 3, 3, 3)) for i in range(3)]
+        # Memory for two ERI arrays:
+        store = ERIs_Store(max_memory=2 * eris[0].nbytes)
+        for c, g in zip(coeffs, eris):
+            self.assertIsNone(store.get(c))
+            store.add(c, g)
+        self.assertEqual(store.memory, 2 * eris[0].nbytes)
+        # First ERIs are only stored on disk:
+        self.assertAllclose(store.get(coeffs[0], block=np.s_[:1, 1:, :, :2]), eris[0][:1, 1:, :, :2])
+        self.assertEqual(store.nhit_disk, 1)
+        self.assertAllclose(store.get(coeffs[0]), eris[0])
+        self.assertEqual(store.nhit_disk, 2)
+        # ERIs of the second coefficients were removed from memory:
+        self.assertAllclose(store.get(coeffs[2]), eris[2])
+        self.assertAllclose(store.get(coeffs[1]), eris[1])
+        self.assertEqual(store.nhit_memory, 1)
+        self.assertEqual(store.nhit_disk, 3)
+        # Spin-unrestricted ERIs:
+        coeff = (coeffs[0], coeffs[1])
+        self.assertNotIn(coeff, store)
+        store.add(coeff, tuple(eris))
+        store._memory.clear()
+        for g1, g2 in zip(store.get(coeff), eris):
+            self.assertAllclose(g1, g2)
+        store.clear()
+        self.assertNotIn(coeffs[0], store)
+
+
+class Test_StoreERIs(TestCase):
+    def _test_disk(self, mf):
+        emb = vayesta.ewf.EWF(mf, bath_options=dict(threshold=1e-4))
+        emb.kernel()
+        emb_disk = vayesta.ewf.EWF(mf, bath_options=dict(threshold=1e-4), store_eris="disk")
+        emb_disk.kernel()
+        self.assertAlmostEqual(emb_disk.e_tot, emb.e_tot, 10)
+        store = emb_disk._get_eris_store()
+        self.assertGreater(store.nhit_memory, 0)
+        for x in emb_disk.fragments:
+            self.assertIsNone(x.hamil._eris)
+            self.assertIn(x.cluster.c_active, store)
+            eris = x.hamil.get_eris_bare()
+            eris_ref = emb.fragments[x.id].hamil.get_eris_bare()
+            if isinstance(eris, tuple):
+                for g1, g2 in zip(eris, eris_ref):
+                    self.assertAllclose(g1, g2)
+            else:
+                self.assertAllclose(eris, eris_ref)
+                # Blocks are read from disk:
+                store._memory.clear()
+                self.assertAllclose(x.hamil.get_eris_bare("ovvo"), emb.fragments[x.id].hamil.get_eris_bare("ovvo"))
+
+    def test_rhf(self):
+        self._test_disk(testsystems.water_631g.rhf())
+
+    def test_uhf(self):
+        self._test_disk(testsystems.water_cation_631g.uhf())
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
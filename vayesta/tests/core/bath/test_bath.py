@@ -142,6 +142,47 @@ class MP2_BNO_Test(TestCase):
         self.assertAllclose(rbno_bath_vir.occup, ubno_bath_vir.occup[0])
         self.assertAllclose(rbno_bath_vir.occup, ubno_bath_vir.occup[1])
 
+    def test_cderi_store(self):
+        for mf, Emb in (
+            (testsystems.water_631g_df.rhf(), Embedding),
+            (testsystems.water_cation_631g_df.uhf(), UEmbedding),
+        ):
+            occup = []
+            for cderi_store in (None, "memory", "disk"):
+                emb = Emb(mf, cderi_store=cderi_store)
+                with emb.iao_fragmentation() as f:
+                    frag = f.add_atomic_fragment("O")
+                dmet_bath = DMET_Bath(frag)
+                dmet_bath.kernel()
+                bno_bath_occ = MP2_Bath(frag, dmet_bath, occtype="occupied")
+                bno_bath_vir = MP2_Bath(frag, dmet_bath, occtype="virtual")
+                occup.append((bno_bath_occ.occup, bno_bath_vir.occup))
+                self.assertEqual(len(emb._cderi_store), 0 if cderi_store is None else (1 if Emb is Embedding else 2))
+            self.assertAllclose(occup[1], occup[0])
+            self.assertAllclose(occup[2], occup[0])
+
+    def test_stream(self):
+        for mf in (testsystems.water_631g.rhf(), testsystems.water_631g_df.rhf()):
+            emb = Embedding(mf)
+            with emb.iao_fragmentation() as f:
+                frag = f.add_atomic_fragment("O")
+            dmet_bath = DMET_Bath(frag)
+            dmet_bath.kernel()
+            fock = emb.get_fock_for_bath()
+            for occtype in ("occupied", "virtual"):
+                for order in (0, 1, 2):
+                    bath = MP2_Bath(frag, dmet_bath, occtype=occtype, project_dmet_order=order, stream=False)
+                    bath_stream = MP2_Bath(frag, dmet_bath, occtype=occtype, project_dmet_order=order, stream=True)
+                    self.assertAllclose(bath_stream.occup, bath.occup)
+                    self.assertAlmostEqual(bath_stream.ecorr, bath.ecorr)
+                    # Small blocks:
+                    actspace = bath.get_active_space()
+                    t2, ecorr = bath._make_t2(actspace, fock)
+                    dm = bath.make_delta_dm1(t2, actspace)
+                    dm_stream, ecorr_stream = bath.make_delta_dm1_stream(actspace, fock, blksize=3)
+                    self.assertAllclose(dm_stream, dm)
+                    self.assertAlmostEqual(ecorr_stream, ecorr)
+
 
 class RPA_Test(TestCase):
     def test_bno_Bath(self):
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+import vayesta
+import vayesta.ewf
+from vayesta.tests import testsystems
+from vayesta.tests.common import TestCase
+
+
+class NeighborTests(TestCase):
+    def _test_neighbors(self, emb, tol):
+        occ = emb.get_fragment_overlap_norm(virtual=False, norm=None)
+        vir = emb.get_fragment_overlap_norm(occupied=False, norm=None)
+        for i, fx in enumerate(emb.get_fragments()):
+            neighbors = [fy.id for fy in emb.get_fragment_neighbors(fx, tol)]
+            self.assertIn(fx.id, neighbors)
+            expected = [fy.id for j, fy in enumerate(emb.get_fragments()) if min(occ[i, j], vir[i, j]) >= tol]
+            self.assertEqual(neighbors, expected)
+
+    def test_molecule(self):
+        mf = testsystems.water_chain_631g_df.rhf()
+        emb = vayesta.ewf.EWF(mf, solver="MP2", bath_options=dict(threshold=1e-4))
+        emb.kernel()
+        for tol in (1e-3, 1e-1):
+            self._test_neighbors(emb, tol)
+        # Some pairs of distant water molecules are not neighbors:
+        nx = len(emb.get_fragment_neighbors(emb.fragments[0], 1e-1))
+        self.assertLess(nx, len(emb.fragments))
+        # Neighbor lists are updated for new clusters:
+        for x in emb.fragments:
+            x.opts.bath_options = dict(x.opts.bath_options, threshold=1e-8)
+        emb.kernel()
+        self._test_neighbors(emb, 1e-1)
+        self.assertGreater(len(emb.get_fragment_neighbors(emb.fragments[0], 1e-1)), nx)
+
+    def test_symmetry(self):
+        mf = testsystems.h2_sto3g_k311.rhf()
+        emb = vayesta.ewf.EWF(mf, solver="MP2", bath_options=dict(threshold=1e-4))
+        emb.kernel()
+        self.assertGreater(len(emb.get_fragments(sym_parent=None)), 0)
+        self.assertGreater(len(emb.fragments), len(emb.get_fragments(sym_parent=None)))
+        self._test_neighbors(emb, 1e-3)
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+import numpy as np
+
+from vayesta.mpi import mpi
+from vayesta.core.qemb.register import FragmentRegister
+from vayesta.tests.common import TestCase
+
+
+class RegisterTests(TestCase):
+    def test_round_robin(self):
+        register = FragmentRegister(mpi_size=3)
+        ranks = [register.get_next()[1] for i in range(5)]
+        self.assertEqual(ranks, [0, 1, 2, 0, 1])
+
+    def test_distribute(self):
+        register = FragmentRegister(mpi_size=3)
+        costs = [1.0, 10.0, 2.0, 6.0, 4.0, 3.0]
+        ranks = register.distribute(costs)
+        load = np.zeros(3)
+        np.add.at(load, ranks, costs)
+        self.assertAllclose(load, register.get_mpi_load())
+        self.assertAllclose(np.sort(load), [8.0, 8.0, 10.0])
+
+    def test_rma_counter(self):
+        counter = mpi.create_rma_counter(start=2)
+        values = [counter.fetch_and_add(1) for i in range(3)]
+        counter.free()
+        if mpi.disabled:
+            self.assertEqual(values, [2, 3, 4])
+        else:
+            # Each value is fetched by exactly one MPI rank:
+            values = sum(mpi.world.allgather(values), [])
+            self.assertEqual(sorted(values), list(range(2, 2 + 3 * mpi.size)))
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
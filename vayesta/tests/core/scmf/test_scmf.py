@@ -1,5 +1,6 @@
 import unittest
 
+import vayesta
 from vayesta import ewf
 from vayesta.tests.common import TestCase
 from vayesta.tests import testsystems
@@ -19,16 +20,16 @@ class SCMF_Test(TestCase):
 
     @classmethod
     @cache
-    def emb(cls, scmf=None):
+    def emb(cls, scmf=None, warm_start=True):
         emb = ewf.EWF(
             cls.mf, solver=cls.solver, solver_options=dict(solve_lambda=True), bath_options=dict(bathtype="dmet")
         )
         with emb.sao_fragmentation() as f:
             f.add_all_atomic_fragments()
         if scmf == "pdmet":
-            emb.pdmet_scmf()
+            emb.pdmet_scmf(warm_start=warm_start)
         elif scmf == "brueckner":
-            emb.brueckner_scmf()
+            emb.brueckner_scmf(warm_start=warm_start)
         emb.kernel()
         return emb
 
@@ -50,6 +51,25 @@ class SCMF_Test(TestCase):
         self.assertTrue(emb.with_scmf.converged)
         self.assertAllclose(emb.with_scmf.e_tot, -1.1417339799464736)
 
+    def test_warm_start(self):
+        """Test that solvers started from the wave functions of the previous iteration give the same result."""
+        for scmf in ("pdmet", "brueckner"):
+            emb = self.emb(scmf)
+            emb0 = self.emb(scmf, warm_start=False)
+            self.assertTrue(emb.with_scmf.converged)
+            self.assertAllclose(emb.with_scmf.e_tot, emb0.with_scmf.e_tot, atol=1e-7, rtol=0)
+
+    def test_init_guess(self):
+        """Test that the initial guess from the wave function of the same cluster is the wave function itself."""
+        emb = self.emb()
+        if self.solver != "CCSD":
+            self.skipTest("Initial guess not supported for solver %s" % self.solver)
+        for x in emb.fragments:
+            wf = x.results.wf
+            init_guess = x.get_init_guess(wf)
+            for key in ("t1", "t2", "l1", "l2"):
+                self.assertAllclose(init_guess[key], getattr(wf, key), atol=1e-10, rtol=0)
+
 
 class SCMF_UHF_Test(SCMF_Test):
     @classmethod
@@ -79,6 +99,40 @@ class SCMF_TCCSD_Test(SCMF_Test):
         self.assertAllclose(emb.with_scmf.e_tot, -1.1348718457034288)
 
 
+@unittest.skipIf(vayesta.ebcc is None, "EBCC installation not found.")
+class SCMF_EBCC_Test(TestCase):
+    """The ebcc solvers do not support an initial guess; warm starts need to fall back to no initial guess."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mf = testsystems.h2_dz.rhf()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.mf
+
+    def emb(self, scmf, warm_start=True):
+        emb = ewf.EWF(self.mf, solver="EBCC", bath_options=dict(bathtype="dmet"))
+        with emb.sao_fragmentation() as f:
+            f.add_all_atomic_fragments()
+        if scmf == "pdmet":
+            emb.pdmet_scmf(warm_start=warm_start)
+        elif scmf == "brueckner":
+            emb.brueckner_scmf(warm_start=warm_start)
+        emb.kernel()
+        return emb
+
+    def test_warm_start(self):
+        for scmf in ("pdmet", "brueckner"):
+            emb = self.emb(scmf)
+            emb0 = self.emb(scmf, warm_start=False)
+            self.assertGreaterEqual(len(emb.with_scmf.energies), 2)
+            self.assertTrue(emb.with_scmf.converged)
+            self.assertAllclose(emb.with_scmf.e_tot, emb0.with_scmf.e_tot, atol=1e-7, rtol=0)
+            for x in emb.fragments:
+                self.assertEqual(x.get_init_guess(x.results.wf), {})
+
+
 if __name__ == "__main__":
     print("Running %s" % __file__)
     unittest.main()
@@ -95,6 +95,39 @@ class HubbardDMETTests(TestCase):
         self._test_converged(emb)
         self._test_energy(emb, known_values)
 
+    def test_6x6_u6_1x1imp_newton(self):
+        """Tests Newton-secant chemical potential optimization against brentq for 6x6 U=6 Hubbard model."""
+        e_tot = {}
+        ncalls = {}
+        for method in ["brentq", "newton"]:
+            emb = dmet.DMET(
+                testsystems.hubb_6x6_u6_1x1imp.rhf(),
+                solver="FCI",
+                charge_consistent=False,
+                conv_tol=self.CONV_TOL,
+                maxiter=50,
+                max_elec_err=1e-8,
+                cpt_method=method,
+                solver_options={"conv_tol": 1e-12},
+            )
+            with emb.site_fragmentation() as f:
+                frag = f.add_atomic_fragment([0])
+                frag.add_tsymmetric_fragments(tvecs=[6, 6, 1])
+            calls = []
+            kernel = frag.kernel
+
+            def kernel_with_record(*args, **kwargs):
+                calls.append(kwargs["chempot"])
+                return kernel(*args, **kwargs)
+
+            frag.kernel = kernel_with_record
+            emb.kernel()
+            self._test_converged(emb)
+            e_tot[method] = emb.e_tot
+            ncalls[method] = len(calls)
+        self.assertAlmostEqual(e_tot["newton"], e_tot["brentq"], self.PLACES_ENERGY)
+        self.assertLess(ncalls["newton"], ncalls["brentq"])
+
     def test_8x8_u2_2x2imp(self):
         """Tests for 8x8 U=2 Hubbard model with 2x2 impurities."""
         emb = dmet.DMET(
@@ -108,12 +141,25 @@ class HubbardDMETTests(TestCase):
         with emb.site_fragmentation() as f:
             frag = f.add_atomic_fragment([0, 1, 2, 3])
             frag.add_tsymmetric_fragments(tvecs=[4, 4, 1])
+        # Record chemical potentials of solver calls:
+        calls = []
+        kernel = frag.kernel
+
+        def kernel_with_record(*args, **kwargs):
+            calls.append((emb.iteration, kwargs["chempot"]))
+            return kernel(*args, **kwargs)
+
+        frag.kernel = kernel_with_record
         emb.kernel()
 
         known_values = {"e_tot": -85.02643076273672}
 
         self._test_converged(emb)
         self._test_energy(emb, known_values)
+        # The chemical potential search requires a bracket in the first iteration:
+        self.assertGreater(len(calls), emb.iteration)
+        # No chemical potential should be solved twice within one iteration:
+        self.assertEqual(len(calls), len(set(calls)))
 
 
 if __name__ == "__main__":
@@ -96,6 +96,26 @@ class MoleculeTest(TestCase):
         self._test_converged(emb)
         self._test_energy(emb, known_values)
 
+    def test_nocc_ccsd_warm_start(self):
+        """Test H6 STO-6G with CCSD solver started from the amplitudes of the previous DMET iteration."""
+        emb = dmet.DMET(
+            testsystems.h6_sto6g.rhf(),
+            solver="CCSD",
+            charge_consistent=False,
+            bath_options=dict(bathtype="dmet"),
+            conv_tol=self.CONV_TOL,
+            warm_start=True,
+        )
+        with emb.iao_fragmentation() as f:
+            f.add_atomic_fragment([0, 1])
+            f.add_atomic_fragment([2, 3])
+            f.add_atomic_fragment([4, 5])
+        emb.kernel()
+
+        self._test_converged(emb)
+        # Differences at the level of the CCSD convergence tolerance are expected:
+        self.assertAlmostEqual(emb.e_tot, -3.2593387676678667, 6)
+
     def test_renorm_interaction(self):
         emb = dmet.DMET(
             testsystems.h6_sto6g_df.uhf(),
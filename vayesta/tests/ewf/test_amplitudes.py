@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+import vayesta
+import vayesta.ewf
+from vayesta.core.util import cache, einsum
+from vayesta.core.vpyscf import ccsd_rdm
+from vayesta.ewf.rdm import _get_mockcc, _gamma1_intermediates_blocked
+from vayesta.tests import testsystems
+from vayesta.tests.common import TestCase
+
+
+class Test_BlockedAmplitudes(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mf = testsystems.water_631g.rhf()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.mf
+        cls.emb.cache_clear()
+
+    @classmethod
+    @cache
+    def emb(cls):
+        solver_opts = dict(conv_tol=1e-10, conv_tol_normt=1e-8, solve_lambda=True)
+        emb = vayesta.ewf.EWF(cls.mf, bath_options=dict(threshold=1e-4), solver_options=solver_opts)
+        emb.kernel()
+        return emb
+
+    def test_t2(self):
+        emb = self.emb()
+        for blksize in (1, 2, None):
+            t2 = emb.get_global_t2_blocks(blksize=blksize)
+            l2 = emb.get_global_l2_blocks(blksize=blksize)
+            self.assertAllclose(t2.to_array(), emb.get_global_t2(), rtol=0, atol=1e-12)
+            self.assertAllclose(l2.to_array(), emb.get_global_l2(), rtol=0, atol=1e-12)
+
+    def test_dm1(self):
+        emb = self.emb()
+        t1, l1 = emb.get_global_t1(), emb.get_global_l1()
+        mockcc = _get_mockcc(emb.mo_coeff, emb.mf.max_memory)
+        dm1_ref = ccsd_rdm.make_rdm1(mockcc, t1, emb.get_global_t2(), l1, emb.get_global_l2(), with_mf=False)
+        t2 = emb.get_global_t2_blocks(blksize=2)
+        l2 = emb.get_global_l2_blocks(blksize=2)
+        dm1 = ccsd_rdm._make_rdm1(mockcc, _gamma1_intermediates_blocked(t1, t2, l1, l2), with_mf=False)
+        self.assertAllclose(dm1, dm1_ref, rtol=0, atol=1e-12)
+        self.assertAllclose(emb.make_rdm1(slow=True, with_mf=False), dm1_ref, rtol=0, atol=1e-12)
+
+    def test_ccsd_energy(self):
+        emb = self.emb()
+        t1 = emb.get_global_t1()
+        c2 = emb.get_global_t2() + einsum("ia,jb->ijab", t1, t1)
+        eris = emb.get_eris_array((emb.mo_coeff_occ, emb.mo_coeff_vir, emb.mo_coeff_vir, emb.mo_coeff_occ))
+        e_doubles = 2 * einsum("ijab,iabj", c2, eris) - einsum("ijab,ibaj", c2, eris)
+        fov = np.linalg.multi_dot((emb.mo_coeff_occ.T, emb.get_fock_for_energy(), emb.mo_coeff_vir))
+        e_ref = 2 * np.sum(fov * t1) + e_doubles
+        self.assertAllclose(emb.get_ccsd_corr_energy(full_wf=True), e_ref, rtol=0, atol=1e-12)
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+import numpy as np
+import vayesta
+import vayesta.ewf
+import vayesta.solver
+from vayesta.ewf import ccsd_t
+from vayesta.libs import libembwf
+from vayesta.tests import testsystems
+from vayesta.tests.common import TestCase
+
+
+class Test_CCSD_T(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mf = testsystems.water_631g.rhf()
+        cls.cc = testsystems.water_631g.rccsd()
+        cls.e_t = cls.cc.ccsd_t()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.mf
+        del cls.cc
+        del cls.e_t
+
+    def _get_kernel_args(self):
+        eris = self.cc.ao2mo()
+        return (eris.fock, np.asarray(eris.get_ovvv()), np.asarray(eris.ovoo), np.asarray(eris.ovov))
+
+    def test_kernel_python(self):
+        t1, t2 = self.cc.t1, self.cc.t2
+        e_t = ccsd_t.kernel(t1, t2, t2, *self._get_kernel_args(), driver="python", max_memory=int(1e6))
+        self.assertAllclose(e_t, self.e_t, rtol=0)
+
+    @unittest.skipIf(libembwf is None, "Library 'libembwf' not found")
+    def test_kernel_c(self):
+        t1, t2 = self.cc.t1, self.cc.t2
+        args = self._get_kernel_args()
+        e_t = ccsd_t.kernel(t1, t2, t2, *args, driver="c")
+        self.assertAllclose(e_t, self.e_t, rtol=0)
+        # Projected amplitudes:
+        nocc = t1.shape[0]
+        proj = np.zeros((nocc, nocc))
+        proj[:2, :2] = np.eye(2)
+        t2x = np.einsum("ij,j...->i...", proj, t2)
+        t2x = (t2x + t2x.transpose(1, 0, 3, 2)) / 2
+        e_c = ccsd_t.kernel(t1, t2, t2x, *args, driver="c")
+        e_py = ccsd_t.kernel(t1, t2, t2x, *args, driver="python")
+        self.assertAllclose(e_c, e_py, rtol=0)
+
+    def test_full_bath(self):
+        emb = vayesta.ewf.EWF(self.mf, solver="CCSD(T)", bath_options=dict(bathtype="full"))
+        emb.kernel()
+        self.assertAllclose(emb.get_pert_t_energy(), self.e_t, rtol=0)
+        self.assertAllclose(emb.e_tot, self.cc.e_tot + self.e_t, rtol=0)
+
+    def test_solver_routing(self):
+        # Only EWF adds the fragment projected (T) correction to the CCSD solver:
+        emb = vayesta.ewf.EWF(self.mf, solver="CCSD(T)")
+        self.assertEqual(emb._get_cluster_solver("CCSD(T)"), "CCSD")
+        try:
+            solver_cls = vayesta.solver._get_solver_class_internal(False, False, "CCSD(T)", emb.log)
+        except ImportError:
+            return
+        self.assertIsNot(solver_cls, vayesta.solver.RCCSD_Solver)
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+
+import h5py
+
+import vayesta
+import vayesta.ewf
+from vayesta.tests import testsystems
+from vayesta.tests.common import TestCase
+
+
+class Test_Checkpoint(TestCase):
+    def setUp(self):
+        fd, self.checkpoint = tempfile.mkstemp(suffix=".h5")
+        os.close(fd)
+        os.remove(self.checkpoint)
+
+    def tearDown(self):
+        if os.path.isfile(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def _run(self, mf, solver, threshold=1e-4):
+        """Run EWF and return embedding object and IDs of the fragments, which were solved."""
+        emb = vayesta.ewf.EWF(mf, solver=solver, bath_options=dict(threshold=threshold), checkpoint=self.checkpoint)
+        solved = []
+        solve = emb._solve_fragment
+        emb._solve_fragment = lambda x: (solved.append(x.id), solve(x))
+        emb.kernel()
+        return emb, solved
+
+    def _test_restart(self, mf, solver):
+        emb, solved = self._run(mf, solver)
+        self.assertEqual(solved, [x.id for x in emb.fragments])
+        # Remove checkpoint of last fragment, as if the calculation was interrupted:
+        fid = emb.fragments[-1].id
+        with h5py.File(self.checkpoint, "a") as f:
+            self.assertEqual(len(f.keys()), len(emb.fragments))
+            del f["fragment_%d" % fid]
+
+        emb2, solved = self._run(mf, solver)
+        self.assertEqual(solved, [fid])
+        self.assertAllclose(emb2.e_tot, emb.e_tot, rtol=0, atol=1e-10)
+        for x, x2 in zip(emb.fragments, emb2.fragments):
+            self.assertAllclose(x2.results.e_corr, x.results.e_corr, rtol=0, atol=1e-10)
+            self.assertAllclose(x2.results.pwf.t2, x.results.pwf.t2, rtol=0, atol=1e-10)
+        with h5py.File(self.checkpoint, "r") as f:
+            self.assertEqual(len(f.keys()), len(emb.fragments))
+
+    def test_rhf_ccsd(self):
+        self._test_restart(testsystems.water_631g.rhf(), "CCSD")
+
+    def test_rhf_mp2(self):
+        self._test_restart(testsystems.water_631g.rhf(), "MP2")
+
+    def test_uhf_ccsd(self):
+        self._test_restart(testsystems.water_cation_631g.uhf(), "CCSD")
+
+    def test_invalid(self):
+        mf = testsystems.water_631g.rhf()
+        emb, solved = self._run(mf, "MP2")
+        # The cluster of the oxygen atom is complete for both bath thresholds; only the hydrogen atoms are solved:
+        emb, solved = self._run(mf, "MP2", threshold=1e-6)
+        self.assertEqual(solved, [x.id for x in emb.fragments if x.atoms != [0]])
+        emb_ref = vayesta.ewf.EWF(mf, solver="MP2", bath_options=dict(threshold=1e-6))
+        emb_ref.kernel()
+        self.assertAllclose(emb.e_tot, emb_ref.e_tot, rtol=0, atol=1e-10)
+        # Different solver: all fragments are solved
+        emb, solved = self._run(mf, "CCSD", threshold=1e-6)
+        self.assertEqual(solved, [x.id for x in emb.fragments])
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
@@ -3,6 +3,7 @@ import numpy as np
 import vayesta
 import vayesta.ewf
 from vayesta.core.util import cache
+from vayesta.misc import corrfunc
 from vayesta.tests import testsystems
 from vayesta.tests.common import TestCase
 
@@ -125,6 +126,19 @@ class Test_RCCSD(TestCase):
         self.assertAllclose(corr_r, ssz, atol=1e-6)
         self.assertAllclose(corr_u, ssz, atol=1e-6)
 
+    def test_chargecharge(self):
+        remb = self.remb(-1)
+        dm1 = self.rcc.make_rdm1()
+        dm2 = self.rcc.make_rdm2()
+        atoms1, atoms2, proj = remb._get_atom_projectors()
+        for kind, subtract_indep in (("n,n", False), ("dn,dn", True)):
+            ref = np.zeros((len(atoms1), len(atoms2)))
+            for a, atom1 in enumerate(atoms1):
+                for b, atom2 in enumerate(atoms2):
+                    ref[a, b] = corrfunc.chargecharge(dm1, dm2, proj[atom1], proj[atom2], subtract_indep)
+            self.assertAllclose(remb.get_corrfunc(kind), ref, atol=1e-6)
+            self.assertAllclose(remb.get_corrfunc(kind, dm1=dm1, dm2=dm2), ref, atol=1e-6)
+
 
 class Test_RMP2(Test_RCCSD):
     system = testsystems.h2_dz
@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 
 import vayesta
+import vayesta.ewf
 
 from vayesta.core.util import cache
 from vayesta.tests.common import TestCase
@@ -51,6 +52,14 @@ class ICMP2_RHF_Test(ICMP2_Test):
         e_ic = emb.get_intercluster_mp2_energy(bno_threshold_vir=1e-4)
         self.assertAllclose(e_ic, 0)
 
+    def test_blocked(self):
+        emb = self.emb(np.inf)
+        for project_dc in ("occ", "vir", "both", None):
+            e_ref = emb.get_intercluster_mp2_energy(bno_threshold_vir=1e-5, project_dc=project_dc)
+            # Minimal memory results in blocks of size one:
+            e_ic = emb.get_intercluster_mp2_energy(bno_threshold_vir=1e-5, project_dc=project_dc, max_memory=1)
+            self.assertAllclose(e_ic, e_ref, rtol=0, atol=1e-12)
+
 
 class ICMP2_UHF_Test(ICMP2_Test):
     @classmethod
@@ -69,6 +78,11 @@ class ICMP2_UHF_Test(ICMP2_Test):
         e_ic = emb.get_intercluster_mp2_energy(1e-4)
         self.assertAllclose(e_ic, 0)
 
+    def test_blocked(self):
+        emb = self.emb(np.inf)
+        e_ic = emb.get_intercluster_mp2_energy(1e-5, max_memory=1)
+        self.assertAllclose(e_ic, -0.048787144599376324)
+
 
 class ICMP2_RHF_PBC_Test(ICMP2_Test):
     @classmethod
@@ -110,6 +124,36 @@ class ICMP2_UHF_PBC_Test(ICMP2_Test):
         self.assertAllclose(e_ic, -0.0010737526376497356)
 
 
+class ICMP2_Screening_Test(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mf = testsystems.water_chain_631g_df.rhf()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.mf
+
+    def _test_screening(self, mf):
+        emb = vayesta.ewf.EWF(mf, solver="MP2", bath_options=dict(threshold=np.inf, project_dmet_order=0))
+        with emb.iao_fragmentation(minao="minao") as f:
+            for i in range(emb.mol.natm // 3):
+                f.add_atomic_fragment([3 * i, 3 * i + 1, 3 * i + 2])
+        emb.kernel()
+        e_ref = emb.get_intercluster_mp2_energy(1e-5)
+        # No pairs are skipped:
+        e_ic = emb.get_intercluster_mp2_energy(1e-5, screening_tol=1e-12)
+        self.assertAllclose(e_ic, e_ref, rtol=0, atol=1e-14)
+        e_ic = emb.get_intercluster_mp2_energy(1e-5, screening_tol=1e-6)
+        self.assertNotAlmostEqual(e_ic, e_ref, 10)
+        self.assertAllclose(e_ic, e_ref, rtol=0, atol=1e-5)
+
+    def test_rhf(self):
+        self._test_screening(self.mf)
+
+    def test_uhf(self):
+        self._test_screening(self.mf.to_uhf())
+
+
 if __name__ == "__main__":
     print("Running %s" % __file__)
     unittest.main()
@@ -10,6 +10,7 @@ from vayesta.tests.common import TestCase
 class TestCCSD(TestCase):
     solver = "CCSD"
     targets = [9.0, 0.7, 0.3]
+    method = "brentq"
 
     @classmethod
     def setUpClass(cls):
@@ -18,7 +19,12 @@ class TestCCSD(TestCase):
     @classmethod
     @cache
     def emb(cls, bno_threshold):
-        emb = vayesta.ewf.EWF(cls.mf, solver=cls.solver, bath_options=dict(threshold=bno_threshold))
+        emb = vayesta.ewf.EWF(
+            cls.mf,
+            solver=cls.solver,
+            bath_options=dict(threshold=bno_threshold),
+            nelectron_target_method=cls.method,
+        )
         with emb.sao_fragmentation() as f:
             f.add_atomic_fragment(
                 0, nelectron_target=cls.targets[0], nelectron_target_atol=1e-7, nelectron_target_rtol=0
@@ -80,6 +86,14 @@ class TestUFCI(TestUCCSD):
         cls.mf = testsystems.water_cation_sto3g.rhf()
 
 
+class TestCCSDNewton(TestCCSD):
+    method = "newton"
+
+
+class TestUFCINewton(TestUFCI):
+    method = "newton"
+
+
 if __name__ == "__main__":
     print("Running %s" % __file__)
     unittest.main()
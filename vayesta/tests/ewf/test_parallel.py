@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+
+import vayesta
+import vayesta.ewf
+from vayesta.core.qemb.register import estimate_solver_cost
+from vayesta.mpi import mpi
+from vayesta.tests.common import TestCase
+from vayesta.tests import testsystems
+
+
+class Test_Parallel(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mf = testsystems.water_631g_df.rhf()
+        cls.emb = vayesta.ewf.EWF(cls.mf, bath_options=dict(threshold=1e-4))
+        cls.emb.kernel()
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.mf, cls.emb
+
+    def test_load_balance(self):
+        emb = vayesta.ewf.EWF(self.mf, bath_options=dict(threshold=1e-4), mpi_load_balance=True)
+        emb.kernel()
+        costs = [estimate_solver_cost(x.cluster, x.solver) for x in emb.fragments]
+        self.assertTrue(all(c > 0 for c in costs))
+        self.assertAlmostEqual(emb.e_tot, self.emb.e_tot)
+
+    @unittest.skipIf(mpi.size < 2, "Dynamic MPI dispatch requires at least 2 MPI ranks (run with mpirun -np 2)")
+    def test_dynamic_dispatch(self):
+        emb = vayesta.ewf.EWF(self.mf, bath_options=dict(threshold=1e-4), mpi_dynamic_dispatch=True)
+        emb.kernel()
+        self.assertAlmostEqual(emb.e_tot, self.emb.e_tot)
+        # Each fragment is owned by exactly one MPI rank, which also holds its bath and results:
+        owned = emb.get_fragments(sym_parent=None, mpi_rank=mpi.rank)
+        for x in owned:
+            self.assertIsNotNone(x._dmet_bath)
+            self.assertIsNotNone(x._bath_factory_occ)
+            self.assertIsNotNone(x.results.wf)
+        nowned = mpi.world.allgather(len(owned))
+        self.assertEqual(sum(nowned), len(emb.get_fragments(sym_parent=None)))
+
+    def test_fragment_workers(self):
+        emb = vayesta.ewf.EWF(self.mf, bath_options=dict(threshold=1e-4), fragment_workers=3, fragment_worker_threads=1)
+        emb.kernel()
+        self.assertAlmostEqual(emb.e_tot, self.emb.e_tot)
+
+    def test_fragment_workers_checkpoint(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            results = []
+            for workers in (1, 2):
+                checkpoint = os.path.join(tmpdir, "checkpoint-%d.h5" % workers)
+                emb = vayesta.ewf.EWF(
+                    self.mf,
+                    bath_options=dict(threshold=1e-4),
+                    fragment_workers=workers,
+                    fragment_worker_threads=1,
+                    checkpoint=checkpoint,
+                )
+                emb.kernel()
+                data = {}
+
+                def read(name, obj):
+                    if isinstance(obj, h5py.Dataset):
+                        data[name] = obj[()]
+
+                with h5py.File(checkpoint, "r") as f:
+                    self.assertEqual(len(f.keys()), len(emb.fragments))
+                    f.visititems(read)
+                results.append((emb.e_tot, data))
+            (e_serial, data_serial), (e_workers, data_workers) = results
+            self.assertAlmostEqual(e_workers, e_serial)
+            self.assertEqual(sorted(data_workers), sorted(data_serial))
+            for key, val in data_serial.items():
+                self.assertAllclose(data_workers[key], val, atol=1e-6, rtol=0)
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
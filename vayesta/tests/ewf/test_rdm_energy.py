@@ -33,6 +33,31 @@ class Test_RHF(TestCase):
         self.assertAlmostEqual(ewf.get_dm_energy(), cc.e_tot)
 
 
+class Test_RHF_DF(TestCase):
+    def test_blocked(self):
+        mf = testsystems.water_631g_df.rhf()
+        ewf = vayesta.ewf.EWF(
+            mf, bath_options=dict(threshold=1e-4), solver_options=dict(solve_lambda=True), calc_e_dm_corr=True
+        )
+        ewf.kernel()
+        e_ref = ewf.get_dm_corr_energy_e2()
+        for x in ewf.fragments:
+            ex = x.make_fragment_dm2cumulant_energy(blocked=True)
+            self.assertAlmostEqual(ex, x.results.e_corr_dm2cumulant, 12)
+            # Blocks of a single orbital:
+            ex = x.make_fragment_dm2cumulant_energy(blocked=True, max_memory=1)
+            self.assertAlmostEqual(ex, x.results.e_corr_dm2cumulant, 12)
+        ewf = vayesta.ewf.EWF(
+            mf,
+            bath_options=dict(threshold=1e-4),
+            solver_options=dict(solve_lambda=True),
+            calc_e_dm_corr=True,
+            dm2_energy_blocked=True,
+        )
+        ewf.kernel()
+        self.assertAlmostEqual(ewf.get_dm_corr_energy_e2(), e_ref, 10)
+
+
 class Test_UHF(TestCase):
     def test(self):
         # RHF
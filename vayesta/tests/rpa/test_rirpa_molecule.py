@@ -1,10 +1,74 @@
+import functools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
+import numpy as np
+
+import vayesta
 from vayesta import rpa
 from vayesta.tests.common import TestCase
 from vayesta.tests import testsystems
 
 
+class _ThreadMPI:
+    """Simulates MPI ranks by threads, supporting the collective `world.allreduce`."""
+
+    def __init__(self, size):
+        self.size = size
+        self.world = self
+        self._local = threading.local()
+        self._barrier = threading.Barrier(size, timeout=600)
+        self._buffer = size * [None]
+
+    def __bool__(self):
+        return self.size > 1
+
+    @property
+    def rank(self):
+        return self._local.rank
+
+    @property
+    def is_master(self):
+        return self.rank == 0
+
+    def allreduce(self, x):
+        self._buffer[self.rank] = x
+        self._barrier.wait()
+        result = functools.reduce(np.add, self._buffer)
+        self._barrier.wait()
+        return result
+
+    def run(self, func):
+        """Run `func` on all simulated ranks and return the list of results."""
+        results = self.size * [None]
+        errors = []
+
+        def target(rank):
+            self._local.rank = rank
+            try:
+                results[rank] = func()
+            except BaseException as e:
+                errors.append(e)
+                self._barrier.abort()
+
+        threads = [threading.Thread(target=target, args=(rank,)) for rank in range(self.size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            # Other ranks fail with BrokenBarrierError, after one rank raised the original exception:
+            errors.sort(key=lambda e: isinstance(e, threading.BrokenBarrierError))
+            raise errors[0]
+        return results
+
+
 class MoleculeRPATest(TestCase):
     PLACES = 8
 
@@ -48,6 +112,129 @@ class MoleculeRPATest(TestCase):
         self.assertAlmostEqual(error_est[0], 0.05074756294730469)
         self.assertAlmostEqual(error_est[1], 0.00024838720802440015)
 
+    def test_n2_ccpvdz_dRIRPA_batched(self):
+        """Test that batched and threaded evaluation of the frequency points gives the same results."""
+        mf = testsystems.n2_ccpvdz_df.rhf()
+        for rpa_cls in (rpa.rirpa.ssRIRRPA, rpa.rirpa.ssRIdRRPA):
+            rirpa = rpa_cls(mf)
+            moms, error_est = rirpa.kernel_moms(1, npoints=8)
+            e_corr = rirpa.kernel_energy(npoints=8)[0]
+            rirpa_batched = rpa_cls(mf, ni_batch_size=3, ni_threads=2)
+            moms_batched, error_est_batched = rirpa_batched.kernel_moms(1, npoints=8)
+            self.assertAllclose(moms_batched, moms, atol=1e-10, rtol=0)
+            self.assertEqual(error_est_batched[0] is None, error_est[0] is None)
+            if error_est[0] is not None:
+                self.assertAlmostEqual(error_est_batched[0], error_est[0])
+            self.assertAlmostEqual(rirpa_batched.kernel_energy(npoints=8)[0], e_corr)
+
+    def test_n2_ccpvdz_dRIRPA_mpi_ov(self):
+        """Test that distributing the particle-hole excitations over MPI ranks gives the same results."""
+        mf = testsystems.n2_ccpvdz_df.rhf()
+        rirpa = rpa.rirpa.ssRIRRPA(mf)
+        kwargs = dict(npoints=8, opt_quad=False, ainit=2.0)
+        moms, error_est = rirpa.kernel_moms(2, **kwargs)
+        e_corr = rirpa.kernel_energy(npoints=8)[0]
+
+        def run():
+            rirpa_dist = rpa.ssRIRPA(mf, mpi_ov=True)
+            self.assertIsInstance(rirpa_dist, rpa.rirpa.ssRIRRPA)
+            moms_dist, error_est_dist = rirpa_dist.kernel_moms(2, **kwargs)
+            return rirpa_dist.ov_slice, moms_dist, error_est_dist[0], rirpa_dist.kernel_energy(npoints=8)[0]
+
+        # MPI ranks are simulated by threads:
+        for nranks in (1, 2, 3):
+            fake_mpi = _ThreadMPI(nranks)
+            with mock.patch("vayesta.rpa.rirpa.RIRPA.mpi", fake_mpi), mock.patch(
+                "vayesta.rpa.rirpa.NI_eval.mpi", fake_mpi
+            ):
+                results = fake_mpi.run(run)
+            ov_slices = [res[0] for res in results]
+            self.assertEqual(ov_slices[0].start, 0)
+            self.assertEqual(ov_slices[-1].stop, rirpa.ov_tot)
+            for slc0, slc1 in zip(ov_slices[:-1], ov_slices[1:]):
+                self.assertEqual(slc0.stop, slc1.start)
+            for slc, moms_dist, err0, e_corr_dist in results:
+                self.assertAllclose(moms_dist, moms[:, :, slc], atol=1e-10, rtol=0)
+                self.assertAlmostEqual(err0, error_est[0])
+                self.assertAlmostEqual(e_corr_dist, e_corr)
+
+    def test_n2_ccpvdz_dRIRPA_stacked(self):
+        """Test that stacking several target rotations gives the same moments as separate calculations."""
+        mf = testsystems.n2_ccpvdz_df.rhf()
+        for rpa_cls in (rpa.rirpa.ssRIRRPA, rpa.rirpa.ssRIdRRPA):
+            rirpa = rpa_cls(mf)
+            rng = np.random.default_rng(0)
+            target_rots = [rng.random((n, rirpa.ov_tot)) for n in (3, 0, 5)] + [None]
+            moms, error_est = rirpa.kernel_moms_stacked(2, target_rots, npoints=8)
+            self.assertEqual([m.shape for m in moms], [(3, n, rirpa.ov_tot) for n in (3, 0, 5, 0)])
+            for rot, mom in zip(target_rots[:3:2], moms[:3:2]):
+                self.assertAllclose(mom, rirpa.kernel_moms(2, rot, npoints=8)[0], atol=1e-10, rtol=0)
+
+    def test_n2_ccpvdz_dRIRPA_ri_cache(self):
+        """Test that the RI decompositions are only constructed once, and can be reused from a file."""
+        mf = testsystems.n2_ccpvdz_df.rhf()
+        fd, filename = tempfile.mkstemp(suffix=".h5")
+        os.close(fd)
+        os.remove(filename)
+        try:
+            for rpa_cls in (rpa.rirpa.ssRIRRPA, rpa.rirpa.ssRIdRRPA):
+                rirpa = rpa_cls(mf)
+                with mock.patch.object(rirpa, "make_compressed_MP", wraps=rirpa.make_compressed_MP) as make:
+                    rirpa.kernel_moms(1, npoints=8)
+                    rirpa.kernel_energy(npoints=8)
+                    self.assertEqual(make.call_count, 1)
+                    rirpa.get_compressed_MP(alpha=0.5)
+                    self.assertEqual(make.call_count, 2)
+                    rirpa.update_mf(mf)
+                    rirpa.get_compressed_MP()
+                    self.assertEqual(make.call_count, 3)
+                rirpa = rpa_cls(mf, ri_cache_file=filename)
+                moms = rirpa.kernel_moms(1, npoints=8)[0]
+                e_corr = rirpa.kernel_energy(npoints=8)[0]
+                # A new object reuses the decompositions stored in the file.
+                rirpa = rpa_cls(mf, ri_cache_file=filename)
+                with mock.patch.object(rirpa, "make_compressed_MP", wraps=rirpa.make_compressed_MP) as make:
+                    self.assertAllclose(rirpa.kernel_moms(1, npoints=8)[0], moms, atol=1e-12, rtol=0)
+                    self.assertAlmostEqual(rirpa.kernel_energy(npoints=8)[0], e_corr)
+                    self.assertEqual(make.call_count, 0)
+        finally:
+            if os.path.isfile(filename):
+                os.remove(filename)
+
+    def test_n2_ccpvdz_dRIRPA_ri_cache_new_process(self):
+        """Test that the RI decompositions stored in a file are found by a new process."""
+        mf = testsystems.n2_ccpvdz_df.rhf()
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "ri_cache.h5")
+            mo_file = os.path.join(tmpdir, "mo.npz")
+            np.savez(mo_file, mo_coeff=mf.mo_coeff, mo_energy=mf.mo_energy, mo_occ=mf.mo_occ)
+            rirpa = rpa.rirpa.ssRIRRPA(mf, ri_cache_file=filename)
+            self.assertIsNone(rirpa.rixc)
+            rirpa.get_compressed_MP()
+            script = "\n".join(
+                [
+                    "import sys",
+                    "import numpy as np",
+                    "from vayesta import rpa",
+                    "from vayesta.tests import testsystems",
+                    "mf = testsystems.n2_ccpvdz_df.rhf()",
+                    "mo = np.load(sys.argv[1])",
+                    "mf.mo_coeff, mf.mo_energy, mf.mo_occ = mo['mo_coeff'], mo['mo_energy'], mo['mo_occ']",
+                    "rirpa = rpa.rirpa.ssRIRRPA(mf, ri_cache_file=sys.argv[2])",
+                    "sys.exit(0 if rirpa._load_ri_decomps((1.0, rirpa._get_state_key())) is not None else 1)",
+                ]
+            )
+            env = dict(os.environ)
+            root = os.path.dirname(os.path.dirname(vayesta.__file__))
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [root, env.get("PYTHONPATH")]))
+            proc = subprocess.run(
+                [sys.executable, "-c", script, mo_file, filename], capture_output=True, text=True, env=env
+            )
+            self.assertEqual(proc.returncode, 0, msg=proc.stderr)
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 if __name__ == "__main__":
     print("Running %s" % __file__)
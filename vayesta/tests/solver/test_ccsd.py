@@ -3,9 +3,11 @@ import unittest
 
 import pyscf
 import pyscf.cc
+import pyscf.cc.dfccsd
 
 import vayesta
 import vayesta.ewf
+import vayesta.solver.ccsd
 
 from vayesta.tests.common import TestCase
 from vayesta.tests import testsystems
@@ -38,6 +40,41 @@ class TestSolvers(TestCase):
         return self._test(("h3_ccpvdz_df", "uhf"))
 
 
+class TestDFCCSD(TestCase):
+    def test_df(self):
+        mf = testsystems.water_631g_df.rhf()
+        energies = []
+        for df in (False, None, True):
+            emb = vayesta.ewf.EWF(mf, bath_options=dict(threshold=1e-4), solver_options=dict(df=df))
+            emb.kernel()
+            energies.append(emb.e_tot)
+            dm1 = emb.make_rdm1()
+            if df is None:
+                dm1_ref = dm1
+        self.assertAlmostEqual(energies[1], energies[0], 8)
+        self.assertAlmostEqual(energies[2], energies[1], 8)
+        self.assertAllclose(dm1, dm1_ref, atol=1e-7)
+
+    def test_df_ovvv(self):
+        mf = testsystems.water_631g_df.rhf()
+        emb = vayesta.ewf.EWF(mf, bath_options=dict(bathtype="full"))
+        emb.kernel()
+        mf_clus = emb.fragments[0].hamil.to_pyscf_mf(allow_dummy_orbs=True, allow_df=True)[0]
+        eris = vayesta.solver.ccsd.DFCCSD(mf_clus).ao2mo()
+        eris_ref = pyscf.cc.dfccsd.RCCSD(mf_clus).ao2mo()
+        self.assertEqual(eris.ovvv.shape, eris_ref.ovvv.shape)
+        self.assertAllclose(eris.ovvv[:, 1:3], eris_ref.ovvv[:, 1:3])
+        self.assertAllclose(eris.get_ovvv(slice(2, 3)), eris_ref.get_ovvv(slice(2, 3)))
+        for key in ("oooo", "ovoo", "ovov", "ovvo", "oovv"):
+            self.assertAllclose(getattr(eris, key), getattr(eris_ref, key)[:])
+
+    def test_uhf_df(self):
+        mf = testsystems.water_cation_631g_df.uhf()
+        emb = vayesta.ewf.EWF(mf, bath_options=dict(threshold=1e-4), solver_options=dict(df=True))
+        with self.assertRaises(ValueError):
+            emb.kernel()
+
+
 if __name__ == "__main__":
     print("Running %s" % __file__)
     unittest.main()
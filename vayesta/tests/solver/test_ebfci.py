@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+import pyscf.ao2mo
+import pyscf.fci
+from pyscf.fci import direct_spin1, direct_uhf
+
+from vayesta.solver.eb_fci import ebfci_slow, uebfci_slow
+from vayesta.tests.common import TestCase
+
+
+def make_hamiltonian(norb, seed=0):
+    rng = np.random.default_rng(seed)
+    h1e = rng.random((norb, norb)) - 0.5
+    h1e = h1e + h1e.T
+    eri = rng.random((norb, norb, norb, norb)) - 0.5
+    eri = eri + eri.transpose(1, 0, 2, 3)
+    eri = eri + eri.transpose(0, 1, 3, 2)
+    eri = eri + eri.transpose(2, 3, 0, 1)
+    return h1e, eri
+
+
+class TestEBFCI(TestCase):
+    norb = 5
+    nelec = (3, 2)
+
+    def test_fermionic_limit(self):
+        """Without bosons, the sigma vector, diagonal and 1-DM have to agree with PySCF's FCI."""
+        norb, nelec = self.norb, self.nelec
+        h1e, eri = make_hamiltonian(norb)
+        h2e = direct_spin1.absorb_h1e(h1e, eri, norb, nelec, 0.5)
+        h2e = pyscf.ao2mo.restore(1, h2e, norb)
+        shape = ebfci_slow.make_shape(norb, nelec, 0, 0)
+        ci = np.random.default_rng(1).random(shape)
+        ci /= np.linalg.norm(ci)
+        hc = ebfci_slow.contract_all(h1e, h2e, None, None, ci, norb, nelec, 0, 0)
+        self.assertAllclose(hc, direct_spin1.contract_2e(h2e, ci, norb, nelec))
+        hdiag = ebfci_slow.make_hdiag(h1e, eri, None, np.zeros(0), norb, nelec, 0, 0)
+        self.assertAllclose(hdiag, direct_spin1.make_hdiag(h1e, eri, norb, nelec))
+        self.assertAllclose(ebfci_slow.make_rdm1(ci, norb, nelec), direct_spin1.make_rdm1(ci, norb, nelec))
+
+    def test_fermionic_limit_uhf(self):
+        norb, nelec = self.norb, self.nelec
+        h1ea, eriaa = make_hamiltonian(norb, seed=2)
+        h1eb, eribb = make_hamiltonian(norb, seed=3)
+        eriab = make_hamiltonian(norb, seed=4)[1]
+        h1e, eri = (h1ea, h1eb), (eriaa, eriab, eribb)
+        h2e = tuple(pyscf.ao2mo.restore(1, x, norb) for x in direct_uhf.absorb_h1e(h1e, eri, norb, nelec, 0.5))
+        shape = uebfci_slow.make_shape(norb, nelec, 0, 0)
+        ci = np.random.default_rng(1).random(shape)
+        ci /= np.linalg.norm(ci)
+        hc = uebfci_slow.contract_all(h1e, h2e, None, None, ci, norb, nelec, 0, 0)
+        self.assertAllclose(hc, direct_uhf.contract_2e(h2e, ci, norb, nelec))
+        hdiag = uebfci_slow.make_hdiag(h1e, eri, None, np.zeros(0), norb, nelec, 0, 0)
+        self.assertAllclose(hdiag, direct_uhf.make_hdiag(h1e, eri, norb, nelec))
+        for dm1, dm1_ref in zip(uebfci_slow.make_rdm1(ci, norb, nelec), direct_uhf.make_rdm1s(ci, norb, nelec)):
+            self.assertAllclose(dm1, dm1_ref)
+
+    def test_bosons(self):
+        """Bosonic creation and annihilation operators are adjoint and fulfil [b, b^+] = 1 below max. occupation."""
+        norb, nelec, nbos, max_occ = 3, (2, 1), 2, 3
+        shape = ebfci_slow.make_shape(norb, nelec, nbos, max_occ)
+        rng = np.random.default_rng(0)
+        x, y = rng.random(shape), rng.random(shape)
+        bx = ebfci_slow.apply_bos_annihilation(x, nbos, max_occ)
+        bdy = ebfci_slow.apply_bos_creation(y, nbos, max_occ)
+        self.assertAllclose(np.tensordot(bx, y, y.ndim), np.tensordot(bdy, x, x.ndim))
+        for ibos in range(nbos):
+            bbd = ebfci_slow.apply_bos_annihilation(bdy[ibos], nbos, max_occ)[ibos]
+            bdb = ebfci_slow.apply_bos_creation(
+                ebfci_slow.apply_bos_annihilation(y, nbos, max_occ)[ibos], nbos, max_occ
+            )
+            below_max = ebfci_slow.slices_for(ibos, nbos, slice(0, max_occ))
+            self.assertAllclose((bbd - bdb[ibos])[below_max], y[below_max])
+
+
+if __name__ == "__main__":
+    print("Running %s" % __file__)
+    unittest.main()
@@ -372,6 +372,9 @@ water_631g = TestMolecule(atom=molecules.water(), basis="6-31G", incore_anyway=T
 water_cation_631g = TestMolecule(atom=molecules.water(), basis="6-31G", charge=1, spin=1, incore_anyway=True)
 water_631g_df = TestMolecule(atom=molecules.water(), basis="6-31G", auxbasis="6-31G")
 water_cation_631g_df = TestMolecule(atom=molecules.water(), basis="6-31G", auxbasis="6-31G", charge=1, spin=1)
+water_chain_631g_df = TestMolecule(
+    atom=sum([molecules.water(origin=(0, 0, -3 * i)) for i in range(4)], []), basis="6-31G", auxbasis="6-31G"
+)
 
 water_ccpvdz = TestMolecule(atom=molecules.water(), basis="cc-pvdz")
 water_ccpvdz_df = TestMolecule(atom=molecules.water(), basis="cc-pvdz", auxbasis="cc-pvdz-jkfit")